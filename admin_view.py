@@ -5,8 +5,165 @@ import db_helpers
 import auth
 import config
 import json
+import centros_view
+import submission_view
+import analytics
+import submission_queue
+import query_stats
+import rerun_profiler
 
-def show_ui(df_centros):
+def _render_queue_status():
+    """Envíos en el spool local que aún no llegan a la base (ver submission_queue.py)."""
+    queue = submission_queue.get_queue()
+    stats = queue.stats()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("📥 Envíos en Cola", stats["pending"])
+    with col2:
+        st.metric("⏱️ Retraso de la Cola", f"{stats['lag_seconds']:.0f} s")
+    with col3:
+        st.metric("⚠️ Envíos Fallidos", stats["failed"])
+    if stats["pending"] and stats["last_error"]:
+        st.warning(f"Último error al guardar: {stats['last_error'][:150]}")
+    if stats["failed"]:
+        with st.expander("⚠️ Envíos que no se pudieron guardar"):
+            st.dataframe(pd.DataFrame(queue.spool.failed()), use_container_width=True, hide_index=True)
+            if st.button("🔁 Reintentar envíos fallidos", key="queue_requeue"):
+                st.success(f"{queue.requeue_failed()} envíos devueltos a la cola.")
+
+def _render_template_analytics():
+    """Agregados por campo de una plantilla, calculados en SQL sobre su tabla analítica."""
+    st.subheader("🔬 Análisis por Formulario")
+    area_options = {a['id']: a['name'] for a in database.get_all_areas()}
+    if not area_options:
+        st.info("No hay áreas creadas.")
+        return
+    col1, col2 = st.columns(2)
+    with col1:
+        area_id = st.selectbox("Área:", list(area_options), format_func=lambda x: area_options[x],
+                               key="analytics_area")
+    template_options = {t['id']: t['name'] for t in database.get_templates_by_area(area_id)}
+    if not template_options:
+        st.info("Esta área no tiene formularios.")
+        return
+    with col2:
+        template_id = st.selectbox("Formulario:", list(template_options),
+                                   format_func=lambda x: template_options[x], key="analytics_template")
+
+    # El refresco escribe (bloqueo, CREATE TABLE, INSERT…SELECT): solo con el
+    # botón o con `init_db.py --refresh-analytics`, nunca al dibujar el dashboard
+    if st.button("🔄 Actualizar análisis", key="analytics_refresh"):
+        success, msg = analytics.refresh_template(template_id)
+        if not success:
+            st.error(msg)
+            return
+    columns = analytics.get_analytics_columns(template_id)
+    if columns is None:
+        st.info("ℹ️ Análisis aún no calculado para este formulario. Usa \"Actualizar análisis\" "
+                "o programa `python init_db.py --refresh-analytics`.")
+        return
+
+    st.write("**Envíos por semana**")
+    per_week = analytics.get_submissions_per_week(template_id)
+    if per_week.empty:
+        st.info("Este formulario aún no tiene envíos.")
+        return
+    st.line_chart(per_week.set_index("semana")["envios"])
+
+    # Conteos por valor: solo campos de texto o fecha
+    groupable = {c["column"]: c["label"] for c in columns if c["kind"] in ("text", "date")}
+    if not groupable:
+        return
+    column = st.selectbox("Campo:", list(groupable), format_func=lambda c: groupable[c],
+                          key="analytics_field")
+    counts = analytics.get_field_value_counts(template_id, column)
+    if counts.empty:
+        st.info("Ningún envío tiene valor en este campo.")
+    else:
+        st.bar_chart(counts.set_index("valor")["envios"])
+
+def _render_performance():
+    """Latencias por función de base de datos (query_stats.py) y estado del pool."""
+    st.header("⏱️ Rendimiento de la Base de Datos")
+    if not config.QUERY_STATS_ENABLED:
+        st.info("La instrumentación está desactivada (QUERY_STATS_ENABLED en config.py).")
+        return
+
+    stats = query_stats.get_stats()
+    snapshot = stats.snapshot()
+    st.caption(f"Mediciones desde {snapshot['since']} en este proceso.")
+
+    pool = database.get_pool_stats()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("🔌 Conexiones en Uso", f"{pool['in_use']} / {pool['max']}")
+    with col2:
+        st.metric("💤 Conexiones Ociosas", pool["idle"])
+    with col3:
+        st.metric("⏳ Esperas por Conexión", pool["waits"])
+    with col4:
+        st.metric("⌛ Espera Máxima", f"{pool['wait_time_max_ms']:.0f} ms")
+
+    functions = snapshot["functions"]
+    if not functions:
+        st.info("Aún no hay consultas medidas.")
+    else:
+        rows = []
+        for name, f in functions.items():
+            wall = f["wall"]
+            rows.append({
+                "función": name,
+                "llamadas": f["calls"],
+                "total ms": round(wall["mean_ms"] * wall["count"], 1),
+                "media ms": wall["mean_ms"],
+                "p50 ms": wall["p50_ms"],
+                "p95 ms": wall["p95_ms"],
+                "máx ms": wall["max_ms"],
+                "base ms": f["db_ms_total"],
+                "conversión ms": f["convert_ms_total"],
+                "filas": f["rows_total"],
+                "KB": round(f["bytes_total"] / 1024, 1),
+                "errores": f["errors"],
+            })
+        with rerun_profiler.section("tabla de rendimiento", kind="df"):
+            perf_df = pd.DataFrame(rows).sort_values("total ms", ascending=False)
+        st.dataframe(perf_df, use_container_width=True, hide_index=True)
+        st.caption("p50/p95 son el límite superior del bucket del histograma. "
+                   "Conversión = tiempo del bloque fuera de la base (pandas, json, Python).")
+
+    st.subheader(f"🐢 Consultas Lentas (≥ {snapshot['slow_query_ms']} ms)")
+    if snapshot["slow_queries"]:
+        slow_df = pd.DataFrame(snapshot["slow_queries"][::-1])
+        slow_df["params"] = slow_df["params"].astype(str)
+        st.dataframe(slow_df, use_container_width=True, hide_index=True)
+    else:
+        st.info("Sin consultas lentas registradas.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("📥 Descargar instantánea (JSON)", data=stats.to_json(),
+                           file_name="rendimiento_consultas.json", mime="application/json",
+                           key="perf_download")
+    with col2:
+        if st.button("🧹 Reiniciar mediciones", key="perf_reset"):
+            stats.reset()
+            st.rerun()
+
+# Widgets cuyo valor debe sobrevivir mientras su sección no se muestra:
+# Streamlit descarta el estado de los widgets que no se dibujan en un rerun
+_PERSISTED_WIDGET_KEYS = (
+    "admin_search_term", "admin_provincia_filter", "admin_tipo_filter", "admin_fuzzy",
+    "admin_attach_selectbox", "analytics_area", "analytics_template", "analytics_field",
+    "review_area_filter", "review_user_filter", "review_status_filter",
+)
+
+def _keep_widget_state(keys):
+    """Reasignar el valor lo convierte en estado de sesión que no se borra."""
+    for key in keys:
+        if key in st.session_state:
+            st.session_state[key] = st.session_state[key]
+
+def show_ui(centros, centros_index, geo_index, registry):
     st.title(f"Panel de Administrador")
     
     tab_list = [
@@ -15,527 +172,589 @@ def show_ui(df_centros):
         "🛠️ Creador de Formularios",
         "🗂️ Gestión de Áreas",
         "👤 Gestión de Usuarios",
-        "📋 Revisión de Envíos"
+        "📋 Revisión de Envíos",
+        "⏱️ Rendimiento"
     ]
     
-    tab_dashboard, tab_buscador, tab_creator, tab_areas, tab_users, tab_review = st.tabs(tab_list)
+    # Navegación en vez de st.tabs: st.tabs ejecuta el cuerpo de todas las
+    # pestañas en cada rerun; aquí solo corre (y consulta la base) la elegida
+    _keep_widget_state(_PERSISTED_WIDGET_KEYS)
+    section = st.segmented_control("Sección", tab_list, default=tab_list[0],
+                                   key="admin_section", label_visibility="collapsed")
+    # Volver a pulsar la sección activa la deselecciona (None): se queda en el Dashboard
+    section = section or tab_list[0]
+    st.divider()
 
     # --- 1. DASHBOARD ---
-    with tab_dashboard:
-        st.header("Dashboard de Operaciones")
+    if section == tab_list[0]:
+        with rerun_profiler.section("Dashboard"):
+            st.header("Dashboard de Operaciones")
         
-        try:
-            total_envios = database.get_total_submission_count()
-            envios_area = database.get_submission_count_by_area()
-            envios_usuario = database.get_submission_count_by_user()
+            try:
+                # Contadores pre-agregados (tabla submission_rollups)
+                counts = database.get_dashboard_counts()
+                envios_area = database.get_submission_count_by_area()
+                envios_usuario = database.get_submission_count_by_user()
             
-            # Mostrar métricas principales en fila
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("📋 Total de Envíos", total_envios)
-            with col2:
-                try:
-                    areas_count = len(database.get_all_areas())
-                    st.metric("🗂️ Áreas Creadas", areas_count)
-                except:
-                    st.metric("🗂️ Áreas Creadas", 0)
-            with col3:
-                try:
-                    users_count = len(database.get_all_users())
-                    st.metric("👥 Usuarios", users_count)
-                except:
-                    st.metric("👥 Usuarios", 0)
+                # Mostrar métricas principales en fila
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("📋 Total de Envíos", counts["total"])
+                with col2:
+                    st.metric("⏳ Pendientes de Revisión", counts["pending"])
+                with col3:
+                    st.metric("🗂️ Áreas Creadas", counts["areas"])
+                with col4:
+                    st.metric("👥 Usuarios", counts["users"])
+
+                if config.SUBMISSION_QUEUE_ENABLED:
+                    _render_queue_status()
             
-            st.divider()
+                st.divider()
             
-            # Gráficos y tablas
-            col1, col2 = st.columns(2)
-            with col1:
-                st.subheader("📊 Envíos por Área")
-                if not envios_area.empty:
-                    st.bar_chart(envios_area.set_index("area_name")["submission_count"])
-                else:
-                    st.info("Aún no hay envíos.")
+                # Gráficos y tablas
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.subheader("📊 Envíos por Área")
+                    if not envios_area.empty:
+                        st.bar_chart(envios_area.set_index("area_name")["submission_count"])
+                    else:
+                        st.info("Aún no hay envíos.")
             
-            with col2:
-                st.subheader("👥 Actividad por Usuario")
-                if not envios_usuario.empty:
-                    st.dataframe(envios_usuario, use_container_width=True, hide_index=True)
+                with col2:
+                    st.subheader("👥 Actividad por Usuario")
+                    if not envios_usuario.empty:
+                        with rerun_profiler.section("tabla por usuario", kind="render"):
+                            st.dataframe(envios_usuario, use_container_width=True, hide_index=True)
+                    else:
+                        st.info("Aún no hay envíos.")
+
+                st.subheader("📅 Envíos por Día (últimos 30 días)")
+                envios_dia = database.get_submission_count_by_day(days=30)
+                if not envios_dia.empty:
+                    st.line_chart(envios_dia.set_index("day")["submission_count"])
                 else:
-                    st.info("Aún no hay envíos.")
+                    st.info("Sin envíos en los últimos 30 días.")
             
-            # Últimos envíos
-            st.divider()
-            st.subheader("📋 Últimos Envíos Recibidos")
-            try:
-                last_submissions = database.get_all_submissions_with_details()
-                if not last_submissions.empty:
-                    st.dataframe(last_submissions.head(10), use_container_width=True, hide_index=True)
-                else:
-                    st.info("No hay envíos todavía.")
-            except Exception as e:
-                st.warning(f"No se pueden cargar los últimos envíos: {str(e)[:50]}")
+                # Últimos envíos
+                st.divider()
+                st.subheader("📋 Últimos Envíos Recibidos")
+                try:
+                    last_submissions, _ = db_helpers.get_submissions_page(page_size=10)
+                    if not last_submissions.empty:
+                        st.dataframe(last_submissions, use_container_width=True, hide_index=True)
+                    else:
+                        st.info("No hay envíos todavía.")
+                except Exception as e:
+                    st.warning(f"No se pueden cargar los últimos envíos: {str(e)[:50]}")
+
+                st.divider()
+                _render_template_analytics()
                     
-        except Exception as e:
-            st.error(f"❌ Error cargando el dashboard: {str(e)[:100]}")
+            except Exception as e:
+                st.error(f"❌ Error cargando el dashboard: {str(e)[:100]}")
 
     # --- 2. BUSCADOR DE CENTROS (CON LÓGICA DE ADJUNTAR) ---
-    with tab_buscador:
-        st.header("🔎 Consulta de Centros Educativos")
-        
-        # Filtros de búsqueda
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            search_term = st.text_input("🔍 Buscar por nombre:", placeholder="Ej: Científico")
-        with col2:
-            provincia_filter = st.selectbox("📍 Filtrar por provincia:", 
-                                           ["Todas"] + sorted(df_centros['PROVINCIA'].unique().tolist()))
-        with col3:
-            tipo_institucion = st.selectbox("🏢 Filtrar por tipo:",
-                                          ["Todos"] + sorted(df_centros['TIPO_INSTITUCION'].unique().tolist()))
+    if section == tab_list[1]:
+        with rerun_profiler.section("Buscador de Centros"):
+            st.header("🔎 Consulta de Centros Educativos")
         
-        # Aplicar filtros
-        df_filtered = df_centros.copy()
-        
-        if search_term:
-            df_filtered = df_filtered[
-                df_filtered['CENTRO_EDUCATIVO'].str.contains(search_term, case=False, na=False)
-            ]
+            # Filtros de búsqueda
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                search_term = st.text_input("🔍 Buscar por nombre, dirección o código:", placeholder="Ej: Científico",
+                                            key="admin_search_term")
+            with col2:
+                provincia_filter = st.selectbox("📍 Filtrar por provincia:", 
+                                               ["Todas"] + registry.provincias, key="admin_provincia_filter")
+            with col3:
+                tipo_institucion = st.selectbox("🏢 Filtrar por tipo:",
+                                              ["Todos"] + registry.tipos, key="admin_tipo_filter")
         
-        if provincia_filter != "Todas":
-            df_filtered = df_filtered[df_filtered['PROVINCIA'] == provincia_filter]
+            fuzzy_search = st.checkbox("🔤 Tolerar errores de escritura (búsqueda aproximada)", key="admin_fuzzy")
         
-        if tipo_institucion != "Todos":
-            df_filtered = df_filtered[df_filtered['TIPO_INSTITUCION'] == tipo_institucion]
+            # Aplicar filtros: posiciones de fila sobre el catálogo compartido, sin copiarlo
+            positions, similarity = centros.select(
+                centros_index,
+                search_term=search_term,
+                provincia=provincia_filter if provincia_filter != "Todas" else None,
+                tipo=tipo_institucion if tipo_institucion != "Todos" else None,
+                fuzzy=fuzzy_search
+            )
         
-        # Mostrar resultados
-        st.info(f"📊 Mostrando {len(df_filtered)} de {len(df_centros)} centros")
-        st.dataframe(df_filtered, use_container_width=True, height=300)
+            # Mostrar resultados
+            st.info(f"📊 Mostrando {len(positions)} de {len(centros)} centros")
+            st.dataframe(centros.take(positions, similarity), use_container_width=True, height=300)
         
-        st.divider()
-        st.subheader("📎 Adjuntar Centro a un Formulario")
-        st.write("Seleccione un centro para pre-llenar sus datos en un nuevo formulario.")
-
-        lista_nombres_centros = sorted(df_centros['CENTRO_EDUCATIVO'].unique().tolist())
-
-        centro_para_adjuntar = st.selectbox(
-            "Seleccione el centro que desea adjuntar:",
-            options=lista_nombres_centros,
-            index=None,
-            placeholder="Escriba o seleccione un centro...",
-            key="admin_attach_selectbox"
-        )
-
-        if st.button("✅ Adjuntar Centro Seleccionado", key="btn_adjuntar_admin"):
-            if centro_para_adjuntar:
-                datos_centro_seleccionado = df_centros[
-                    df_centros['CENTRO_EDUCATIVO'] == centro_para_adjuntar
-                ].iloc[0]
+            st.divider()
+            st.subheader("📎 Adjuntar Centro a un Formulario")
+            st.write("Seleccione un centro para pre-llenar sus datos en un nuevo formulario.")
+
+            # Opciones por CODSABER: el nombre no es único
+            codigo_para_adjuntar = st.selectbox(
+                "Seleccione el centro que desea adjuntar:",
+                options=registry.attach_options,
+                format_func=registry.label,
+                index=None,
+                placeholder="Escriba o seleccione un centro...",
+                key="admin_attach_selectbox"
+            )
+
+            if st.button("✅ Adjuntar Centro Seleccionado", key="btn_adjuntar_admin"):
+                if codigo_para_adjuntar:
+                    datos_centro_seleccionado = registry.get(codigo_para_adjuntar)
                 
-                st.session_state.centro_adjunto = datos_centro_seleccionado.to_dict()
+                    st.session_state.centro_adjunto = datos_centro_seleccionado
                 
-                st.success(f"✅ ¡Centro '{centro_para_adjuntar}' adjuntado!")
-                st.info("💡 Los datos se pre-llenarán automáticamente en el formulario.")
+                    st.success(f"✅ ¡Centro '{datos_centro_seleccionado['CENTRO_EDUCATIVO']}' adjuntado!")
+                    st.info("💡 Los datos se pre-llenarán automáticamente en el formulario.")
                 
-                # Mostrar datos del centro
-                with st.expander("Ver datos del centro adjunto"):
-                    for col in datos_centro_seleccionado.index:
-                        st.write(f"**{col}**: {datos_centro_seleccionado[col]}")
-            else:
-                st.warning("⚠️ Por favor, seleccione un centro de la lista.")
+                    # Mostrar datos del centro
+                    with st.expander("Ver datos del centro adjunto"):
+                        for col, value in datos_centro_seleccionado.items():
+                            st.write(f"**{col}**: {value}")
+                else:
+                    st.warning("⚠️ Por favor, seleccione un centro de la lista.")
+
+            st.divider()
+            centros_view.render_nearest_centers(registry, geo_index, key_prefix="admin")
 
     # --- 3. CREADOR DE FORMULARIOS ---
-    with tab_creator:
-        st.header("Creador de Plantillas de Formularios")
+    if section == tab_list[2]:
+        with rerun_profiler.section("Creador de Formularios"):
+            st.header("Creador de Plantillas de Formularios")
         
-        with st.form("new_template_form"):
-            st.subheader("Detalles de la Plantilla")
+            with st.form("new_template_form"):
+                st.subheader("Detalles de la Plantilla")
             
-            area_options = {}  # Initialize to an empty dictionary
-            try:
-                areas_list = database.get_all_areas()
-                area_options = {area['id']: area['name'] for area in areas_list}
-                if not area_options:
-                    st.warning("No hay áreas creadas. Vaya a 'Gestión de Áreas' primero.")
+                area_options = {}  # Initialize to an empty dictionary
+                try:
+                    areas_list = database.get_all_areas()
+                    area_options = {area['id']: area['name'] for area in areas_list}
+                    if not area_options:
+                        st.warning("No hay áreas creadas. Vaya a 'Gestión de Áreas' primero.")
+                        st.stop()
+                except Exception as e:
+                    st.error(f"Error cargando áreas: {e}")
                     st.stop()
-            except Exception as e:
-                st.error(f"Error cargando áreas: {e}")
-                st.stop()
             
-            template_name = st.text_input("Nombre de la Plantilla", placeholder="Ej: Reporte de Visita Técnica")
-            # Usar lista explícita de keys para evitar comportamientos inesperados
-            template_area_id = st.selectbox(
-                "Asignar al Área:", 
-                options=list(area_options.keys()), 
-                format_func=lambda x: area_options.get(x, "<Área desconocida>")
-            )
+                template_name = st.text_input("Nombre de la Plantilla", placeholder="Ej: Reporte de Visita Técnica")
+                # Usar lista explícita de keys para evitar comportamientos inesperados
+                template_area_id = st.selectbox(
+                    "Asignar al Área:", 
+                    options=list(area_options.keys()), 
+                    format_func=lambda x: area_options.get(x, "<Área desconocida>")
+                )
             
-            st.subheader("Constructor de Campos")
-            st.write("Defina los campos que tendrá este formulario.")
+                st.subheader("Constructor de Campos")
+                st.write("Defina los campos que tendrá este formulario.")
             
-            if 'template_fields' not in st.session_state:
-                st.session_state.template_fields = pd.DataFrame(
-                    [
-                        {"Etiqueta del Campo": "Nombre del Visitante", "Tipo de Campo": "Texto", "Requerido": True},
-                        {"Etiqueta del Campo": "Nombre del Centro", "Tipo de Campo": "Texto", "Requerido": False},
-                        {"Etiqueta del Campo": "Provincia", "Tipo de Campo": "Texto", "Requerido": False},
-                    ]
-                )
+                if 'template_fields' not in st.session_state:
+                    st.session_state.template_fields = pd.DataFrame(
+                        [
+                            {"Etiqueta del Campo": "Nombre del Visitante", "Tipo de Campo": "Texto", "Requerido": True},
+                            {"Etiqueta del Campo": "Nombre del Centro", "Tipo de Campo": "Texto", "Requerido": False},
+                            {"Etiqueta del Campo": "Provincia", "Tipo de Campo": "Texto", "Requerido": False},
+                        ]
+                    )
             
-            st.session_state.template_fields = st.data_editor(
-                st.session_state.template_fields,
-                num_rows="dynamic",
-                column_config={
-                    "Etiqueta del Campo": st.column_config.TextColumn(required=True),
-                    "Tipo de Campo": st.column_config.SelectboxColumn(options=config.FIELD_TYPES, required=True),
-                    "Requerido": st.column_config.CheckboxColumn(default=False)
-                },
-                use_container_width=True,
-                height=300
-            )
+                st.session_state.template_fields = st.data_editor(
+                    st.session_state.template_fields,
+                    num_rows="dynamic",
+                    column_config={
+                        "Etiqueta del Campo": st.column_config.TextColumn(required=True),
+                        "Tipo de Campo": st.column_config.SelectboxColumn(options=config.FIELD_TYPES, required=True),
+                        "Requerido": st.column_config.CheckboxColumn(default=False)
+                    },
+                    use_container_width=True,
+                    height=300
+                )
             
-            col1, col2 = st.columns(2)
-            with col1:
-                submitted = st.form_submit_button("✅ Guardar Plantilla")
-            with col2:
-                clear_form = st.form_submit_button("🔄 Limpiar Formulario")
+                col1, col2 = st.columns(2)
+                with col1:
+                    submitted = st.form_submit_button("✅ Guardar Plantilla")
+                with col2:
+                    clear_form = st.form_submit_button("🔄 Limpiar Formulario")
             
-            if submitted:
-                if not template_name or not template_name.strip():
-                    st.error("El nombre de la plantilla es requerido.")
-                elif len(template_name.strip()) > config.MAX_TEMPLATE_NAME_LENGTH:
-                    st.error(f"El nombre no puede exceder {config.MAX_TEMPLATE_NAME_LENGTH} caracteres.")
-                else:
-                    # Normalizar estructura desde la sesión (DataFrame o lista)
-                    raw_fields = st.session_state.get('template_fields')
-                    structure = None
-
-                    if raw_fields is None:
-                        st.error("Debe agregar al menos un campo.")
+                if submitted:
+                    if not template_name or not template_name.strip():
+                        st.error("El nombre de la plantilla es requerido.")
+                    elif len(template_name.strip()) > config.MAX_TEMPLATE_NAME_LENGTH:
+                        st.error(f"El nombre no puede exceder {config.MAX_TEMPLATE_NAME_LENGTH} caracteres.")
                     else:
-                        try:
-                            if hasattr(raw_fields, 'to_dict'):
-                                structure = raw_fields.to_dict('records')
-                            elif isinstance(raw_fields, list):
-                                structure = raw_fields
-                            else:
-                                # Intentar convertir a lista de registros
-                                structure = list(raw_fields)
-                        except Exception:
-                            structure = None
+                        # Normalizar estructura desde la sesión (DataFrame o lista)
+                        raw_fields = st.session_state.get('template_fields')
+                        structure = None
 
-                    if not structure or len(structure) == 0:
-                        st.error("Debe agregar al menos un campo válido.")
-                    else:
-                        # Validaciones por campo
-                        invalid = False
-                        for i, f in enumerate(structure):
-                            label = f.get('Etiqueta del Campo') if isinstance(f, dict) else None
-                            ftype = f.get('Tipo de Campo') if isinstance(f, dict) else None
-                            req = f.get('Requerido') if isinstance(f, dict) else False
-
-                            if not label or not str(label).strip():
-                                st.error(f"Campo #{i+1}: la etiqueta es requerida.")
-                                invalid = True
-                                break
-                            if len(str(label).strip()) > config.MAX_FIELD_LABEL_LENGTH:
-                                st.error(f"Campo '{label}': la etiqueta excede {config.MAX_FIELD_LABEL_LENGTH} caracteres.")
-                                invalid = True
-                                break
-                            if ftype not in config.FIELD_TYPES:
-                                st.error(f"Campo '{label}': tipo de campo inválido.")
-                                invalid = True
-                                break
-
-                        if not invalid:
+                        if raw_fields is None:
+                            st.error("Debe agregar al menos un campo.")
+                        else:
                             try:
-                                database.save_form_template(
-                                    template_name.strip(),
-                                    structure,
-                                    st.session_state.get("user_id"),
-                                    template_area_id
-                                )
-                                st.success(f"¡Plantilla '{template_name.strip()}' guardada!")
-                                if 'template_fields' in st.session_state:
-                                    del st.session_state['template_fields']
-                                st.rerun()
-                            except Exception as e:
-                                st.error(f"Error al guardar: {e}")
+                                if hasattr(raw_fields, 'to_dict'):
+                                    structure = raw_fields.to_dict('records')
+                                elif isinstance(raw_fields, list):
+                                    structure = raw_fields
+                                else:
+                                    # Intentar convertir a lista de registros
+                                    structure = list(raw_fields)
+                            except Exception:
+                                structure = None
+
+                        if not structure or len(structure) == 0:
+                            st.error("Debe agregar al menos un campo válido.")
+                        else:
+                            # Validaciones por campo
+                            invalid = False
+                            for i, f in enumerate(structure):
+                                label = f.get('Etiqueta del Campo') if isinstance(f, dict) else None
+                                ftype = f.get('Tipo de Campo') if isinstance(f, dict) else None
+                                req = f.get('Requerido') if isinstance(f, dict) else False
+
+                                if not label or not str(label).strip():
+                                    st.error(f"Campo #{i+1}: la etiqueta es requerida.")
+                                    invalid = True
+                                    break
+                                if len(str(label).strip()) > config.MAX_FIELD_LABEL_LENGTH:
+                                    st.error(f"Campo '{label}': la etiqueta excede {config.MAX_FIELD_LABEL_LENGTH} caracteres.")
+                                    invalid = True
+                                    break
+                                if ftype not in config.FIELD_TYPES:
+                                    st.error(f"Campo '{label}': tipo de campo inválido.")
+                                    invalid = True
+                                    break
+
+                            if not invalid:
+                                try:
+                                    database.save_form_template(
+                                        template_name.strip(),
+                                        structure,
+                                        st.session_state.get("user_id"),
+                                        template_area_id
+                                    )
+                                    st.success(f"¡Plantilla '{template_name.strip()}' guardada!")
+                                    if 'template_fields' in st.session_state:
+                                        del st.session_state['template_fields']
+                                    st.rerun()
+                                except Exception as e:
+                                    st.error(f"Error al guardar: {e}")
             
-            if clear_form:
-                st.session_state.template_fields = pd.DataFrame(
-                    [
-                        {"Etiqueta del Campo": "", "Tipo de Campo": "Texto", "Requerido": False},
-                    ]
-                )
-                st.rerun()
+                if clear_form:
+                    st.session_state.template_fields = pd.DataFrame(
+                        [
+                            {"Etiqueta del Campo": "", "Tipo de Campo": "Texto", "Requerido": False},
+                        ]
+                    )
+                    st.rerun()
 
     # --- 4. GESTIÓN DE ÁREAS ---
-    with tab_areas:
-        st.header("Gestión de Áreas de Formularios")
+    if section == tab_list[3]:
+        with rerun_profiler.section("Gestión de Áreas"):
+            st.header("Gestión de Áreas de Formularios")
         
-        with st.form("new_area_form", clear_on_submit=True):
-            st.subheader("Crear Nueva Área")
-            area_name = st.text_input("Nombre del Área")
-            area_desc = st.text_area("Descripción")
-            if st.form_submit_button("Crear Área"):
-                if not area_name or not area_name.strip():
-                    st.error("El nombre del área es requerido.")
-                elif len(area_name.strip()) > config.MAX_AREA_NAME_LENGTH:
-                    st.error(f"El nombre del área no puede exceder {config.MAX_AREA_NAME_LENGTH} caracteres.")
-                else:
-                    success, message = database.create_area(area_name.strip(), area_desc.strip())
-                    if success:
-                        st.success(message)
+            with st.form("new_area_form", clear_on_submit=True):
+                st.subheader("Crear Nueva Área")
+                area_name = st.text_input("Nombre del Área")
+                area_desc = st.text_area("Descripción")
+                if st.form_submit_button("Crear Área"):
+                    if not area_name or not area_name.strip():
+                        st.error("El nombre del área es requerido.")
+                    elif len(area_name.strip()) > config.MAX_AREA_NAME_LENGTH:
+                        st.error(f"El nombre del área no puede exceder {config.MAX_AREA_NAME_LENGTH} caracteres.")
                     else:
-                        st.error(message)
+                        success, message = database.create_area(area_name.strip(), area_desc.strip())
+                        if success:
+                            st.success(message)
+                        else:
+                            st.error(message)
         
-        st.divider()
-        st.subheader("Áreas Existentes")
-        try:
-            areas = database.get_all_areas()
-            areas_df = pd.DataFrame(areas)
-            if not areas_df.empty:
-                st.dataframe(areas_df.drop(columns=["description"]), use_container_width=True)
-
-                # Editar / Eliminar área
-                st.subheader("Editar / Eliminar Área")
-                area_ids = areas_df['id'].tolist()
-                selected_area = st.selectbox(
-                    "Selecciona un área:",
-                    options=area_ids,
-                    format_func=lambda x: areas_df[areas_df['id']==x]['name'].values[0]
-                )
-                area_row = next((a for a in areas if a['id'] == selected_area), None)
-                if area_row:
-                    new_name = st.text_input("Nombre del Área", value=area_row['name'], key="edit_area_name")
-                    new_desc = st.text_area("Descripción", value=area_row['description'] or "", key="edit_area_desc")
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        if st.button("Actualizar Área"):
-                            success, msg = db_helpers.update_area(selected_area, new_name.strip(), new_desc.strip())
-                            if success:
-                                st.success(msg)
-                                st.experimental_rerun()
-                            else:
-                                st.error(msg)
-                    with col2:
-                        confirm_key = f"confirm_delete_area_{selected_area}"
-                        st.checkbox("Confirmar eliminación (irreversible)", key=confirm_key)
-                        if st.button("Eliminar Área Definitivamente"):
-                            if st.session_state.get(confirm_key):
-                                success, msg = db_helpers.delete_area(selected_area)
+            st.divider()
+            st.subheader("Áreas Existentes")
+            try:
+                areas = database.get_all_areas()
+                areas_df = pd.DataFrame(areas)
+                if not areas_df.empty:
+                    st.dataframe(areas_df.drop(columns=["description"]), use_container_width=True)
+
+                    # Editar / Eliminar área
+                    st.subheader("Editar / Eliminar Área")
+                    area_ids = areas_df['id'].tolist()
+                    selected_area = st.selectbox(
+                        "Selecciona un área:",
+                        options=area_ids,
+                        format_func=lambda x: areas_df[areas_df['id']==x]['name'].values[0]
+                    )
+                    area_row = next((a for a in areas if a['id'] == selected_area), None)
+                    if area_row:
+                        new_name = st.text_input("Nombre del Área", value=area_row['name'], key="edit_area_name")
+                        new_desc = st.text_area("Descripción", value=area_row['description'] or "", key="edit_area_desc")
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            if st.button("Actualizar Área"):
+                                success, msg = db_helpers.update_area(selected_area, new_name.strip(), new_desc.strip())
                                 if success:
                                     st.success(msg)
-                                    st.experimental_rerun()
+                                    st.rerun()
                                 else:
                                     st.error(msg)
-                            else:
-                                st.warning("Por favor confirma la eliminación marcando la casilla.")
-            else:
-                st.info("No hay áreas aún.")
-        except Exception as e:
-            st.error(f"Error al cargar áreas: {e}")
+                        with col2:
+                            confirm_key = f"confirm_delete_area_{selected_area}"
+                            st.checkbox("Confirmar eliminación (irreversible)", key=confirm_key)
+                            if st.button("Eliminar Área Definitivamente"):
+                                if st.session_state.get(confirm_key):
+                                    success, msg = db_helpers.delete_area(selected_area)
+                                    if success:
+                                        st.success(msg)
+                                        st.rerun()
+                                    else:
+                                        st.error(msg)
+                                else:
+                                    st.warning("Por favor confirma la eliminación marcando la casilla.")
+                else:
+                    st.info("No hay áreas aún.")
+            except Exception as e:
+                st.error(f"Error al cargar áreas: {e}")
 
     # --- 5. GESTIÓN DE USUARIOS ---
-    with tab_users:
-        st.header("Gestión de Usuarios")
+    if section == tab_list[4]:
+        with rerun_profiler.section("Gestión de Usuarios"):
+            st.header("Gestión de Usuarios")
         
-        with st.form("new_user_form", clear_on_submit=True):
-            st.subheader("Crear Nuevo Usuario")
-            col1, col2 = st.columns(2)
-            with col1:
-                full_name = st.text_input("Nombre Completo")
-                username = st.text_input("Nombre de Usuario (para login)")
-            with col2:
-                role = st.selectbox("Rol", config.ALLOWED_ROLES)
-                password = st.text_input("Contraseña", type="password")
+            with st.form("new_user_form", clear_on_submit=True):
+                st.subheader("Crear Nuevo Usuario")
+                col1, col2 = st.columns(2)
+                with col1:
+                    full_name = st.text_input("Nombre Completo")
+                    username = st.text_input("Nombre de Usuario (para login)")
+                with col2:
+                    role = st.selectbox("Rol", config.ALLOWED_ROLES)
+                    password = st.text_input("Contraseña", type="password")
             
-            if st.form_submit_button("Crear Usuario"):
-                # Validar nombre completo
-                is_valid, error_msg = auth.validate_full_name(full_name)
-                if not is_valid:
-                    st.error(error_msg)
-                else:
-                    # Validar nombre de usuario
-                    is_valid, error_msg = auth.validate_username(username)
+                if st.form_submit_button("Crear Usuario"):
+                    # Validar nombre completo
+                    is_valid, error_msg = auth.validate_full_name(full_name)
                     if not is_valid:
                         st.error(error_msg)
                     else:
-                        # Validar contraseña
-                        is_valid, error_msg = auth.validate_password(password)
+                        # Validar nombre de usuario
+                        is_valid, error_msg = auth.validate_username(username)
                         if not is_valid:
                             st.error(error_msg)
                         else:
-                            success, message = database.create_user(username.strip(), password, role, full_name.strip())
-                            if success:
-                                st.success(message)
+                            # Validar contraseña
+                            is_valid, error_msg = auth.validate_password(password)
+                            if not is_valid:
+                                st.error(error_msg)
                             else:
-                                st.error(message)
+                                success, message = database.create_user(username.strip(), password, role, full_name.strip())
+                                if success:
+                                    st.success(message)
+                                else:
+                                    st.error(message)
         
-        st.divider()
-        st.subheader("Usuarios Existentes")
-        try:
-            users_df = database.get_all_users()
-            st.dataframe(users_df, use_container_width=True)
-            if not users_df.empty:
-                st.subheader("Editar / Eliminar Usuario")
-                user_ids = users_df['id'].tolist()
-                selected_user = st.selectbox(
-                    "Selecciona un usuario:",
-                    options=user_ids,
-                    format_func=lambda x: f"{users_df[users_df['id']==x]['full_name'].values[0]} ({users_df[users_df['id']==x]['username'].values[0]})"
-                )
-                user_row = db_helpers.get_user_by_id(selected_user)
-                if user_row:
-                    new_full_name = st.text_input("Nombre completo", value=user_row.get('full_name',''), key='edit_user_fullname')
-                    try:
-                        current_index = list(config.ALLOWED_ROLES).index(user_row.get('role')) if user_row.get('role') in config.ALLOWED_ROLES else 0
-                    except Exception:
-                        current_index = 0
-                    new_role = st.selectbox("Rol", config.ALLOWED_ROLES, index=current_index, key='edit_user_role')
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        if st.button("Actualizar Usuario"):
-                            success, msg = db_helpers.update_user(selected_user, role=new_role, full_name=new_full_name.strip())
-                            if success:
-                                st.success(msg)
-                                st.experimental_rerun()
-                            else:
-                                st.error(msg)
-                    with col2:
-                        confirm_key = f"confirm_delete_user_{selected_user}"
-                        st.checkbox("Confirmar eliminación (irreversible)", key=confirm_key)
-                        if st.button("Eliminar Usuario Definitivamente"):
-                            if st.session_state.get(confirm_key):
-                                # Prevent deleting yourself
-                                if selected_user == st.session_state.get('user_id'):
-                                    st.error("No puedes eliminar el usuario con el que estás autenticado.")
+            st.divider()
+            st.subheader("Usuarios Existentes")
+            try:
+                users_df = database.get_all_users()
+                st.dataframe(users_df, use_container_width=True)
+                if not users_df.empty:
+                    st.subheader("Editar / Eliminar Usuario")
+                    user_ids = users_df['id'].tolist()
+                    selected_user = st.selectbox(
+                        "Selecciona un usuario:",
+                        options=user_ids,
+                        format_func=lambda x: f"{users_df[users_df['id']==x]['full_name'].values[0]} ({users_df[users_df['id']==x]['username'].values[0]})"
+                    )
+                    user_row = db_helpers.get_user_by_id(selected_user)
+                    if user_row:
+                        new_full_name = st.text_input("Nombre completo", value=user_row.get('full_name',''), key='edit_user_fullname')
+                        try:
+                            current_index = list(config.ALLOWED_ROLES).index(user_row.get('role')) if user_row.get('role') in config.ALLOWED_ROLES else 0
+                        except Exception:
+                            current_index = 0
+                        new_role = st.selectbox("Rol", config.ALLOWED_ROLES, index=current_index, key='edit_user_role')
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            if st.button("Actualizar Usuario"):
+                                success, msg = db_helpers.update_user(selected_user, role=new_role, full_name=new_full_name.strip())
+                                if success:
+                                    st.success(msg)
+                                    st.rerun()
                                 else:
-                                    success, msg = db_helpers.delete_user(selected_user)
-                                    if success:
-                                        st.success(msg)
-                                        st.experimental_rerun()
+                                    st.error(msg)
+                        with col2:
+                            confirm_key = f"confirm_delete_user_{selected_user}"
+                            st.checkbox("Confirmar eliminación (irreversible)", key=confirm_key)
+                            if st.button("Eliminar Usuario Definitivamente"):
+                                if st.session_state.get(confirm_key):
+                                    # Prevent deleting yourself
+                                    if selected_user == st.session_state.get('user_id'):
+                                        st.error("No puedes eliminar el usuario con el que estás autenticado.")
                                     else:
-                                        st.error(msg)
-                            else:
-                                st.warning("Por favor confirma la eliminación marcando la casilla.")
-        except Exception as e:
-            st.error(f"Error al cargar usuarios: {e}")
+                                        success, msg = db_helpers.delete_user(selected_user)
+                                        if success:
+                                            st.success(msg)
+                                            st.rerun()
+                                        else:
+                                            st.error(msg)
+                                else:
+                                    st.warning("Por favor confirma la eliminación marcando la casilla.")
+            except Exception as e:
+                st.error(f"Error al cargar usuarios: {e}")
 
     # --- 6. REVISIÓN DE ENVÍOS ---
-    with tab_review:
-        st.header("📋 Revisión de Todos los Envíos")
+    if section == tab_list[5]:
+        with rerun_profiler.section("Revisión de Envíos"):
+            st.header("📋 Revisión de Todos los Envíos")
         
-        try:
-            all_submissions_df = db_helpers.get_all_submissions_with_details()
-            
-            if all_submissions_df.empty:
-                st.info("ℹ️ Aún no se han realizado envíos de formularios.")
-            else:
-                # Estadísticas rápidas
+            try:
+                # Opciones de filtro desde catálogos (no desde los envíos cargados)
+                review_areas = {a['id']: a['name'] for a in database.get_all_areas()}
+                review_users_df = database.get_all_users()
+                review_users = dict(zip(review_users_df['id'], review_users_df['full_name']))
+
+                # Filtros (se aplican en SQL)
                 col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("📝 Total de Envíos", len(all_submissions_df))
-                with col2:
-                    st.metric("📅 Últimos 24h", 
-                             len(all_submissions_df[all_submissions_df['created_at'] > pd.Timestamp.now() - pd.Timedelta(days=1)]))
-                with col3:
-                    st.metric("🏢 Áreas Activas", all_submissions_df['area_name'].nunique())
-                
-                st.divider()
-                
-                # Filtros
-                col1, col2 = st.columns(2)
                 with col1:
                     area_filter = st.multiselect(
                         "Filtrar por Área:",
-                        all_submissions_df['area_name'].unique(),
-                        default=all_submissions_df['area_name'].unique()
+                        options=list(review_areas.keys()),
+                        format_func=lambda x: review_areas.get(x, "<Área desconocida>"),
+                        placeholder="Todas las áreas",
+                        key="review_area_filter"
                     )
                 with col2:
                     user_filter = st.multiselect(
                         "Filtrar por Usuario:",
-                        all_submissions_df['user_name'].unique(),
-                        default=all_submissions_df['user_name'].unique()
+                        options=list(review_users.keys()),
+                        format_func=lambda x: review_users.get(x) or f"Usuario {x}",
+                        placeholder="Todos los usuarios",
+                        key="review_user_filter"
                     )
-                
-                # Aplicar filtros
-                df_filtered = all_submissions_df[
-                    (all_submissions_df['area_name'].isin(area_filter)) &
-                    (all_submissions_df['user_name'].isin(user_filter))
-                ]
-                
-                # Mostrar tabla
-                st.subheader(f"Mostrando {len(df_filtered)} envíos")
-                st.dataframe(df_filtered, use_container_width=True, hide_index=True, height=400)
-                
-                # Opción de descargar
-                csv_download = df_filtered.to_csv(index=False)
-                st.download_button(
-                    label="📥 Descargar como CSV",
-                    data=csv_download,
-                    file_name="envios_formularios.csv",
-                    mime="text/csv"
+                with col3:
+                    reviewed_choice = st.selectbox("Estado:", ["Todos", "Pendientes", "Revisados"], key="review_status_filter")
+
+                filters = {
+                    "area_ids": area_filter or None,
+                    "user_ids": user_filter or None,
+                    "reviewed": {"Todos": None, "Pendientes": False, "Revisados": True}[reviewed_choice],
+                }
+
+                # Estadísticas rápidas
+                review_stats = db_helpers.get_submission_review_stats(**filters)
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("📝 Total de Envíos", review_stats["total"])
+                with col2:
+                    st.metric("📅 Últimos 24h", review_stats["last_24h"])
+                with col3:
+                    st.metric("🏢 Áreas Activas", review_stats["areas"])
+
+                st.divider()
+
+                # Estado de paginación: se reinicia cuando cambian los filtros
+                filters_key = (tuple(area_filter), tuple(user_filter), reviewed_choice)
+                if st.session_state.get("review_page_filters") != filters_key:
+                    st.session_state.review_page_filters = filters_key
+                    st.session_state.review_page = {"cursor": None, "direction": "next"}
+                page_state = st.session_state.review_page
+
+                df_filtered, has_more = db_helpers.get_submissions_page(
+                    page_size=config.REVIEW_PAGE_SIZE,
+                    cursor=page_state["cursor"],
+                    direction=page_state["direction"],
+                    **filters
                 )
-                # Ver detalles de un envío individual
-                st.subheader("👁️ Ver Detalles de un Envío")
-                if len(df_filtered) > 0:
-                    selected_id = st.selectbox(
-                        "Selecciona un envío:",
-                        df_filtered['id'].unique(),
-                        format_func=lambda x: f"Envío {x} - {df_filtered[df_filtered['id']==x]['template_name'].values[0]}"
+                if page_state["direction"] == "prev" and not has_more:
+                    # Volvimos al inicio: mostrar la primera página completa
+                    page_state = st.session_state.review_page = {"cursor": None, "direction": "next"}
+                    df_filtered, has_more = db_helpers.get_submissions_page(
+                        page_size=config.REVIEW_PAGE_SIZE, **filters
                     )
+                has_next = has_more if page_state["direction"] == "next" else True
+                has_prev = page_state["cursor"] is not None
 
-                    submission_data = df_filtered[df_filtered['id'] == selected_id]['data'].iloc[0]
+                if df_filtered.empty:
+                    st.info("ℹ️ Aún no se han realizado envíos de formularios.")
+                else:
+                    # Mostrar tabla
+                    st.subheader(f"Mostrando {len(df_filtered)} de {review_stats['total']} envíos")
+                    with rerun_profiler.section("tabla de envíos", kind="render"):
+                        st.dataframe(df_filtered, use_container_width=True, hide_index=True, height=400)
 
-                    with st.expander("📄 Mostrar todos los datos del envío"):
-                        try:
-                            if isinstance(submission_data, str):
-                                import json as _json
-                                parsed = _json.loads(submission_data)
-                            else:
-                                parsed = submission_data
+                    first_cursor, last_cursor = db_helpers.page_cursors(df_filtered)
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        if st.button("⬅️ Más recientes", disabled=not has_prev, key="review_prev_page"):
+                            st.session_state.review_page = {"cursor": first_cursor, "direction": "prev"}
+                            st.rerun()
+                    with col2:
+                        if st.button("Más antiguos ➡️", disabled=not has_next, key="review_next_page"):
+                            st.session_state.review_page = {"cursor": last_cursor, "direction": "next"}
+                            st.rerun()
 
-                            if isinstance(parsed, dict):
-                                for key, value in parsed.items():
-                                    st.write(f"**{key}**: {value}")
-                            else:
-                                st.write(parsed)
-                        except Exception as e:
-                            st.error(f"No se pudo mostrar los datos del envío: {str(e)[:120]}")
+                    # Opción de descargar: la exportación solo se ejecuta bajo demanda
+                    submission_view.render_export(filters, file_stem="envios_formularios", key_prefix="review")
+                    # Ver detalles de un envío individual
+                    st.subheader("👁️ Ver Detalles de un Envío")
+                    if len(df_filtered) > 0:
+                        selected_id = st.selectbox(
+                            "Selecciona un envío:",
+                            df_filtered['id'].unique(),
+                            format_func=lambda x: f"Envío {x} - {df_filtered[df_filtered['id']==x]['template_name'].values[0]}"
+                        )
 
-                    # Mostrar estado de revisión y permitir marcar
-                    try:
-                        row = df_filtered[df_filtered['id'] == selected_id].iloc[0]
-                        reviewed = bool(row.get('reviewed', False))
-                        reviewed_by = row.get('reviewed_by_name')
-                        reviewed_at = row.get('reviewed_at')
+                        # El contenido del envío solo se consulta cuando se pide verlo
+                        if st.toggle("📄 Mostrar todos los datos del envío", key=f"review_show_data_{selected_id}"):
+                            try:
+                                parsed = database.get_submission_payload(selected_id)
 
-                        st.markdown("**Estado de Revisión:** " + ("✅ Revisado" if reviewed else "❌ Pendiente"))
-                        if reviewed and reviewed_by:
-                            st.write(f"Revisado por: {reviewed_by} — {reviewed_at}")
+                                if isinstance(parsed, dict):
+                                    # Unir el envío con su centro por el Código Saber
+                                    centro = registry.for_submission(parsed)
+                                    if centro:
+                                        st.caption(f"🏫 Centro del envío: {registry.label(centro['CODSABER'])}")
+                                    submission_view.render_submission_payload(selected_id, parsed, key_prefix="review")
+                                else:
+                                    st.write(parsed)
+                            except Exception as e:
+                                st.error(f"No se pudo mostrar los datos del envío: {str(e)[:120]}")
 
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            if not reviewed:
-                                if st.button("Marcar como Revisado", key=f"mark_reviewed_{selected_id}"):
-                                    success, msg = db_helpers.mark_submission_reviewed(selected_id, st.session_state.get('user_id'), reviewed=True)
-                                    if success:
-                                        st.success(msg)
-                                        st.experimental_rerun()
-                                    else:
-                                        st.error(msg)
-                            else:
-                                if st.button("Marcar como No Revisado", key=f"unmark_reviewed_{selected_id}"):
-                                    success, msg = db_helpers.mark_submission_reviewed(selected_id, st.session_state.get('user_id'), reviewed=False)
-                                    if success:
-                                        st.success(msg)
-                                        st.experimental_rerun()
-                                    else:
-                                        st.error(msg)
-                    except Exception:
-                        # Si algo falla al leer el estado, no romper la vista
-                        pass
-        except Exception as e:
-            st.error(f"❌ Error al cargar envíos: {str(e)[:100]}")
\ No newline at end of file
+                        # Mostrar estado de revisión y permitir marcar
+                        try:
+                            row = df_filtered[df_filtered['id'] == selected_id].iloc[0]
+                            reviewed = bool(row.get('reviewed', False))
+                            reviewed_by = row.get('reviewed_by_name')
+                            reviewed_at = row.get('reviewed_at')
+
+                            st.markdown("**Estado de Revisión:** " + ("✅ Revisado" if reviewed else "❌ Pendiente"))
+                            if reviewed and reviewed_by:
+                                st.write(f"Revisado por: {reviewed_by} — {reviewed_at}")
+
+                            col1, col2 = st.columns(2)
+                            with col1:
+                                if not reviewed:
+                                    if st.button("Marcar como Revisado", key=f"mark_reviewed_{selected_id}"):
+                                        success, msg = db_helpers.mark_submission_reviewed(selected_id, st.session_state.get('user_id'), reviewed=True)
+                                        if success:
+                                            st.success(msg)
+                                            st.rerun()
+                                        else:
+                                            st.error(msg)
+                                else:
+                                    if st.button("Marcar como No Revisado", key=f"unmark_reviewed_{selected_id}"):
+                                        success, msg = db_helpers.mark_submission_reviewed(selected_id, st.session_state.get('user_id'), reviewed=False)
+                                        if success:
+                                            st.success(msg)
+                                            st.rerun()
+                                        else:
+                                            st.error(msg)
+                        except Exception as e:
+                            # Si algo falla al leer el estado, no romper la vista
+                            st.warning(f"⚠️ No se pudo mostrar el estado de revisión: {str(e)[:100]}")
+            except Exception as e:
+                st.error(f"❌ Error al cargar envíos: {str(e)[:100]}")
+
+    # --- 7. RENDIMIENTO ---
+    if section == tab_list[6]:
+        with rerun_profiler.section("Rendimiento"):
+            _render_performance()
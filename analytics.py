@@ -0,0 +1,259 @@
+"""
+Tablas analíticas por plantilla, proyectadas desde el JSONB de los envíos.
+
+Para cada plantilla se mantiene una tabla `analytics_t<id>` con una columna
+tipada por campo (texto, fecha, latitud/longitud, ...), de modo que el
+dashboard agrega en SQL sin cargar los JSON en pandas:
+
+- refresh_template(template_id) inserta solo los envíos con
+  id > last_processed_id (más un margen, ver ANALYTICS_REFRESH_OVERLAP); la
+  proyección la hace PostgreSQL con INSERT ... SELECT.
+- Si la estructura de la plantilla cambia, la tabla se recrea desde cero.
+- Los envíos borrados desaparecen por ON DELETE CASCADE.
+
+El catálogo de tablas vive en `analytics_tables` (migración 7).
+"""
+import hashlib
+import json
+import re
+import unicodedata
+
+import pandas as pd
+from psycopg2 import sql
+
+import config
+import database
+from database import get_db_connection
+
+# Identificador para pg_advisory_xact_lock(clase, plantilla): un refresco a la vez por plantilla
+_ANALYTICS_LOCK_CLASS = 727002
+_MAX_IDENTIFIER = 63
+
+# Tipo de campo -> [(sufijo de columna, tipo SQL, tipo lógico)]
+_FIELD_COLUMNS = {
+    "Texto": [("", "TEXT", "text")],
+    "Área de Texto": [("", "TEXT", "text")],
+    "Fecha": [("", "DATE", "date")],
+    "Geolocalización": [("_lat", "DOUBLE PRECISION", "lat"), ("_lng", "DOUBLE PRECISION", "lng")],
+    "Tabla Dinámica": [("_filas", "INTEGER", "rows")],
+    "Firma": [("", "BOOLEAN", "present")],
+    "Carga de Imagen": [("", "TEXT", "attachment")],
+}
+
+
+# Fecha AAAA-MM-DD que existe en el calendario gregoriano (año 0001-9999, días
+# por mes y 29 de febrero solo en bisiesto). Se usa como expresión regular de
+# PostgreSQL antes de ::date: con solo la forma, "2026-02-30" abortaba el refresco.
+_YEAR = r"(?:\d{3}[1-9]|\d{2}[1-9]\d|\d[1-9]\d{2}|[1-9]\d{3})"
+_LEAP_YEAR = r"(?:\d{2}(?:0[48]|[2468][048]|[13579][26])|(?:0[48]|[2468][048]|[13579][26])00)"
+DATE_PATTERN = (
+    rf"^(?:{_YEAR}-(?:(?:0[13578]|1[02])-(?:0[1-9]|[12]\d|3[01])"
+    rf"|(?:0[469]|11)-(?:0[1-9]|[12]\d|30)"
+    rf"|02-(?:0[1-9]|1\d|2[0-8]))"
+    rf"|{_LEAP_YEAR}-02-29)"
+)
+
+
+def _slug(label):
+    text = unicodedata.normalize("NFKD", str(label)).encode("ascii", "ignore").decode("ascii").lower()
+    return re.sub(r"[^a-z0-9]+", "_", text).strip("_") or "campo"
+
+
+def plan_columns(structure):
+    """
+    Columnas de la tabla analítica de una plantilla:
+    [{"label", "column", "sql_type", "kind"}] en el orden de los campos.
+    """
+    columns = []
+    used = {"submission_id", "user_id", "created_at"}
+    for position, field in enumerate(structure or [], 1):
+        label = str(field.get("Etiqueta del Campo", ""))
+        specs = _FIELD_COLUMNS.get(field.get("Tipo de Campo"))
+        if not label or not specs:
+            continue
+        base = f"f{position}_{_slug(label)}"[:_MAX_IDENTIFIER - 6]
+        for suffix, sql_type, kind in specs:
+            column = base + suffix
+            while column in used:
+                column += "_"
+            used.add(column)
+            columns.append({"label": label, "column": column, "sql_type": sql_type, "kind": kind})
+    return columns
+
+
+def structure_hash(structure):
+    return hashlib.sha256(json.dumps(structure, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def table_name(template_id):
+    return f"analytics_t{int(template_id)}"
+
+
+def _projection(column):
+    """Expresión SQL que extrae el valor tipado de s.data para una columna."""
+    value = sql.SQL("s.data -> {}").format(sql.Literal(column["label"]))
+    text = sql.SQL("NULLIF(btrim(s.data ->> {}), '')").format(sql.Literal(column["label"]))
+    kind = column["kind"]
+    if kind == "text":
+        return text
+    if kind == "attachment":
+        return sql.SQL("({} ->> 'adjunto_sha256')").format(value)
+    if kind == "date":
+        # Solo fechas válidas (DATE_PATTERN); lo demás queda NULL en vez de abortar el refresco
+        return sql.SQL("CASE WHEN {t} ~ {p} THEN substring({t} from 1 for 10)::date END").format(
+            t=text, p=sql.Literal(DATE_PATTERN))
+    if kind in ("lat", "lng"):
+        coord = sql.SQL("({} -> {})").format(value, sql.Literal(kind))
+        return sql.SQL("CASE WHEN jsonb_typeof({c}) = 'number' THEN ({c})::text::double precision END").format(c=coord)
+    if kind == "rows":
+        return sql.SQL("CASE WHEN jsonb_typeof({v}) = 'array' THEN jsonb_array_length({v}) END").format(v=value)
+    if kind == "present":
+        return sql.SQL("({v} IS NOT NULL AND {v} <> 'null'::jsonb)").format(v=value)
+    raise ValueError(f"Tipo de columna desconocido: {kind}")
+
+
+def _create_table(cur, template_id, columns):
+    table = sql.Identifier(table_name(template_id))
+    cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(table))
+    column_defs = [sql.SQL("{} {}").format(sql.Identifier(c["column"]), sql.SQL(c["sql_type"])) for c in columns]
+    cur.execute(sql.SQL("""
+        CREATE TABLE {table} (
+            submission_id INTEGER PRIMARY KEY REFERENCES form_submissions(id) ON DELETE CASCADE,
+            user_id INTEGER,
+            created_at TIMESTAMP{extra}
+        )
+    """).format(table=table, extra=sql.SQL("").join(sql.SQL(", ") + d for d in column_defs)))
+    cur.execute(sql.SQL("CREATE INDEX ON {} (created_at)").format(table))
+
+
+def refresh_template(template_id):
+    """
+    Actualiza la tabla analítica de una plantilla con los envíos nuevos.
+    Retorna (éxito, mensaje).
+    """
+    structure = database.get_template_structure(template_id)
+    if not structure:
+        return False, f"La plantilla {template_id} no existe."
+    columns = plan_columns(structure)
+    digest = structure_hash(structure)
+
+    with get_db_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_xact_lock(%s, %s)", (_ANALYTICS_LOCK_CLASS, int(template_id)))
+                cur.execute("SELECT structure_hash, last_processed_id FROM analytics_tables WHERE template_id = %s",
+                            (template_id,))
+                state = cur.fetchone()
+                rebuilt = state is None or state[0] != digest
+                if rebuilt:
+                    _create_table(cur, template_id, columns)
+                    last_id = 0
+                else:
+                    last_id = state[1]
+
+                # Margen hacia atrás: un envío con id menor pudo confirmarse después del último refresco
+                since = max(0, last_id - config.ANALYTICS_REFRESH_OVERLAP)
+                target = [sql.Identifier(c["column"]) for c in columns]
+                cur.execute(sql.SQL("""
+                    INSERT INTO {table} (submission_id, user_id, created_at{targets})
+                    SELECT s.id, s.user_id, s.created_at{projections}
+                    FROM form_submissions s
+                    WHERE s.template_id = %s AND s.id > %s
+                    ON CONFLICT (submission_id) DO NOTHING
+                """).format(
+                    table=sql.Identifier(table_name(template_id)),
+                    targets=sql.SQL("").join(sql.SQL(", ") + t for t in target),
+                    projections=sql.SQL("").join(sql.SQL(", ") + _projection(c) for c in columns),
+                ), (template_id, since))
+                inserted = cur.rowcount
+
+                cur.execute("SELECT COALESCE(MAX(id), %s) FROM form_submissions WHERE template_id = %s",
+                            (last_id, template_id))
+                new_last_id = cur.fetchone()[0]
+                cur.execute("""
+                    INSERT INTO analytics_tables (template_id, table_name, columns, structure_hash,
+                                                  last_processed_id, refreshed_at)
+                    VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+                    ON CONFLICT (template_id) DO UPDATE SET
+                        table_name = EXCLUDED.table_name,
+                        columns = EXCLUDED.columns,
+                        structure_hash = EXCLUDED.structure_hash,
+                        last_processed_id = EXCLUDED.last_processed_id,
+                        refreshed_at = EXCLUDED.refreshed_at
+                """, (template_id, table_name(template_id), json.dumps(columns), digest, new_last_id))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            return False, f"Error actualizando el análisis de la plantilla {template_id}: {str(e)[:120]}"
+
+    action = "recreada" if rebuilt else "actualizada"
+    return True, f"Tabla {table_name(template_id)} {action}: {inserted} envíos nuevos."
+
+
+def refresh_all():
+    """Refresca todas las plantillas. Retorna [(template_id, éxito, mensaje)]."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT id FROM form_templates ORDER BY id")
+            template_ids = [row[0] for row in cur.fetchall()]
+    return [(template_id, *refresh_template(template_id)) for template_id in template_ids]
+
+
+def get_analytics_columns(template_id):
+    """
+    Columnas de la tabla analítica de la plantilla, o None si aún no se ha
+    calculado (la crea refresh_template, desde el botón o init_db --refresh-analytics).
+    """
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT columns FROM analytics_tables WHERE template_id = %s", (template_id,))
+            res = cur.fetchone()
+    if not res:
+        return None
+    return json.loads(res[0]) if isinstance(res[0], (str, bytes)) else res[0]
+
+
+def _column_for(template_id, column_name):
+    for column in get_analytics_columns(template_id) or []:
+        if column["column"] == column_name:
+            return column
+    raise KeyError(column_name)
+
+
+def get_field_value_counts(template_id, column_name, limit=20):
+    """Conteo de envíos por valor de un campo (texto o fecha), de mayor a menor."""
+    _column_for(template_id, column_name)
+    query = sql.SQL("""
+        SELECT {col}::text AS valor, COUNT(*) AS envios
+        FROM {table}
+        WHERE {col} IS NOT NULL
+        GROUP BY {col}
+        ORDER BY envios DESC, valor
+        LIMIT %s
+    """).format(col=sql.Identifier(column_name), table=sql.Identifier(table_name(template_id)))
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(query, (int(limit),))
+            rows = cur.fetchall()
+    return pd.DataFrame(rows, columns=["valor", "envios"])
+
+
+def get_submissions_per_week(template_id, date_column=None):
+    """Envíos por semana, según created_at o un campo de tipo Fecha."""
+    if date_column is not None and _column_for(template_id, date_column)["kind"] != "date":
+        raise ValueError(f"La columna {date_column} no es de tipo fecha.")
+    col = sql.Identifier(date_column) if date_column else sql.Identifier("created_at")
+    query = sql.SQL("""
+        SELECT date_trunc('week', {col})::date AS semana, COUNT(*) AS envios
+        FROM {table}
+        WHERE {col} IS NOT NULL
+        GROUP BY semana
+        ORDER BY semana
+    """).format(col=col, table=sql.Identifier(table_name(template_id)))
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(query)
+            rows = cur.fetchall()
+    df = pd.DataFrame(rows, columns=["semana", "envios"])
+    df["semana"] = pd.to_datetime(df["semana"])
+    return df
@@ -5,6 +5,13 @@ import auth
 import admin_view
 import operator_view
 import config
+import centros_data
+import centros_dataset
+import centros_search
+import centros_geo
+import centros_registry
+import rerun_profiler
+import migrations
 import psycopg2
 
 # Configuración de la página (¡llamarla primero!)
@@ -25,9 +32,10 @@ def login_screen():
             st.error("Por favor, completa todos los campos.")
         else:
             try:
-                user_data = database.get_user(username)
+                # Verificación en el pool de auth; metadatos desde el caché de usuarios
+                user_data = auth.login(username, password)
                 
-                if user_data and auth.check_password(password, user_data["password_hash"]):
+                if user_data:
                     # Login exitoso
                     st.session_state["logged_in"] = True
                     st.session_state["user_id"] = user_data["id"]
@@ -44,6 +52,45 @@ def login_screen():
                 st.error(f"❌ Error inesperado: {str(e)[:100]}")
                 st.info("Por favor, intenta más tarde.")
 
+# --- DATOS DE CENTROS ---
+# Definidas a nivel de módulo para que la llave de @st.cache_resource sea estable.
+# El catálogo es un único objeto de solo lectura por proceso (no una copia por
+# sesión y por rerun, como entregaba @st.cache_data); centros_data lo mantiene
+# además en un archivo Arrow mapeado en memoria entre reinicios.
+@st.cache_resource
+def load_centros_dataset(file_path):
+    try:
+        table, _info = centros_data.load_centros_table(file_path)
+        return centros_dataset.CentrosDataset(table)
+    except FileNotFoundError:
+        st.error(f"❌ Error: No se encontró el archivo {file_path}")
+        st.info("Asegúrate de que 'datos_centros.csv' esté en la carpeta principal del proyecto.")
+    except pd.errors.EmptyDataError:
+        st.error(f"❌ Error: El archivo CSV está vacío.")
+    except UnicodeError:
+        st.error(f"❌ Error de codificación: No se puede determinar la codificación del archivo CSV.")
+        st.info("Verifica que el archivo esté en formato UTF-8, Windows-Latin-1 (cp1252), ISO-8859-1 o Latin-1.")
+    except Exception as e:
+        st.error(f"❌ Error al leer el CSV: {e}")
+        st.info("Verifica que el archivo no esté corrupto.")
+    return centros_dataset.CentrosDataset.from_dataframe(pd.DataFrame())
+
+@st.cache_resource
+def load_search_index(file_path):
+    """Índice de búsqueda del buscador, construido una vez por proceso."""
+    return centros_search.CentrosSearchIndex(load_centros_dataset(file_path).to_pandas())
+
+@st.cache_resource
+def load_geo_index(file_path):
+    """Índice espacial (LATITUD/LONGITUD) para "centros más cercanos"."""
+    centros = load_centros_dataset(file_path)
+    return centros_geo.CentrosGeoIndex(centros.numeric("LATITUD"), centros.numeric("LONGITUD"))
+
+@st.cache_resource
+def load_centros_registry(file_path):
+    """Registro CODSABER -> centro para adjuntar y pre-llenar en O(1)."""
+    return centros_registry.CentrosRegistry(load_centros_dataset(file_path).to_pandas())
+
 # --- APLICACIÓN PRINCIPAL (POST-LOGIN) ---
 def main_app():
     # Configurar la barra lateral
@@ -55,53 +102,69 @@ def main_app():
     
     st.sidebar.divider()
     
-    # Cargar los datos del CSV (solo lectura)
-    @st.cache_data
-    def load_csv_data(file_path):
-        encodings = ['utf-8', 'cp1252', 'iso-8859-1', 'latin-1']
-        
-        for encoding in encodings:
-            try:
-                return pd.read_csv(file_path, encoding=encoding)
-            except UnicodeDecodeError:
-                continue
-            except FileNotFoundError:
-                st.error(f"❌ Error: No se encontró el archivo {file_path}")
-                st.info("Asegúrate de que 'datos_centros.csv' esté en la carpeta principal del proyecto.")
-                return pd.DataFrame()
-            except pd.errors.EmptyDataError:
-                st.error(f"❌ Error: El archivo CSV está vacío.")
-                return pd.DataFrame()
-            except Exception as e:
-                st.error(f"❌ Error al leer el CSV: {e}")
-                st.info("Verifica que el archivo no esté corrupto.")
-                return pd.DataFrame()
-        
-        # Si ninguna codificación funcionó
-        st.error(f"❌ Error de codificación: No se puede determinar la codificación del archivo CSV.")
-        st.info("Verifica que el archivo esté en formato UTF-8, Windows-Latin-1 (cp1252), ISO-8859-1 o Latin-1.")
-        return pd.DataFrame()
-
-    df_centros = load_csv_data("datos_centros.csv")
+    # Cargar los datos del CSV (solo lectura, compartidos por todas las sesiones)
+    with rerun_profiler.section("datos de centros", kind="cache"):
+        centros = load_centros_dataset(config.CENTROS_CSV_PATH)
 
-    # Si el DataFrame está vacío después de intentar cargarlo, detenemos la app.
-    if df_centros.empty:
+    # Si el catálogo está vacío después de intentar cargarlo, detenemos la app.
+    if len(centros) == 0:
         st.warning("No se pudieron cargar los datos de los centros educativos. La app no puede continuar.")
         st.stop()
 
+    with rerun_profiler.section("índices de centros", kind="cache"):
+        centros_index = load_search_index(config.CENTROS_CSV_PATH)
+        geo_index = load_geo_index(config.CENTROS_CSV_PATH)
+        registry = load_centros_registry(config.CENTROS_CSV_PATH)
+
     # --- ENRUTADOR POR ROL ---
     # Muestra la interfaz correspondiente al rol del usuario
     if st.session_state["role"] == "admin":
-        admin_view.show_ui(df_centros)
+        admin_view.show_ui(centros, centros_index, geo_index, registry)
         
     elif st.session_state["role"] == "operador":
-        operator_view.show_ui(df_centros)
+        operator_view.show_ui(centros, centros_index, geo_index, registry)
+
+# --- PERFIL DEL RERUN (config.RERUN_PROFILER_ENABLED) ---
+def show_rerun_profile(profile):
+    """Desglose del rerun actual y resumen de los anteriores, en la barra lateral."""
+    history = st.session_state.setdefault("rerun_profiles", [])
+    rerun_profiler.remember(history, profile)
+
+    with st.sidebar.expander(f"⏱️ Último rerun: {profile.total_ms:.0f} ms"):
+        st.dataframe(pd.DataFrame(profile.breakdown()).drop(columns=["ruta"]), hide_index=True)
+        st.caption(f"Últimos {len(history)} reruns de esta sesión (incluye los de fragmentos)")
+        st.dataframe(pd.DataFrame(history[::-1]), hide_index=True)
+        st.caption("Mediana por tipo de rerun")
+        st.dataframe(pd.DataFrame(rerun_profiler.compare(history)), hide_index=True)
+
+# --- ESQUEMA DE LA BASE ---
+# El código asume todas las migraciones (p. ej. la 8: ON CONFLICT (submission_key)
+# al guardar envíos); se revisa al iniciar y cada minuto, no en cada rerun.
+@st.cache_data(ttl=60)
+def pending_schema_migrations():
+    return [(m["version"], m["description"]) for m in migrations.get_pending_migrations()]
+
+def check_schema():
+    try:
+        pending = pending_schema_migrations()
+    except Exception:
+        # Sin conexión (o pool agotado): el inicio de sesión muestra el error
+        return
+    if pending:
+        st.error("❌ La base de datos tiene migraciones pendientes. Ejecuta `python init_db.py` "
+                 "y vuelve a cargar la página.")
+        for version, description in pending:
+            st.write(f"- Migración {version}: {description}")
+        st.stop()
 
 # --- PUNTO DE ENTRADA PRINCIPAL ---
 if "logged_in" not in st.session_state:
     st.session_state["logged_in"] = False
 
+check_schema()
+
 if st.session_state["logged_in"]:
-    main_app()
+    with rerun_profiler.rerun(st.session_state["role"], on_finish=show_rerun_profile):
+        main_app()
 else:
     login_screen()
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""
+Almacén de archivos adjuntos ("Carga de Imagen").
+
+Los archivos se guardan en disco direccionados por su SHA-256, así que subir la
+misma foto dos veces ocupa espacio una sola vez:
+
+    attachments/objects/ab/abcdef...      original
+    attachments/thumbs/ab/abcdef....jpg   miniatura para la revisión
+    attachments/tmp/                      escrituras en curso
+
+La subida se copia por bloques (config.ATTACHMENT_CHUNK_SIZE) calculando el
+hash al vuelo, sin armar el archivo completo en memoria, y se publica con un
+os.replace atómico. En el envío solo queda una referencia pequeña:
+
+    {"adjunto_sha256": "...", "nombre": "foto.jpg", "tipo": "image/jpeg", "bytes": 123456}
+
+database.save_submission la registra además en `submission_attachments`.
+El archivo se guarda antes que el envío; si el envío nunca llega a la base
+(falla al guardar o encolar), sweep() lo borra más tarde.
+"""
+import hashlib
+import io
+import os
+import tempfile
+import time
+
+from PIL import Image
+
+import config
+
+REFERENCE_KEY = "adjunto_sha256"
+
+
+class AttachmentTooLargeError(ValueError):
+    pass
+
+
+def is_reference(value):
+    return isinstance(value, dict) and isinstance(value.get(REFERENCE_KEY), str)
+
+
+class AttachmentStore:
+    """Archivos direccionados por contenido en un directorio local."""
+
+    def __init__(self, root=None, chunk_size=None, max_bytes=None, thumbnail_size=None):
+        self.root = root or config.ATTACHMENTS_DIR
+        self.chunk_size = chunk_size or config.ATTACHMENT_CHUNK_SIZE
+        self.max_bytes = max_bytes or config.ATTACHMENT_MAX_BYTES
+        self.thumbnail_size = thumbnail_size or config.ATTACHMENT_THUMBNAIL_SIZE
+
+    def _path(self, kind, sha256, suffix=""):
+        if len(sha256) != 64 or not all(c in "0123456789abcdef" for c in sha256):
+            raise ValueError(f"Hash de adjunto inválido: {sha256!r}")
+        return os.path.join(self.root, kind, sha256[:2], sha256 + suffix)
+
+    def original_path(self, sha256):
+        return self._path("objects", sha256)
+
+    def thumbnail_path(self, sha256):
+        return self._path("thumbs", sha256, ".jpg")
+
+    def exists(self, sha256):
+        return os.path.exists(self.original_path(sha256))
+
+    def check_size(self, size, filename):
+        """Lanza AttachmentTooLargeError si `size` bytes superan el máximo."""
+        if size > self.max_bytes:
+            raise AttachmentTooLargeError(
+                f"El archivo '{filename}' supera el máximo de {self.max_bytes // (1024 * 1024)} MB.")
+
+    def put_stream(self, fileobj, filename, mime_type=None):
+        """
+        Guarda el contenido de `fileobj` leyéndolo por bloques.
+        Retorna la referencia para los datos del envío.
+        """
+        tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = fileobj.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    self.check_size(size, filename)
+                    digest.update(chunk)
+                    out.write(chunk)
+
+            sha256 = digest.hexdigest()
+            final_path = self.original_path(sha256)
+            if os.path.exists(final_path):
+                # Mismo contenido ya guardado: deduplicado. Se renueva la fecha
+                # para que sweep() no lo borre mientras este envío está en camino
+                os.remove(tmp_path)
+                os.utime(final_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(tmp_path, final_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        # La miniatura se genera una sola vez; si la imagen no se puede leer,
+        # se reintenta (y se informa) al mostrarla
+        try:
+            self.thumbnail(sha256)
+        except (OSError, Image.DecompressionBombError):
+            pass
+        return {REFERENCE_KEY: sha256, "nombre": filename, "tipo": mime_type, "bytes": size}
+
+    def put_uploaded_file(self, uploaded_file):
+        """Guarda un UploadedFile de st.file_uploader sin copiarlo entero con getvalue()."""
+        uploaded_file.seek(0)
+        return self.put_stream(uploaded_file, uploaded_file.name, getattr(uploaded_file, "type", None))
+
+    def sweep(self, referenced, min_age=None, now=None):
+        """
+        Borra los originales (y sus miniaturas) cuyo hash no está en `referenced`
+        y que tienen más de `min_age` segundos, y las escrituras abandonadas en
+        tmp/. Retorna cuántos archivos borró.
+        """
+        min_age = config.ATTACHMENT_SWEEP_MIN_AGE if min_age is None else min_age
+        cutoff = (time.time() if now is None else now) - min_age
+        removed = 0
+        objects_dir = os.path.join(self.root, "objects")
+        for prefix in sorted(os.listdir(objects_dir)) if os.path.isdir(objects_dir) else []:
+            for sha256 in sorted(os.listdir(os.path.join(objects_dir, prefix))):
+                path = os.path.join(objects_dir, prefix, sha256)
+                if sha256 in referenced or os.path.getmtime(path) > cutoff:
+                    continue
+                for orphan in (path, self.thumbnail_path(sha256)):
+                    if os.path.exists(orphan):
+                        os.remove(orphan)
+                removed += 1
+        tmp_dir = os.path.join(self.root, "tmp")
+        for name in os.listdir(tmp_dir) if os.path.isdir(tmp_dir) else []:
+            path = os.path.join(tmp_dir, name)
+            if os.path.getmtime(path) <= cutoff:
+                os.remove(path)
+                removed += 1
+        return removed
+
+    def open(self, sha256):
+        """Archivo original abierto en modo binario (lectura perezosa)."""
+        return open(self.original_path(sha256), "rb")
+
+    def thumbnail(self, sha256):
+        """Ruta de la miniatura JPEG, generándola si todavía no existe."""
+        thumb_path = self.thumbnail_path(sha256)
+        if os.path.exists(thumb_path):
+            return thumb_path
+
+        with Image.open(self.original_path(sha256)) as image:
+            # draft() deja que el decodificador JPEG reduzca al leer
+            image.draft("RGB", self.thumbnail_size)
+            image.thumbnail(self.thumbnail_size)
+            if image.mode not in ("RGB", "L"):
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image.convert("RGBA"), mask=image.convert("RGBA").getchannel("A"))
+                image = background
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=80, optimize=True)
+
+        os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(thumb_path))
+        with os.fdopen(fd, "wb") as out:
+            out.write(buffer.getvalue())
+        os.replace(tmp_path, thumb_path)
+        return thumb_path
+
+
+def get_store():
+    """Almacén con la configuración de config.py."""
+    return AttachmentStore()
@@ -1,10 +1,16 @@
 from werkzeug.security import generate_password_hash, check_password_hash
+from concurrent.futures import ThreadPoolExecutor
 import config
+import functools
+import logging
 import re
+import threading
 
-def hash_password(password):
-    """Genera un hash seguro para una contraseña."""
-    return generate_password_hash(password)
+logger = logging.getLogger(__name__)
+
+def hash_password(password, method=None):
+    """Genera un hash seguro para una contraseña (método de config.PASSWORD_HASH_METHOD)."""
+    return generate_password_hash(password, method=method or config.PASSWORD_HASH_METHOD)
 
 def check_password(password, hashed_password):
     """Verifica una contraseña contra un hash existente."""
@@ -13,6 +19,79 @@ def check_password(password, hashed_password):
         return False  # Old format is incompatible, so authentication fails
     return check_password_hash(hashed_password, password)
 
+# --- LOGIN ---
+# scrypt (el método por defecto) cuesta decenas de ms de CPU y ~32 MiB por
+# verificación. Las verificaciones corren en un pool de config.AUTH_WORKERS
+# hilos (hashlib libera el GIL), así que cuando muchos operadores entran a la
+# vez la memoria y la CPU quedan acotadas y el resto de la app sigue atendiendo.
+
+def hash_method(hashed_password):
+    """Método y parámetros con que se generó un hash, p. ej. 'scrypt:32768:8:1'."""
+    return hashed_password.split("$", 1)[0]
+
+@functools.lru_cache(maxsize=None)
+def _effective_method(method):
+    # werkzeug completa los parámetros omitidos ('pbkdf2' -> 'pbkdf2:sha256:600000')
+    return hash_method(generate_password_hash("", method=method))
+
+def needs_rehash(hashed_password, method=None):
+    """True si el hash no usa el método/costo configurado actualmente."""
+    return hash_method(hashed_password) != _effective_method(method or config.PASSWORD_HASH_METHOD)
+
+@functools.lru_cache(maxsize=None)
+def _dummy_hash(method):
+    return generate_password_hash("usuario-inexistente", method=method)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=config.AUTH_WORKERS, thread_name_prefix="auth")
+    return _executor
+
+def authenticate(stored_hash, password, method=None, timeout=None):
+    """
+    Verifica `password` contra el hash guardado (None si el usuario no
+    existe). Retorna (ok, nuevo_hash): nuevo_hash no es None cuando
+    la contraseña es correcta pero el hash usa otro método/costo que el
+    configurado. Un usuario inexistente cuesta lo mismo que uno real.
+    """
+    method = method or config.PASSWORD_HASH_METHOD
+
+    def verify():
+        if stored_hash is None:
+            check_password(password, _dummy_hash(method))
+            return False, None
+        if not check_password(password, stored_hash):
+            return False, None
+        return True, hash_password(password, method) if needs_rehash(stored_hash, method) else None
+
+    return _get_executor().submit(verify).result(timeout=timeout or config.AUTH_TIMEOUT)
+
+def login(username, password):
+    """
+    Valida usuario y contraseña con una sola consulta. Retorna el usuario
+    (id, username, role, full_name; sin el hash) o None. Si el hash usa
+    parámetros antiguos se reemplaza por uno con los de config.py, sin que el
+    usuario lo note.
+    """
+    import database
+    user = database.get_user_credentials(username)
+    ok, new_hash = authenticate(user["password_hash"] if user else None, password)
+    if not ok:
+        return None
+    old_hash = user.pop("password_hash")
+    if new_hash is not None:
+        try:
+            database.update_password_hash(user["id"], new_hash, old_hash)
+        except Exception:
+            # El login es válido igual; se reintentará en el próximo
+            logger.exception("No se pudo actualizar el hash del usuario %s", user["id"])
+    return user
+
 def validate_password(password):
     """
     Valida la complejidad de una contraseña.
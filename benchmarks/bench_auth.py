@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark de inicios de sesión simultáneos (solo la verificación de la
+contraseña; no necesita base de datos).
+
+Simula N sesiones que ingresan a la vez, cada una en su propio hilo como las
+sesiones de Streamlit:
+
+- directo: cada sesión llama check_password en su hilo (como antes).
+- pool: cada sesión usa auth.authenticate, que limita a config.AUTH_WORKERS
+  las verificaciones simultáneas.
+
+para varios métodos/costos de hash. Reporta el tiempo total, la latencia
+p50/p95 por sesión y la memoria de trabajo estimada del hash en paralelo.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_auth.py [sesiones]
+"""
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import auth
+import config
+
+PASSWORD = "Operador2026!"
+METHODS = ["scrypt:32768:8:1", "scrypt:16384:8:1", "pbkdf2:sha256:600000"]
+
+
+def _scrypt_mib(method):
+    parts = method.split(":")
+    if parts[0] != "scrypt":
+        return 0
+    n, r = int(parts[1]), int(parts[2])
+    return 128 * n * r / (1024 * 1024)
+
+
+def _run_sessions(n_sessions, login):
+    latencies = [None] * n_sessions
+    barrier = threading.Barrier(n_sessions)
+
+    def session(i):
+        barrier.wait()
+        start = time.perf_counter()
+        assert login()
+        latencies[i] = time.perf_counter() - start
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(n_sessions)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, latencies
+
+
+def _p95(values):
+    return statistics.quantiles(values, n=20)[-1]
+
+
+def main():
+    n_sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    print(f"{n_sessions} inicios de sesión simultáneos, pool de {config.AUTH_WORKERS} hilos\n")
+    print(f"{'método':<24}{'camino':<9}{'1 login ms':>11}{'total s':>9}{'p50 ms':>9}{'p95 ms':>9}{'MiB pico':>10}")
+    print("-" * 81)
+    for method in METHODS:
+        hashed = auth.hash_password(PASSWORD, method=method)
+        start = time.perf_counter()
+        auth.check_password(PASSWORD, hashed)
+        single_ms = (time.perf_counter() - start) * 1000
+
+        paths = [
+            ("directo", lambda: auth.check_password(PASSWORD, hashed), n_sessions),
+            ("pool", lambda: auth.authenticate(hashed, PASSWORD, method=method)[0], config.AUTH_WORKERS),
+        ]
+        for name, login, parallel in paths:
+            total, latencies = _run_sessions(n_sessions, login)
+            peak_mib = _scrypt_mib(method) * min(parallel, n_sessions)
+            print(f"{method:<24}{name:<9}{single_ms:>11.1f}{total:>9.2f}"
+                  f"{statistics.median(latencies) * 1000:>9.0f}{_p95(latencies) * 1000:>9.0f}{peak_mib:>10.0f}")
+    print("\n'MiB pico' es la memoria de scrypt (128·N·r por verificación) con todas las "
+          "verificaciones simultáneas posibles.")
+
+
+if __name__ == "__main__":
+    main()
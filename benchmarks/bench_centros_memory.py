@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memoria del catálogo de centros por sesión (no necesita base de
+datos ni Streamlit).
+
+Simula N sesiones con un rerun del buscador en curso a la vez (el peor caso:
+todas retienen lo suyo al mismo tiempo) y mide la memoria que agrega cada una:
+
+- antes: @st.cache_data entrega a cada llamada una copia deserializada del
+  DataFrame (pickle, igual que Streamlit) y filter_centros arma el DataFrame
+  filtrado.
+- después: un solo CentrosDataset mapeado en memoria para todo el proceso;
+  cada sesión solo tiene las posiciones de fila y la tabla Arrow a mostrar.
+
+Las consultas rotan entre "sin filtros", una búsqueda y un filtro de provincia.
+La memoria es la de Python (tracemalloc) más la del pool de Arrow; las páginas
+del archivo .arrow mapeado no cuentan: son del caché del sistema operativo y
+se comparten.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_centros_memory.py [sesiones]
+"""
+import gc
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+import pyarrow as pa
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import centros_data
+import centros_dataset
+import centros_search
+
+QUERIES = [
+    {},
+    {"search_term": "liceo"},
+    {"provincia": "SAN JOSÉ"},
+]
+
+
+def filter_centros(df_centros, index, search_term="", provincia=None, tipo=None,
+                   fuzzy=False, fuzzy_limit=50):
+    """
+    Filtros del buscador como eran antes de CentrosDataset: arma un DataFrame
+    con las filas coincidentes (el camino "antes" de este benchmark).
+    """
+    result = df_centros
+    if search_term and search_term.strip():
+        if fuzzy:
+            matches = index.search_fuzzy(search_term, limit=fuzzy_limit)
+            result = result.iloc[[p for p, _ in matches]].assign(SIMILITUD=[score for _, score in matches])
+        else:
+            result = result.iloc[index.search(search_term)]
+    if provincia:
+        result = result[result['PROVINCIA'] == provincia]
+    if tipo:
+        result = result[result['TIPO_INSTITUCION'] == tipo]
+    return result
+
+
+def _allocated():
+    return tracemalloc.get_traced_memory()[0] + pa.total_allocated_bytes()
+
+
+def _measure(n_sessions, rerun):
+    """(MiB por sesión, ms por rerun) con n_sessions reruns retenidos a la vez."""
+    gc.collect()
+    before = _allocated()
+    start = time.perf_counter()
+    sessions = [rerun(QUERIES[i % len(QUERIES)]) for i in range(n_sessions)]
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    per_session = (_allocated() - before) / n_sessions / (1024 * 1024)
+    del sessions
+    return per_session, elapsed / n_sessions * 1000
+
+
+def main():
+    n_sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    df, _info = centros_data.load_centros()
+    table, info = centros_data.load_centros_table()
+    dataset = centros_dataset.CentrosDataset(table)
+    index = centros_search.CentrosSearchIndex(df)
+    cached_bytes = pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+    print(f"Centros: {len(dataset)}; DataFrame en memoria: "
+          f"{df.memory_usage(deep=True).sum() / (1024 * 1024):.2f} MiB; "
+          f"tabla Arrow {'mapeada' if info['memory_mapped'] else 'en memoria'}: "
+          f"{table.nbytes / (1024 * 1024):.2f} MiB")
+    print(f"{n_sessions} sesiones con un rerun del buscador retenido a la vez\n")
+
+    def rerun_before(filters):
+        # Lo que hace st.cache_data en cada llamada: deserializar su copia
+        df_centros = pickle.loads(cached_bytes)
+        df_filtered = filter_centros(df_centros, index, **filters)
+        return df_centros, df_filtered
+
+    def rerun_after(filters):
+        positions, similarity = dataset.select(index, **filters)
+        return positions, dataset.take(positions, similarity)
+
+    tracemalloc.start()
+    # Calentar cachés del índice y máscaras para medir solo el costo por rerun
+    for filters in QUERIES:
+        rerun_before(filters)
+        rerun_after(filters)
+
+    print(f"{'camino':<10}{'MiB/sesión':>12}{f'MiB x{n_sessions}':>12}{'ms/rerun':>10}")
+    print("-" * 44)
+    for name, rerun in [("antes", rerun_before), ("después", rerun_after)]:
+        per_session, ms = _measure(n_sessions, rerun)
+        print(f"{name:<10}{per_session:>12.3f}{per_session * n_sessions:>12.2f}{ms:>10.2f}")
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark de validación de formularios grandes: estructura cruda
+(lista de dicts, como el antiguo _validate_form) vs. esquema compilado.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_form_schema.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import config
+import form_schema
+
+FIELD_COUNTS = [10, 100, 500]
+REPEAT = 2000
+
+
+def legacy_validate(form_data, structure):
+    """Copia de la validación anterior, que reinterpretaba la estructura cada vez."""
+    form_to_csv = {v: k for k, v in config.CSV_TO_FORM_MAP.items()}  # se reconstruía en cada rerun
+    for field in structure:
+        label = field["Etiqueta del Campo"]
+        _key = f"form_field_{label.replace(' ', '_')}"
+        _prefill = form_to_csv.get(label)
+        if field["Requerido"]:
+            value = form_data.get(label)
+            if value is None:
+                return False, f"El campo '{label}' es requerido."
+            if isinstance(value, str) and not value.strip():
+                return False, f"El campo '{label}' es requerido."
+            if isinstance(value, list) and (len(value) == 0 or all(not str(item).strip() for item in value)):
+                return False, f"El campo '{label}' es requerido."
+    return True, ""
+
+
+def make_form(n_fields):
+    types = ["Texto", "Área de Texto", "Tabla Dinámica", "Texto"]
+    structure = [{"Etiqueta del Campo": f"Campo {i}", "Tipo de Campo": types[i % len(types)],
+                  "Requerido": i % 2 == 0} for i in range(n_fields)]
+    data = {}
+    for field in structure:
+        if field["Tipo de Campo"] == "Tabla Dinámica":
+            data[field["Etiqueta del Campo"]] = [{"Columna 1": "a", "Columna 2": "b"}]
+        else:
+            data[field["Etiqueta del Campo"]] = "valor"
+    return structure, data
+
+
+def _time_us(fn, repeat=REPEAT):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    print(f"{'campos':>8}{'crudo (µs)':>14}{'compilado (µs)':>17}{'compilar (µs)':>16}")
+    print("-" * 55)
+    for n_fields in FIELD_COUNTS:
+        structure, data = make_form(n_fields)
+        schema = form_schema.compile_schema(structure)
+        assert legacy_validate(data, structure) == schema.validate(data)
+        t_legacy = _time_us(lambda: legacy_validate(data, structure))
+        t_compiled = _time_us(lambda: schema.validate(data))
+        t_compile = _time_us(lambda: form_schema.compile_schema(structure), repeat=200)
+        print(f"{n_fields:>8}{t_legacy:>14.1f}{t_compiled:>17.1f}{t_compile:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
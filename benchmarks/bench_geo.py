@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark del índice espacial de centros contra un recorrido completo (fuerza bruta).
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_geo.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import centros_data
+import centros_geo
+
+N_QUERIES = 2000
+K = 5
+RADIUS_KM = 5.0
+
+
+def brute_nearest(index, lat, lon, k):
+    distances = centros_geo.haversine_km(lat, lon, index.lats, index.lons)
+    kth = np.partition(distances, k - 1)[k - 1]
+    top = np.flatnonzero(distances <= kth)
+    # Mismo desempate que el índice: distancia y luego posición de fila
+    order = np.lexsort((index.positions[top], distances[top]))[:k]
+    return index.positions[top[order]]
+
+
+def brute_radius(index, lat, lon, radius_km):
+    distances = centros_geo.haversine_km(lat, lon, index.lats, index.lons)
+    return index.positions[distances <= radius_km]
+
+
+def brute_pandas_nearest(df, lat, lon, k):
+    # Lo que haría la vista sin índice: calcular contra todo el DataFrame
+    distances = centros_geo.haversine_km(lat, lon, df["LATITUD"], df["LONGITUD"])
+    return distances.nsmallest(k).index
+
+
+def _bench(label, fn, points):
+    start = time.perf_counter()
+    for lat, lon in points:
+        fn(lat, lon)
+    per_query = (time.perf_counter() - start) / len(points) * 1e6
+    print(f"{label:<42}{per_query:>10.1f} µs/consulta")
+    return per_query
+
+
+def main():
+    df, _ = centros_data.load_centros()
+    start = time.perf_counter()
+    index = centros_geo.CentrosGeoIndex.from_dataframe(df)
+    print(f"Centros con coordenadas válidas: {index.size} de {len(df)}")
+    print(f"Construcción del índice: {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    # Puntos de consulta: ubicaciones de centros con un pequeño desplazamiento
+    rng = np.random.default_rng(42)
+    sample = rng.choice(index.size, N_QUERIES)
+    points = list(zip(index.lats[sample] + rng.normal(0, 0.02, N_QUERIES),
+                      index.lons[sample] + rng.normal(0, 0.02, N_QUERIES)))
+
+    mismatches = sum(
+        [p for p, _ in index.nearest(lat, lon, K)] != list(brute_nearest(index, lat, lon, K))
+        for lat, lon in points[:200]
+    )
+    print(f"Verificación k={K} contra fuerza bruta (200 puntos): {mismatches} diferencias\n")
+
+    _bench(f"nearest k={K} (rejilla)", lambda la, lo: index.nearest(la, lo, K), points)
+    _bench(f"nearest k={K} (fuerza bruta numpy)", lambda la, lo: brute_nearest(index, la, lo, K), points)
+    _bench(f"nearest k={K} (fuerza bruta pandas)", lambda la, lo: brute_pandas_nearest(df, la, lo, K), points[:200])
+    _bench(f"radio {RADIUS_KM:.0f} km (rejilla)", lambda la, lo: index.within_radius(la, lo, RADIUS_KM), points)
+    _bench(f"radio {RADIUS_KM:.0f} km (fuerza bruta numpy)", lambda la, lo: brute_radius(index, la, lo, RADIUS_KM), points)
+
+
+if __name__ == "__main__":
+    main()
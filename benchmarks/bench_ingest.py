@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga de envíos: save_submission (una fila y un commit por
+llamada) vs. bulk_ingest.ingest_submissions (execute_values, una transacción).
+
+Necesita una base PostgreSQL con el esquema al día (python init_db.py).
+Crea un área, una plantilla y envíos de prueba y los borra al terminar.
+
+Uso (desde la raíz del proyecto):
+    DB_URL=postgresql://... python benchmarks/bench_ingest.py [filas]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import bulk_ingest
+import database
+from database import get_db_connection
+
+STRUCTURE = [
+    {"Etiqueta del Campo": "Nombre del Centro", "Tipo de Campo": "Texto", "Requerido": True},
+    {"Etiqueta del Campo": "Código Saber", "Tipo de Campo": "Texto", "Requerido": False},
+    {"Etiqueta del Campo": "Observaciones", "Tipo de Campo": "Área de Texto", "Requerido": False},
+    {"Etiqueta del Campo": "Asistentes", "Tipo de Campo": "Tabla Dinámica", "Requerido": False},
+]
+
+
+def _setup():
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("INSERT INTO form_areas (area_name, description) VALUES ('__bench_ingest__', '') RETURNING id")
+            area_id = cur.fetchone()[0]
+            cur.execute("SELECT id FROM usuarios ORDER BY id LIMIT 1")
+            user_id = cur.fetchone()[0]
+            cur.execute("INSERT INTO form_templates (name, structure, created_by_user_id, area_id) "
+                        "VALUES ('__bench_ingest__', %s, %s, %s) RETURNING id",
+                        (json.dumps(STRUCTURE), user_id, area_id))
+            template_id = cur.fetchone()[0]
+        conn.commit()
+    database.invalidate_template_cache()
+    return area_id, template_id, user_id
+
+
+def _cleanup(area_id, template_id):
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM form_submissions WHERE template_id = %s", (template_id,))
+            cur.execute("DELETE FROM form_templates WHERE id = %s", (template_id,))
+            cur.execute("DELETE FROM form_areas WHERE id = %s", (area_id,))
+        conn.commit()
+    database.invalidate_template_cache()
+
+
+def _data(i):
+    return {
+        "Nombre del Centro": f"CENTRO DE PRUEBA {i}",
+        "Código Saber": f"{100000 + i}-00",
+        "Observaciones": "Visita de seguimiento " * 5,
+        "Asistentes": [{"Columna 1": "Docente", "Columna 2": str(i)}],
+    }
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    area_id, template_id, user_id = _setup()
+    try:
+        start = time.perf_counter()
+        for i in range(n_rows):
+            database.save_submission(template_id, user_id, _data(i))
+        t_single = time.perf_counter() - start
+
+        batch = [{"template_id": template_id, "user_id": user_id, "data": _data(i)} for i in range(n_rows)]
+        start = time.perf_counter()
+        result = bulk_ingest.ingest_submissions(batch)
+        t_bulk = time.perf_counter() - start
+        assert result["inserted"] == n_rows and not result["errors"], result["errors"][:5]
+    finally:
+        _cleanup(area_id, template_id)
+
+    print(f"{'camino':<28}{'filas':>8}{'segundos':>11}{'filas/s':>11}")
+    print("-" * 58)
+    print(f"{'save_submission (por fila)':<28}{n_rows:>8}{t_single:>11.2f}{n_rows / t_single:>11.0f}")
+    print(f"{'ingest_submissions (lote)':<28}{n_rows:>8}{t_bulk:>11.2f}{n_rows / t_bulk:>11.0f}")
+    print(f"\nAceleración: {t_single / t_bulk:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Benchmark de reruns del panel del operador con el perfilador de reruns
+(rerun_profiler), ejecutando app.py con streamlit.testing (AppTest).
+
+Antes de los fragmentos, enviar el formulario o cambiar de plantilla
+reejecutaba todo el script; ahora reejecuta solo el fragmento "Formulario"
+o "Selección de formulario". AppTest siempre corre el script completo, así
+que cada interacción da las dos cifras a la vez: el total del rerun completo
+(lo que costaba antes) y la sección del fragmento dentro de él (lo que cuesta
+ahora). No incluye el trabajo fijo de Streamlit por rerun ni el navegador.
+
+Necesita una base PostgreSQL con el esquema al día (python init_db.py) y los
+componentes de requirements.txt. Crea un área, dos plantillas, un operador y
+sus envíos de prueba y los borra al terminar.
+
+Uso (desde la raíz del proyecto):
+    DB_URL=postgresql://... python benchmarks/bench_operator_rerun.py [envíos] [reruns]
+"""
+import json
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from streamlit.testing.v1 import AppTest
+
+import bulk_ingest
+import config
+import database
+from database import get_db_connection
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+STRUCTURE = [
+    {"Etiqueta del Campo": "Nombre del Centro", "Tipo de Campo": "Texto", "Requerido": True},
+    {"Etiqueta del Campo": "Código Saber", "Tipo de Campo": "Texto", "Requerido": False},
+    {"Etiqueta del Campo": "Fecha de Visita", "Tipo de Campo": "Fecha", "Requerido": False},
+    {"Etiqueta del Campo": "Observaciones", "Tipo de Campo": "Área de Texto", "Requerido": False},
+    {"Etiqueta del Campo": "Asistentes", "Tipo de Campo": "Tabla Dinámica", "Requerido": False},
+    {"Etiqueta del Campo": "Firma del Director", "Tipo de Campo": "Firma", "Requerido": False},
+]
+
+
+def _setup(n_submissions):
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("INSERT INTO form_areas (area_name, description) VALUES ('__bench_rerun__', '') RETURNING id")
+            area_id = cur.fetchone()[0]
+            cur.execute("INSERT INTO usuarios (username, password_hash, role, full_name) "
+                        "VALUES ('__bench_rerun__', '', 'operador', 'Operador de Prueba') RETURNING id")
+            user_id = cur.fetchone()[0]
+            template_ids = []
+            for name in ("__bench_rerun_a__", "__bench_rerun_b__"):
+                cur.execute("INSERT INTO form_templates (name, structure, created_by_user_id, area_id) "
+                            "VALUES (%s, %s, %s, %s) RETURNING id",
+                            (name, json.dumps(STRUCTURE), user_id, area_id))
+                template_ids.append(cur.fetchone()[0])
+        conn.commit()
+    database.invalidate_template_cache()
+    batch = [{"template_id": template_ids[i % 2], "user_id": user_id,
+              "data": {"Nombre del Centro": f"CENTRO DE PRUEBA {i}", "Código Saber": f"{100000 + i}-00",
+                       "Observaciones": "Visita de seguimiento " * 5}}
+             for i in range(n_submissions)]
+    result = bulk_ingest.ingest_submissions(batch)
+    assert result["inserted"] == n_submissions and not result["errors"], result["errors"][:5]
+    return area_id, template_ids, user_id
+
+
+def _cleanup(area_id, template_ids, user_id):
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM form_submissions WHERE template_id = ANY(%s)", (template_ids,))
+            cur.execute("DELETE FROM form_templates WHERE id = ANY(%s)", (template_ids,))
+            cur.execute("DELETE FROM form_areas WHERE id = %s", (area_id,))
+            cur.execute("DELETE FROM usuarios WHERE id = %s", (user_id,))
+        conn.commit()
+    database.invalidate_template_cache()
+
+
+def _profile(at):
+    """
+    Total del último rerun y {fragmento: (ms, db ms)}, leídos del desglose que
+    app.show_rerun_profile muestra en la barra lateral.
+    """
+    label = next(e.label for e in at.sidebar.expander if e.label.startswith("⏱️"))
+    total = float(label.rsplit(":", 1)[1].split()[0])
+    rows = at.sidebar.dataframe[0].value.to_dict("records")
+    sections = {}
+    for i, row in enumerate(rows):
+        if row["tipo"] != "fragmento":
+            continue
+        depth = len(row["sección"]) - len(row["sección"].lstrip())
+        db_ms = 0.0
+        for inner in rows[i + 1:]:
+            if len(inner["sección"]) - len(inner["sección"].lstrip()) <= depth:
+                break
+            if inner["tipo"] == "db":
+                db_ms += inner["ms"]
+        sections[row["sección"].strip()] = (row["ms"], db_ms)
+    return total, sections
+
+
+def _interact(at, action, fragment, runs):
+    totals, fragment_ms, fragment_db = [], [], []
+    for i in range(runs):
+        action(at, i)
+        at.run()
+        assert not at.exception, at.exception
+        total, sections = _profile(at)
+        totals.append(total)
+        fragment_ms.append(sections[fragment][0])
+        fragment_db.append(sections[fragment][1])
+    return statistics.median(totals), statistics.median(fragment_ms), statistics.median(fragment_db)
+
+
+def _submit(at, i):
+    at.text_input(key=next(w.key for w in at.text_input if w.label.startswith("Nombre del Centro"))).input(
+        f"CENTRO BENCH {i}")
+    next(b for b in at.button if b.label.startswith("✅ Enviar")).click()
+
+
+def _switch_template(template_ids):
+    def action(at, i):
+        at.selectbox(key="template_select").set_value(template_ids[(i + 1) % 2])
+    return action
+
+
+def main():
+    n_submissions = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    config.RERUN_PROFILER_ENABLED = True
+    config.SUBMISSION_QUEUE_ENABLED = False  # sin hilo de fondo: los envíos van directo a la base
+    os.chdir(ROOT)
+    area_id, template_ids, user_id = _setup(n_submissions)
+    try:
+        at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+        at.session_state["logged_in"] = True
+        at.session_state["user_id"] = user_id
+        at.session_state["username"] = "__bench_rerun__"
+        at.session_state["role"] = "operador"
+        at.session_state["full_name"] = "Operador de Prueba"
+        at.run()
+        at.selectbox(key="area_select").select(area_id).run()
+        assert not at.exception, at.exception
+        results = [
+            ("enviar formulario", "Formulario", _interact(at, _submit, "Formulario", runs)),
+            ("cambiar de plantilla", "Selección de formulario",
+             _interact(at, _switch_template(template_ids), "Selección de formulario", runs)),
+        ]
+    finally:
+        _cleanup(area_id, template_ids, user_id)
+
+    print(f"Operador con {n_submissions} envíos; mediana de {runs} reruns por interacción\n")
+    print(f"{'interacción':<22}{'rerun completo ms':>19}{'fragmento ms':>14}{'db ms':>8}{'ahorro':>9}")
+    print("-" * 72)
+    for name, _, (total, fragment_ms, db_ms) in results:
+        print(f"{name:<22}{total:>19.1f}{fragment_ms:>14.1f}{db_ms:>8.1f}{total / fragment_ms:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark del Buscador de Centros: índice invertido vs. str.contains, y
+búsqueda aproximada por trigramas.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_search.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import centros_data
+import centros_search
+
+QUERIES = ["c", "ci", "cien", "cientifico", "científico san pedro", "zeledon", "liceo de", "100182-00"]
+FUZZY_QUERIES = ["cientifco san pdro", "seledon", "jose maria zeledon", "liseo de santiago"]
+REPEAT = 200
+
+
+def _time_ms(fn, repeat=REPEAT):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    df, info = centros_data.load_centros()
+    print(f"Centros: {len(df)} (codificación {info['encoding']}, caché: {info['from_cache']})")
+
+    start = time.perf_counter()
+    index = centros_search.CentrosSearchIndex(df)
+    print(f"Construcción del índice: {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    # "en frío": sin cachés de prefijos/consultas; "rerun": misma búsqueda repetida
+    print(f"{'consulta':<24}{'resultados':>11}{'frío (ms)':>12}{'rerun (ms)':>12}{'contains (ms)':>15}")
+    print("-" * 74)
+    for query in QUERIES:
+        index.clear_cache()
+        start = time.perf_counter()
+        results = index.search(query)
+        t_cold = (time.perf_counter() - start) * 1000
+        t_warm = _time_ms(lambda: index.search(query))
+        t_contains = _time_ms(lambda: df.copy()[df['CENTRO_EDUCATIVO'].str.contains(query, case=False, na=False)], repeat=20)
+        print(f"{query:<24}{len(results):>11}{t_cold:>12.3f}{t_warm:>12.3f}{t_contains:>15.3f}")
+
+    start = time.perf_counter()
+    index.search_fuzzy("")
+    print(f"\nConstrucción del índice de trigramas: {(time.perf_counter() - start) * 1000:.1f} ms\n")
+    print(f"{'consulta aproximada':<24}{'ms':>8}  mejor coincidencia")
+    print("-" * 74)
+    for query in FUZZY_QUERIES:
+        t_fuzzy = _time_ms(lambda: index.search_fuzzy(query, limit=10))
+        best = index.search_fuzzy(query, limit=1)
+        best_name = f"{df['CENTRO_EDUCATIVO'].iloc[best[0][0]]} ({best[0][1]})" if best else "-"
+        print(f"{query:<24}{t_fuzzy:>8.3f}  {best_name}")
+
+
+if __name__ == "__main__":
+    main()
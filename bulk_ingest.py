@@ -0,0 +1,226 @@
+"""
+Carga masiva de envíos (lotes recogidos sin conexión).
+
+Un lote es una lista de dicts, o un archivo JSONL con uno por línea:
+
+    {"template_id": 3, "username": "operador1", "created_at": "2026-03-01T10:15:00",
+     "data": {"Nombre del Centro": "ESCUELA SAN PEDRO", "Fecha de Visita": "2026-03-01"}}
+
+(`user_id` puede ir en lugar de `username`; `created_at` es opcional, igual
+que `submission_key`, un UUID que hace idempotente la carga: volver a cargar
+el mismo archivo no duplica los envíos que ya la traían.)
+
+Cada fila se valida contra el esquema compilado de su plantilla
+(database.get_compiled_schema) y las válidas se insertan con execute_values
+en una sola transacción (save_prepared, que usa también la cola de
+submission_queue). Los errores se reportan por fila (número de fila o de
+línea del JSONL) sin detener el resto, salvo con strict=True, que no inserta
+nada si alguna fila falla.
+
+Uso desde la línea de comandos:
+    python init_db.py --ingest lote.jsonl [--strict]
+"""
+import datetime
+import json
+import uuid
+
+from psycopg2.extras import execute_values
+
+import attachments
+import config
+import database
+import form_schema
+import signatures
+
+
+def read_jsonl(path):
+    """Retorna ([(línea, registro)], [(línea, error)]) de un archivo JSONL."""
+    records, errors = [], []
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                records.append((line_no, json.loads(line)))
+            except json.JSONDecodeError as e:
+                errors.append((line_no, f"JSON inválido: {e.msg}"))
+    return records, errors
+
+
+def _parse_created_at(value):
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime.datetime):
+        return value
+    try:
+        return datetime.datetime.fromisoformat(str(value))
+    except ValueError:
+        raise form_schema.FormValidationError(f"created_at inválido: {value!r}")
+
+
+def _parse_submission_key(value):
+    if value in (None, ""):
+        return str(uuid.uuid4())
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        raise form_schema.FormValidationError(f"submission_key inválido (se espera un UUID): {value!r}")
+
+
+def prepare_row(record, schema_for, user_id_for):
+    """
+    Valida un registro del lote. Retorna (fila, firmas, adjuntos) donde fila es
+    (template_id, user_id, created_at, data_json, submission_key), firmas
+    {etiqueta: png} y adjuntos {etiqueta: referencia}; lanza
+    FormValidationError si no es válido. Sin `submission_key` se genera uno.
+    """
+    if not isinstance(record, dict):
+        raise form_schema.FormValidationError("El registro debe ser un objeto JSON.")
+    try:
+        template_id = int(record["template_id"])
+    except (KeyError, TypeError, ValueError):
+        raise form_schema.FormValidationError("Falta 'template_id' o no es un número.")
+
+    user_id = user_id_for(record)
+    if user_id is None:
+        raise form_schema.FormValidationError("Usuario desconocido (use 'user_id' o 'username' existentes).")
+
+    data = record.get("data")
+    if not isinstance(data, dict):
+        raise form_schema.FormValidationError("Falta 'data' o no es un objeto.")
+
+    schema = schema_for(template_id)
+    if schema is None:
+        raise form_schema.FormValidationError(f"La plantilla {template_id} no existe.")
+    schema.check(data)
+
+    created_at = _parse_created_at(record.get("created_at"))
+    submission_key = _parse_submission_key(record.get("submission_key"))
+    payload, signature_images = signatures.split_signatures(data)
+    attachment_refs = {label: ref for label, ref in payload.items() if attachments.is_reference(ref)}
+    row = (template_id, user_id, created_at, json.dumps(payload, default=str), submission_key)
+    return row, signature_images, attachment_refs
+
+
+def _load_users(cur, records):
+    """Mapas id -> id y username -> id de los usuarios mencionados en el lote."""
+    ids, names = set(), set()
+    for _, record in records:
+        if not isinstance(record, dict):
+            continue
+        if record.get("user_id") is not None:
+            try:
+                ids.add(int(record["user_id"]))
+            except (TypeError, ValueError):
+                pass
+        elif record.get("username"):
+            names.add(str(record["username"]))
+    cur.execute("SELECT id, username FROM usuarios WHERE id = ANY(%s) OR username = ANY(%s)",
+                (list(ids), list(names)))
+    by_id, by_name = {}, {}
+    for user_id, username in cur.fetchall():
+        by_id[user_id] = user_id
+        by_name[username] = user_id
+    return by_id, by_name
+
+
+def ingest_submissions(records, strict=False, page_size=None, schema_for=None):
+    """
+    Inserta un lote de envíos. `records` es una lista de (número_de_fila, registro)
+    o de registros (numerados desde 1). Retorna un dict con
+    {"inserted": n, "ids": [...], "duplicates": n, "errors": [(fila, mensaje)]};
+    `duplicates` cuenta los envíos omitidos porque su submission_key ya existía.
+    """
+    records = [r if isinstance(r, tuple) else (i, r) for i, r in enumerate(records, 1)]
+    page_size = page_size or config.BULK_INGEST_PAGE_SIZE
+    schema_for = schema_for or database.get_compiled_schema
+
+    with database.get_db_connection() as conn:
+        with conn.cursor() as cur:
+            users_by_id, users_by_name = _load_users(cur, records)
+
+    def user_id_for(record):
+        if record.get("user_id") is not None:
+            try:
+                return users_by_id.get(int(record["user_id"]))
+            except (TypeError, ValueError):
+                return None
+        return users_by_name.get(str(record.get("username", "")))
+
+    # Validación completa antes de abrir la transacción de escritura
+    prepared, errors = [], []
+    seen_keys = set()
+    duplicates = 0
+    for row_no, record in records:
+        try:
+            entry = prepare_row(record, schema_for, user_id_for)
+        except form_schema.FormValidationError as e:
+            errors.append((row_no, str(e)))
+            continue
+        if entry[0][4] in seen_keys:
+            duplicates += 1
+            continue
+        seen_keys.add(entry[0][4])
+        prepared.append(entry)
+
+    if not prepared or (strict and errors):
+        return {"inserted": 0, "ids": [], "duplicates": duplicates, "errors": errors}
+
+    inserted = save_prepared(prepared, page_size=page_size)
+    ids = [inserted[row[4]] for row, _, _ in prepared if row[4] in inserted]
+    duplicates += len(prepared) - len(ids)
+    return {"inserted": len(ids), "ids": ids, "duplicates": duplicates, "errors": errors}
+
+
+def insert_prepared(cur, prepared, page_size=None):
+    """
+    Inserta con execute_values, en la transacción de `cur`, las filas de
+    prepare_row [(fila, firmas, adjuntos)]. Las llaves que ya existían se
+    omiten. Retorna {submission_key: id} de los envíos insertados.
+    """
+    page_size = page_size or config.BULK_INGEST_PAGE_SIZE
+    # RETURNING trae la llave para asociar cada id con las firmas y adjuntos de su fila
+    inserted = dict((key, submission_id) for submission_id, key in execute_values(cur, """
+        INSERT INTO form_submissions (template_id, user_id, created_at, data, submission_key)
+        VALUES %s
+        ON CONFLICT (submission_key) DO NOTHING
+        RETURNING id, submission_key::text
+    """, [row for row, _, _ in prepared],
+        # ::timestamptz respeta la zona de un created_at con zona (la cola manda UTC);
+        # uno sin zona se toma en la zona de la sesión, como CURRENT_TIMESTAMP
+        template="(%s, %s, COALESCE(%s::timestamptz, CURRENT_TIMESTAMP), %s::jsonb, %s::uuid)",
+        page_size=page_size, fetch=True))
+    kept = [(inserted[row[4]], row_images, row_refs)
+            for row, row_images, row_refs in prepared if row[4] in inserted]
+
+    signature_rows = [(submission_id, label, png)
+                      for submission_id, per_row, _ in kept
+                      for label, png in per_row.items()]
+    if signature_rows:
+        execute_values(cur, "INSERT INTO submission_signatures (submission_id, field_label, image) VALUES %s",
+                       signature_rows, page_size=page_size)
+
+    attachment_rows = [(submission_id, label, ref[attachments.REFERENCE_KEY], ref.get("nombre"),
+                        ref.get("tipo"), ref.get("bytes", 0))
+                       for submission_id, _, per_row in kept
+                       for label, ref in per_row.items()]
+    if attachment_rows:
+        execute_values(cur, """
+            INSERT INTO submission_attachments
+                (submission_id, field_label, sha256, filename, mime_type, byte_size)
+            VALUES %s
+        """, attachment_rows, page_size=page_size)
+    return inserted
+
+
+def save_prepared(prepared, page_size=None):
+    """insert_prepared en una transacción propia; retorna {submission_key: id} de los insertados."""
+    with database.get_db_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                inserted = insert_prepared(cur, prepared, page_size)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return inserted
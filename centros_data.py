@@ -0,0 +1,145 @@
+"""
+Carga del catálogo de centros educativos (datos_centros.csv).
+
+La primera vez se detecta la codificación del CSV, se normalizan los tipos
+(categorías para las columnas repetitivas, coordenadas numéricas) y se guarda
+el catálogo como archivo Arrow IPC, con la codificación detectada en sus
+metadatos. Las cargas siguientes abren ese archivo mapeado en memoria mientras
+el CSV no cambie (tamaño + mtime): las columnas se leen directo de las páginas
+del archivo, compartidas por todas las sesiones y procesos (ver centros_dataset.py).
+"""
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+
+import config
+
+# Formato del caché; incrementarlo invalida los cachés anteriores
+CACHE_FORMAT_VERSION = 1
+
+CSV_ENCODINGS = ['utf-8', 'cp1252', 'iso-8859-1', 'latin-1']
+
+# Columnas con pocos valores distintos: como categorías ocupan una fracción de memoria
+CATEGORICAL_COLUMNS = ['PROVINCIA', 'CANTON', 'DISTRITO', 'REGIONAL', 'TIPO_INSTITUCION']
+
+# El CSV usa coma decimal en parte de las filas ("9,8967534")
+COORDINATE_COLUMNS = ['LATITUD', 'LONGITUD']
+
+
+def detect_encoding(raw_bytes):
+    """Primera codificación de CSV_ENCODINGS que decodifica el contenido completo."""
+    for encoding in CSV_ENCODINGS:
+        try:
+            raw_bytes.decode(encoding)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    raise UnicodeError(
+        "No se puede determinar la codificación del archivo CSV "
+        f"(se probó: {', '.join(CSV_ENCODINGS)})."
+    )
+
+
+def _normalize(df):
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    for col in COORDINATE_COLUMNS:
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', '.', regex=False), errors='coerce')
+    return df
+
+
+def _arrow_path(csv_path, cache_dir):
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, f"{name}.arrow")
+
+
+def _read_csv(csv_path):
+    """(DataFrame normalizado, codificación detectada) leyendo el CSV."""
+    with open(csv_path, 'rb') as f:
+        encoding = detect_encoding(f.read())
+    return _normalize(pd.read_csv(csv_path, encoding=encoding)), encoding
+
+
+# Llave de los metadatos del esquema Arrow con el origen del archivo
+_ARROW_SOURCE_KEY = b"centros_source"
+
+
+def _arrow_source(stat, encoding):
+    return {"format": CACHE_FORMAT_VERSION, "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns, "encoding": encoding}
+
+
+def _open_arrow_cache(arrow_path):
+    """(tabla mapeada en memoria, metadatos de origen), o (None, None) si no sirve."""
+    try:
+        with pa.memory_map(arrow_path, 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+    except (OSError, pa.ArrowInvalid):
+        return None, None
+    try:
+        meta = json.loads((table.schema.metadata or {})[_ARROW_SOURCE_KEY])
+    except (KeyError, ValueError):
+        return None, None
+    return table, meta
+
+
+def _write_arrow_cache(arrow_path, table):
+    os.makedirs(os.path.dirname(arrow_path) or ".", exist_ok=True)
+    tmp_path = f"{arrow_path}.{os.getpid()}.tmp"
+    try:
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                # Un solo lote: cada columna queda contigua y se lee sin copiar
+                writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+        os.replace(tmp_path, arrow_path)
+        return True
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+
+
+def load_centros_table(csv_path=None, cache_dir=None):
+    """
+    Retorna (tabla Arrow, info) con el catálogo; info indica la codificación y si
+    vino del caché. Si se puede escribir el caché, la tabla está mapeada en memoria
+    desde él (info["memory_mapped"]); si no, vive en memoria del proceso.
+
+    Lanza FileNotFoundError, pd.errors.EmptyDataError o UnicodeError si el CSV
+    no se puede leer.
+    """
+    csv_path = csv_path or config.CENTROS_CSV_PATH
+    cache_dir = cache_dir or config.CENTROS_CACHE_DIR
+    arrow_path = _arrow_path(csv_path, cache_dir)
+
+    stat = os.stat(csv_path)
+    table, meta = _open_arrow_cache(arrow_path)
+    if table is not None and meta == _arrow_source(stat, meta.get("encoding")):
+        return table, {"encoding": meta["encoding"], "from_cache": True, "memory_mapped": True}
+
+    df, encoding = _read_csv(csv_path)
+    info = {"encoding": encoding, "from_cache": False}
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    source = json.dumps(_arrow_source(stat, encoding)).encode()
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), _ARROW_SOURCE_KEY: source})
+    if _write_arrow_cache(arrow_path, table):
+        mapped, _meta = _open_arrow_cache(arrow_path)
+        if mapped is not None:
+            return mapped, {**info, "memory_mapped": True}
+    return table, {**info, "memory_mapped": False}
+
+
+def load_centros(csv_path=None, cache_dir=None):
+    """
+    Retorna (df, info) como DataFrame nuevo, leído del mismo caché Arrow que
+    load_centros_table (las columnas repetitivas vuelven como categorías).
+    """
+    table, info = load_centros_table(csv_path, cache_dir)
+    return table.to_pandas(), {"encoding": info["encoding"], "from_cache": info["from_cache"]}
@@ -0,0 +1,122 @@
+"""
+Catálogo de centros compartido, de solo lectura, para todas las sesiones.
+
+app.py construye un único CentrosDataset por proceso (st.cache_resource) sobre
+la tabla Arrow mapeada en memoria de centros_data.load_centros_table. Ninguna
+sesión guarda una copia del catálogo:
+
+- las columnas viven en las páginas del archivo .arrow (caché del sistema
+  operativo, compartido incluso entre procesos);
+- los filtros de PROVINCIA y TIPO_INSTITUCION comparan los códigos del
+  diccionario Arrow (arrays numpy de solo lectura, sin copiar) y sus máscaras
+  se calculan una sola vez por valor;
+- select() devuelve posiciones de fila (np.ndarray int32), no un DataFrame;
+- take() arma solo las filas a mostrar, como tabla Arrow que st.dataframe
+  serializa directo (sin pasar por pandas). Sin filtros es la tabla completa,
+  sin copiar.
+"""
+import threading
+
+import numpy as np
+import pyarrow as pa
+
+FILTER_COLUMNS = ("PROVINCIA", "TIPO_INSTITUCION")
+
+
+def _readonly(array):
+    array.flags.writeable = False
+    return array
+
+
+def _single_chunk(table, column):
+    chunked = table.column(column)
+    # El caché .arrow se escribe en un solo lote; combinar copiaría
+    return chunked.chunk(0) if chunked.num_chunks == 1 else chunked.combine_chunks()
+
+
+class CentrosDataset:
+    """Catálogo inmutable respaldado por una tabla Arrow; se comparte entre hilos."""
+
+    def __init__(self, table):
+        self.table = table
+        self.columns = list(table.column_names)
+        self.size = table.num_rows
+        self.all_positions = _readonly(np.arange(self.size, dtype=np.int32))
+
+        # Columna categórica -> (códigos por fila, {valor: código})
+        self._codes = {}
+        for column in FILTER_COLUMNS:
+            if column not in self.columns:
+                continue
+            array = _single_chunk(table, column)
+            if not pa.types.is_dictionary(array.type):
+                array = array.dictionary_encode()
+            indices = array.indices
+            if indices.null_count:
+                codes = indices.fill_null(-1).to_numpy()
+            else:
+                codes = indices.to_numpy(zero_copy_only=True)
+            categories = {value: code for code, value in enumerate(array.dictionary.to_pylist())}
+            self._codes[column] = (_readonly(codes), categories)
+
+        self._masks = {}
+        self._masks_lock = threading.Lock()
+
+    @classmethod
+    def from_dataframe(cls, df):
+        return cls(pa.Table.from_pandas(df, preserve_index=False))
+
+    def __len__(self):
+        return self.size
+
+    def numeric(self, column):
+        """Columna numérica como array numpy de solo lectura (NaN en los nulos)."""
+        array = _single_chunk(self.table, column)
+        return _readonly(array.to_numpy(zero_copy_only=False))
+
+    def to_pandas(self):
+        """DataFrame nuevo con todo el catálogo; solo para construir índices una vez."""
+        return self.table.to_pandas()
+
+    def equals_mask(self, column, value):
+        """Máscara booleana compartida (solo lectura) de las filas con column == value."""
+        key = (column, value)
+        mask = self._masks.get(key)
+        if mask is None:
+            codes, categories = self._codes[column]
+            code = categories.get(value)
+            mask = _readonly(codes == code if code is not None else np.zeros(self.size, dtype=bool))
+            with self._masks_lock:
+                mask = self._masks.setdefault(key, mask)
+        return mask
+
+    def select(self, index, search_term="", provincia=None, tipo=None, fuzzy=False, fuzzy_limit=50):
+        """
+        Filtros del buscador: retorna (posiciones, similitud). Las posiciones van
+        en orden de relevancia si hay búsqueda; similitud es None salvo con `fuzzy`.
+        Sin filtros retorna all_positions (compartido, sin copiar).
+        """
+        positions = self.all_positions
+        similarity = None
+        if search_term and search_term.strip():
+            if fuzzy:
+                matches = index.search_fuzzy(search_term, limit=fuzzy_limit)
+                positions = np.array([p for p, _ in matches], dtype=np.int32)
+                similarity = np.array([score for _, score in matches], dtype=np.float64)
+            else:
+                positions = np.asarray(index.search(search_term), dtype=np.int32)
+        for column, value in zip(FILTER_COLUMNS, (provincia, tipo)):
+            if value:
+                keep = self.equals_mask(column, value)[positions]
+                positions = positions[keep]
+                if similarity is not None:
+                    similarity = similarity[keep]
+        return positions, similarity
+
+    def take(self, positions, similarity=None):
+        """Tabla Arrow con las filas `positions` (y la columna SIMILITUD, si se da)."""
+        table = self.table if positions is self.all_positions else self.table.take(positions)
+        if similarity is not None:
+            table = table.append_column("SIMILITUD", pa.array(similarity))
+        return table
+
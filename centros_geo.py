@@ -0,0 +1,152 @@
+"""
+Índice espacial de los centros educativos (LATITUD/LONGITUD).
+
+Una rejilla de celdas de `cell_deg` grados agrupa los centros; las consultas
+solo miden la distancia (haversine) a los puntos de las celdas cercanas:
+
+- nearest(lat, lon, k): los k centros más cercanos, recorriendo anillos de
+  celdas hasta que ningún anillo sin visitar pueda contener uno más cercano.
+- within_radius(lat, lon, km) y within_bbox(...): centros en un radio o caja.
+
+Las coordenadas inválidas del CSV (0, fuera de Costa Rica) se excluyen.
+"""
+import math
+
+import numpy as np
+
+import config
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Distancia de gran círculo en km; acepta escalares o arreglos numpy."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class CentrosGeoIndex:
+    """Rejilla lat/lon -> posiciones de fila del catálogo."""
+
+    def __init__(self, lats, lons, cell_deg=None, bounds=None):
+        self.cell_deg = cell_deg or config.GEO_INDEX_CELL_DEG
+        lat_min, lat_max, lon_min, lon_max = bounds or config.GEO_VALID_BOUNDS
+
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        valid = (np.isfinite(lats) & np.isfinite(lons)
+                 & (lats >= lat_min) & (lats <= lat_max)
+                 & (lons >= lon_min) & (lons <= lon_max))
+
+        self.positions = np.flatnonzero(valid)
+        self.lats = lats[valid]
+        self.lons = lons[valid]
+        self.size = len(self.positions)
+
+        cells = {}
+        for i, (row, col) in enumerate(zip(self._cell_of(self.lats), self._cell_of(self.lons))):
+            cells.setdefault((int(row), int(col)), []).append(i)
+        self._cells = {cell: np.asarray(items, dtype=np.int64) for cell, items in cells.items()}
+        if self._cells:
+            rows = [r for r, _ in self._cells]
+            cols = [c for _, c in self._cells]
+            self._extent = (min(rows), max(rows), min(cols), max(cols))
+
+        # Km mínimos por grado en cualquier dirección dentro del conjunto
+        # (un grado de longitud se acorta con la latitud): cota inferior segura
+        max_abs_lat = float(np.max(np.abs(self.lats))) if self.size else 0.0
+        self._min_km_per_deg = KM_PER_DEGREE * math.cos(math.radians(max_abs_lat)) * 0.999
+
+    @classmethod
+    def from_dataframe(cls, df, **kwargs):
+        return cls(df["LATITUD"].to_numpy(), df["LONGITUD"].to_numpy(), **kwargs)
+
+    def _cell_of(self, values):
+        return np.floor(np.asarray(values) / self.cell_deg).astype(np.int64)
+
+    def _ring(self, row, col, radius):
+        """Índices internos de los puntos en el anillo de celdas a distancia `radius`."""
+        if radius == 0:
+            found = self._cells.get((row, col))
+            return [found] if found is not None else []
+        chunks = []
+        for dr in range(-radius, radius + 1):
+            for dc in (-radius, radius) if abs(dr) != radius else range(-radius, radius + 1):
+                found = self._cells.get((row + dr, col + dc))
+                if found is not None:
+                    chunks.append(found)
+        return chunks
+
+    def _results(self, idx, lat, lon, k=None):
+        distances = haversine_km(lat, lon, self.lats[idx], self.lons[idx])
+        if k is not None and k < len(idx):
+            # Solo se ordenan los k mejores (más los empates con el k-ésimo)
+            kth = np.partition(distances, k - 1)[k - 1]
+            keep = distances <= kth
+            idx, distances = idx[keep], distances[keep]
+        order = np.lexsort((self.positions[idx], distances))[:k]
+        return [(int(self.positions[idx[i]]), round(float(distances[i]), 3)) for i in order]
+
+    def nearest(self, lat, lon, k=5):
+        """[(posición, distancia_km)] de los k centros más cercanos, del más cercano al más lejano."""
+        if self.size == 0 or k <= 0:
+            return []
+        k = min(k, self.size)
+        row, col = int(self._cell_of(lat)), int(self._cell_of(lon))
+
+        # El anillo más lejano que puede tener puntos; más allá no hay nada
+        row_min, row_max, col_min, col_max = self._extent
+        max_radius = max(abs(row - row_min), abs(row - row_max), abs(col - col_min), abs(col - col_max))
+
+        chunks = []
+        found = 0
+        best = None
+        for radius in range(max_radius + 1):
+            ring = self._ring(row, col, radius)
+            if ring:
+                chunks.extend(ring)
+                found += sum(len(c) for c in ring)
+            if found >= k:
+                idx = np.concatenate(chunks)
+                distances = haversine_km(lat, lon, self.lats[idx], self.lons[idx])
+                kth = np.partition(distances, k - 1)[k - 1]
+                # Lo no visitado está al menos a `radius` celdas completas de distancia
+                if radius * self.cell_deg * self._min_km_per_deg >= kth:
+                    best = idx
+                    break
+        if best is None:
+            best = np.concatenate(chunks)
+        return self._results(best, lat, lon, k)
+
+    def within_radius(self, lat, lon, radius_km):
+        """[(posición, distancia_km)] de los centros a `radius_km` o menos, ordenados por distancia."""
+        if self.size == 0:
+            return []
+        dlat = radius_km / KM_PER_DEGREE
+        dlon = radius_km / self._min_km_per_deg
+        idx = self._bbox_candidates(lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+        if idx.size == 0:
+            return []
+        distances = haversine_km(lat, lon, self.lats[idx], self.lons[idx])
+        return self._results(idx[distances <= radius_km], lat, lon)
+
+    def within_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """Posiciones de los centros dentro de la caja (en orden de fila)."""
+        idx = self._bbox_candidates(min_lat, min_lon, max_lat, max_lon)
+        inside = ((self.lats[idx] >= min_lat) & (self.lats[idx] <= max_lat)
+                  & (self.lons[idx] >= min_lon) & (self.lons[idx] <= max_lon))
+        return sorted(int(p) for p in self.positions[idx[inside]])
+
+    def _bbox_candidates(self, min_lat, min_lon, max_lat, max_lon):
+        r0, r1 = int(self._cell_of(min_lat)), int(self._cell_of(max_lat))
+        c0, c1 = int(self._cell_of(min_lon)), int(self._cell_of(max_lon))
+        if (r1 - r0 + 1) * (c1 - c0 + 1) > len(self._cells):
+            # Caja enorme: más barato revisar las celdas existentes
+            chunks = [items for (r, c), items in self._cells.items() if r0 <= r <= r1 and c0 <= c <= c1]
+        else:
+            chunks = [self._cells[(r, c)] for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)
+                      if (r, c) in self._cells]
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
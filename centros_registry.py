@@ -0,0 +1,97 @@
+"""
+Registro de centros educativos con llave CODSABER.
+
+El nombre del centro no es único (hay más de mil nombres repetidos en el
+catálogo), así que todo lo que identifica un centro — adjuntar, pre-llenar el
+formulario, unir un envío con su centro — usa el CODSABER:
+
+- get(codsaber) / record_at(posición): el registro como dict, en O(1).
+- codes_for_name(nombre): índice secundario nombre -> CODSABERs.
+- attach_options / label(codsaber): opciones del selectbox de "Adjuntar
+  Centro", ordenadas una sola vez al construir el registro.
+- provincias / tipos: opciones de los filtros del buscador.
+
+Se construye una vez por CSV (st.cache_resource en app.py) y no se modifica.
+"""
+import config
+from centros_search import fold
+
+CODE_COLUMN = "CODSABER"
+NAME_COLUMN = "CENTRO_EDUCATIVO"
+
+
+def _sorted_unique(values):
+    return sorted({v for v in values if isinstance(v, str) and v})
+
+
+class CentrosRegistry:
+    """Catálogo de centros respaldado por listas por columna y un dict CODSABER -> fila."""
+
+    def __init__(self, df):
+        self.columns = list(df.columns)
+        # Listas de Python por columna: leer una fila no pasa por pandas
+        self._data = {col: df[col].tolist() for col in self.columns}
+        self.size = len(df)
+
+        codes = [str(code).strip() for code in self._data.get(CODE_COLUMN, [])]
+        names = self._data.get(NAME_COLUMN, [""] * self.size)
+        self._codes = codes
+        self._position_by_code = {}
+        self._codes_by_name = {}
+        for position, (code, name) in enumerate(zip(codes, names)):
+            # Ante un CODSABER repetido gana la primera fila, igual que .iloc[0]
+            self._position_by_code.setdefault(code, position)
+            self._codes_by_name.setdefault(name, []).append(code)
+
+        provincias = self._data.get("PROVINCIA", [None] * self.size)
+        self._labels = {}
+        for code, position in self._position_by_code.items():
+            provincia = provincias[position]
+            detail = f"{code} — {provincia}" if isinstance(provincia, str) else code
+            self._labels[code] = f"{names[position]} ({detail})"
+        self.attach_options = sorted(self._position_by_code,
+                                     key=lambda code: (fold(str(names[self._position_by_code[code]])), code))
+        self.provincias = _sorted_unique(provincias)
+        self.tipos = _sorted_unique(self._data.get("TIPO_INSTITUCION", []))
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, codsaber):
+        return str(codsaber).strip() in self._position_by_code
+
+    def position_of(self, codsaber):
+        """Fila del centro en el DataFrame del catálogo, o None si no existe."""
+        if codsaber is None:
+            return None
+        return self._position_by_code.get(str(codsaber).strip())
+
+    def code_at(self, position):
+        return self._codes[position]
+
+    def name_of(self, codsaber):
+        position = self.position_of(codsaber)
+        return None if position is None else self._data[NAME_COLUMN][position]
+
+    def record_at(self, position):
+        """Dict columna -> valor de la fila `position`."""
+        return {col: values[position] for col, values in self._data.items()}
+
+    def get(self, codsaber):
+        """Registro del centro con ese CODSABER, o None si no existe."""
+        position = self.position_of(codsaber)
+        return None if position is None else self.record_at(position)
+
+    def codes_for_name(self, name):
+        """CODSABERs de todos los centros con ese nombre exacto (puede haber varios)."""
+        return list(self._codes_by_name.get(name, ()))
+
+    def label(self, codsaber):
+        """Texto para el selectbox: 'NOMBRE (CODSABER — PROVINCIA)'."""
+        return self._labels.get(codsaber, str(codsaber))
+
+    def for_submission(self, submission_data):
+        """Centro asociado a los datos de un envío (por su campo de Código Saber), o None."""
+        if not submission_data:
+            return None
+        return self.get(submission_data.get(config.CSV_TO_FORM_MAP.get(CODE_COLUMN, "Código Saber")))
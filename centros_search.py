@@ -0,0 +1,250 @@
+"""
+Índice invertido para el Buscador de Centros.
+
+Se construye una sola vez por proceso sobre el catálogo de centros y responde
+búsquedas por prefijo, sin tildes ni mayúsculas, sobre CENTRO_EDUCATIVO,
+DIRECCION, POBLADO y CODSABER. Devuelve posiciones de fila (para usar con
+`df.iloc`) ordenadas por relevancia, evitando recorrer y copiar el DataFrame
+en cada rerun.
+
+Para nombres mal escritos ("seledon", "cientifco") hay además un índice de
+trigramas (al estilo de pg_trgm) que devuelve los k nombres más parecidos.
+"""
+import bisect
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+# Peso de cada columna al puntuar una coincidencia
+SEARCH_FIELDS = {
+    "CENTRO_EDUCATIVO": 3.0,
+    "CODSABER": 3.0,
+    "POBLADO": 1.5,
+    "DIRECCION": 1.0,
+}
+
+# Una coincidencia por prefijo vale menos que la palabra completa
+PREFIX_MATCH_FACTOR = 0.6
+
+# Búsqueda aproximada: puntaje mínimo y peso de la cobertura de la consulta
+# frente a la similitud de Jaccard del nombre completo
+FUZZY_MIN_SCORE = 0.3
+FUZZY_COVERAGE_WEIGHT = 0.7
+
+# Tope de memoria de los cachés del índice, en posiciones guardadas (4 bytes
+# cada una en las consultas, 12 en los prefijos con su puntaje): una consulta
+# amplia ocupa más que una específica, así que se cuenta por tamaño, no por entrada
+QUERY_CACHE_POSITIONS = 1_000_000
+PREFIX_CACHE_POSITIONS = 500_000
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def fold(text):
+    """Normaliza texto: sin tildes, minúsculas y solo letras/dígitos separados por espacio."""
+    if text is None:
+        return ""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(" ", text.casefold()).strip()
+
+
+def tokenize(text):
+    return fold(text).split()
+
+
+def _readonly(array):
+    array.flags.writeable = False
+    return array
+
+
+class _LRUCache:
+    """
+    LRU pequeño y seguro para hilos (el índice se comparte entre sesiones).
+    Acota el número de entradas y la suma de `weigh(valor)`.
+    """
+
+    def __init__(self, maxsize, maxweight=None, weigh=len):
+        self._data = OrderedDict()
+        self._maxsize = maxsize
+        self._maxweight = maxweight
+        self._weigh = weigh
+        self._weight = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        weight = self._weigh(value) if self._maxweight is not None else 0
+        if self._maxweight is not None and weight > self._maxweight:
+            return
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None and self._maxweight is not None:
+                self._weight -= self._weigh(previous)
+            self._data[key] = value
+            self._weight += weight
+            while len(self._data) > self._maxsize or (
+                    self._maxweight is not None and self._weight > self._maxweight):
+                _key, evicted = self._data.popitem(last=False)
+                if self._maxweight is not None:
+                    self._weight -= self._weigh(evicted)
+
+
+def trigrams(text):
+    """Trigramas de cada palabra, rellenada como en pg_trgm ("  pal", "ra ")."""
+    grams = set()
+    for word in tokenize(text):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """
+    Índice de trigramas sobre una columna de texto.
+
+    El puntaje combina la cobertura (fracción de trigramas de la consulta
+    presentes en el nombre; tolera nombres más largos que la consulta) con la
+    similitud de Jaccard (premia los nombres de longitud parecida).
+    """
+
+    def __init__(self, values):
+        postings = {}
+        sizes = []
+        for position, value in enumerate(values):
+            grams = trigrams(value)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+        self._postings = {g: np.asarray(p, dtype=np.int32) for g, p in postings.items()}
+        self._sizes = np.asarray(sizes, dtype=np.float32)
+        self.size = len(sizes)
+
+    def search(self, query, limit=10, min_score=FUZZY_MIN_SCORE):
+        """[(posición, puntaje)] de los `limit` valores más parecidos, de mayor a menor."""
+        query_grams = trigrams(query)
+        arrays = [self._postings[g] for g in query_grams if g in self._postings]
+        if not arrays or self.size == 0:
+            return []
+
+        overlap = np.bincount(np.concatenate(arrays), minlength=self.size).astype(np.float32)
+        n_query = float(len(query_grams))
+        coverage = overlap / n_query
+        jaccard = overlap / (n_query + self._sizes - overlap)
+        scores = FUZZY_COVERAGE_WEIGHT * coverage + (1 - FUZZY_COVERAGE_WEIGHT) * jaccard
+
+        candidates = np.flatnonzero(scores >= min_score)
+        if candidates.size > limit:
+            top = np.argpartition(-scores[candidates], limit - 1)[:limit]
+            candidates = candidates[top]
+        ordered = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return [(int(p), round(float(scores[p]), 3)) for p in ordered]
+
+
+class CentrosSearchIndex:
+    """Índice invertido token -> {posición de fila: peso}."""
+
+    def __init__(self, df, fields=None, cache_size=2048,
+                 query_cache_positions=QUERY_CACHE_POSITIONS, prefix_cache_positions=PREFIX_CACHE_POSITIONS):
+        fields = SEARCH_FIELDS if fields is None else fields
+        self._postings = {}
+        self.size = len(df)
+
+        for column, weight in fields.items():
+            if column not in df.columns:
+                continue
+            for position, value in enumerate(df[column].tolist()):
+                for token in set(tokenize(value)):
+                    rows = self._postings.setdefault(token, {})
+                    if rows.get(position, 0.0) < weight:
+                        rows[position] = weight
+
+        # Vocabulario ordenado para resolver prefijos con búsqueda binaria
+        self._vocabulary = sorted(self._postings)
+        self._names = df["CENTRO_EDUCATIVO"].tolist() if "CENTRO_EDUCATIVO" in df.columns else []
+        self._fuzzy = None
+        self._fuzzy_lock = threading.Lock()
+        # Los prefijos se repiten al escribir letra por letra, y cada rerun de
+        # Streamlit repite la búsqueda vigente: se cachean ambos niveles, como
+        # arrays numpy (no dicts ni tuplas de ints de Python)
+        self._cache_size = cache_size
+        self._query_cache_positions = query_cache_positions
+        self._prefix_cache_positions = prefix_cache_positions
+        self.clear_cache()
+
+    def clear_cache(self):
+        self._prefix_cache = _LRUCache(self._cache_size, self._prefix_cache_positions,
+                                       weigh=lambda match: len(match[0]))
+        self._query_cache = _LRUCache(self._cache_size, self._query_cache_positions)
+
+    def _match_token(self, query_token):
+        """(posiciones ordenadas int32, puntajes float64) de las filas con alguna palabra que empieza así."""
+        cached = self._prefix_cache.get(query_token)
+        if cached is not None:
+            return cached
+
+        scores = {}
+        start = bisect.bisect_left(self._vocabulary, query_token)
+        for token in self._vocabulary[start:]:
+            if not token.startswith(query_token):
+                break
+            factor = 1.0 if token == query_token else PREFIX_MATCH_FACTOR
+            for position, weight in self._postings[token].items():
+                score = weight * factor
+                if scores.get(position, 0.0) < score:
+                    scores[position] = score
+
+        positions = np.fromiter(sorted(scores), dtype=np.int32, count=len(scores))
+        match = (_readonly(positions), _readonly(np.array([scores[p] for p in positions.tolist()], dtype=np.float64)))
+        self._prefix_cache.put(query_token, match)
+        return match
+
+    def _ranked(self, query_tokens):
+        cached = self._query_cache.get(query_tokens)
+        if cached is not None:
+            return cached
+
+        # Empezar por el término más selectivo reduce el trabajo de intersección
+        matches = sorted((self._match_token(t) for t in query_tokens), key=lambda m: len(m[0]))
+        positions, totals = matches[0]
+        for other_positions, other_scores in matches[1:]:
+            positions, mine, theirs = np.intersect1d(positions, other_positions, assume_unique=True,
+                                                     return_indices=True)
+            totals = totals[mine] + other_scores[theirs]
+            if not len(positions):
+                break
+
+        ranked = _readonly(positions[np.lexsort((positions, -totals))].astype(np.int32, copy=False))
+        self._query_cache.put(query_tokens, ranked)
+        return ranked
+
+    def search(self, query, limit=None):
+        """
+        Posiciones de fila que contienen TODAS las palabras de la consulta
+        (cada una como palabra completa o prefijo), de mayor a menor relevancia.
+        """
+        query_tokens = tuple(dict.fromkeys(tokenize(query)))
+        if not query_tokens:
+            return []
+        ranked = self._ranked(query_tokens)
+        return (ranked[:limit] if limit else ranked).tolist()
+
+    def search_fuzzy(self, query, limit=10, min_score=FUZZY_MIN_SCORE):
+        """
+        Búsqueda tolerante a errores sobre CENTRO_EDUCATIVO: [(posición, puntaje)].
+        El índice de trigramas se construye la primera vez que se usa.
+        """
+        if self._fuzzy is None:
+            with self._fuzzy_lock:
+                if self._fuzzy is None:
+                    self._fuzzy = TrigramIndex(self._names)
+        return self._fuzzy.search(query, limit=limit, min_score=min_score)
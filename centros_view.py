@@ -0,0 +1,50 @@
+import streamlit as st
+import folium
+import config
+from streamlit_folium import st_folium
+
+# Componentes del buscador de centros compartidos por admin_view y operator_view
+
+
+def render_nearest_centers(registry, geo_index, key_prefix):
+    """Mapa para hacer clic en un punto, listar los centros más cercanos y adjuntar uno."""
+    st.subheader("📍 Centros Cercanos a un Punto")
+    st.write("Haga clic en el mapa para ver los centros más cercanos y adjuntar el más próximo.")
+
+    last_click = st.session_state.get(f"{key_prefix}_nearest_point")
+    center = [last_click["lat"], last_click["lng"]] if last_click else config.DEFAULT_MAP_CENTER
+    zoom = 13 if last_click else config.DEFAULT_MAP_ZOOM
+
+    fmap = folium.Map(location=center, zoom_start=zoom)
+    nearest = []
+    if last_click:
+        nearest = geo_index.nearest(last_click["lat"], last_click["lng"], k=config.GEO_NEAREST_K)
+        folium.Marker([last_click["lat"], last_click["lng"]], tooltip="Punto seleccionado",
+                      icon=folium.Icon(color="red")).add_to(fmap)
+        for position, distance in nearest:
+            row = registry.record_at(position)
+            folium.Marker([row["LATITUD"], row["LONGITUD"]],
+                          tooltip=f"{row['CENTRO_EDUCATIVO']} ({distance:.2f} km)").add_to(fmap)
+
+    map_data = st_folium(fmap, key=f"{key_prefix}_nearest_map", width=700, height=400,
+                         returned_objects=["last_clicked"])
+    clicked = map_data.get("last_clicked") if map_data else None
+    if clicked and clicked != last_click:
+        st.session_state[f"{key_prefix}_nearest_point"] = clicked
+        st.rerun()
+
+    if not nearest:
+        return
+
+    st.write(f"Coordenadas: {last_click['lat']:.6f}, {last_click['lng']:.6f}")
+    distances = {registry.code_at(position): distance for position, distance in nearest}
+    selected = st.selectbox(
+        "Centros más cercanos:",
+        options=list(distances.keys()),
+        format_func=lambda code: f"{registry.label(code)} — {distances[code]:.2f} km",
+        key=f"{key_prefix}_nearest_select"
+    )
+    if st.button("✅ Adjuntar este centro", key=f"{key_prefix}_nearest_attach"):
+        st.session_state.centro_adjunto = registry.get(selected)
+        st.success(f"✅ Centro '{registry.name_of(selected)}' adjuntado!")
+        st.info("💡 Los datos se pre-llenarán automáticamente en el formulario.")
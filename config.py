@@ -42,3 +42,76 @@ CSV_TO_FORM_MAP = {
 # Coordenadas por defecto (Centro de Costa Rica)
 DEFAULT_MAP_CENTER = [9.9333, -84.0833]
 DEFAULT_MAP_ZOOM = 7
+
+# Pool de conexiones a PostgreSQL
+DB_POOL_MIN_CONN = 1
+DB_POOL_MAX_CONN = 10
+DB_POOL_TIMEOUT = 30  # segundos esperando una conexión libre
+DB_POOL_HEALTHCHECK_INTERVAL = 30  # segundos ociosa antes de verificar con SELECT 1
+
+# Paginación de la revisión de envíos (filas por página)
+REVIEW_PAGE_SIZE = 50
+
+# Envíos cuyo contenido (JSONB `data`) se mantiene en memoria al verlos en detalle
+SUBMISSION_PAYLOAD_CACHE_SIZE = 32
+
+# Migraciones opcionales habilitadas (ver migrations.py), p. ej. ("data_gin_index",)
+DB_OPTIONAL_MIGRATIONS = ()
+
+# Catálogo de centros educativos y su caché Arrow (ver centros_data.py)
+CENTROS_CSV_PATH = "datos_centros.csv"
+CENTROS_CACHE_DIR = ".cache"
+
+# Índice espacial de centros: tamaño de celda (grados, ~5.5 km) y coordenadas
+# válidas (lat_min, lat_max, lon_min, lon_max); el CSV trae algunas en 0 o corruptas
+GEO_INDEX_CELL_DEG = 0.05
+GEO_VALID_BOUNDS = (5.0, 11.5, -87.5, -82.5)
+GEO_NEAREST_K = 5  # centros sugeridos al hacer clic en el mapa
+
+# Archivos de "Carga de Imagen" (ver attachments.py): almacén en disco por hash
+ATTACHMENTS_DIR = "attachments"
+ATTACHMENT_CHUNK_SIZE = 1024 * 1024  # bytes leídos/escritos por bloque
+ATTACHMENT_MAX_BYTES = 20 * 1024 * 1024
+ATTACHMENT_THUMBNAIL_SIZE = (320, 320)
+# init_db.py --sweep-attachments solo borra archivos sin envío más viejos que esto:
+# uno recién subido puede estar todavía en la cola
+ATTACHMENT_SWEEP_MIN_AGE = 24 * 3600  # segundos
+
+# Caché de áreas y plantillas (ver template_cache.py): segundos entre consultas
+# al contador `catalog_version` para ver cambios hechos por otros procesos
+TEMPLATE_CACHE_CHECK_INTERVAL = 5
+
+# Carga masiva de envíos (ver bulk_ingest.py): filas por sentencia INSERT
+BULK_INGEST_PAGE_SIZE = 500
+
+# Exportación de envíos (ver submission_export.py): filas por viaje del cursor de servidor
+EXPORT_CHUNK_SIZE = 2000
+
+# Tablas analíticas por plantilla (ver analytics.py): cada refresco vuelve a
+# revisar este número de ids anteriores al último procesado, por si un envío
+# con id menor se confirmó después del refresco anterior
+ANALYTICS_REFRESH_OVERLAP = 1000
+
+# Cola de escritura diferida de envíos (ver submission_queue.py)
+SUBMISSION_QUEUE_ENABLED = True
+SUBMISSION_SPOOL_PATH = "spool/submissions.sqlite3"
+SUBMISSION_QUEUE_BATCH_SIZE = 50
+SUBMISSION_QUEUE_POLL_INTERVAL = 2  # segundos entre revisiones del spool sin envíos nuevos
+SUBMISSION_QUEUE_RETRY_BASE = 1  # segundos; se duplica en cada reintento
+SUBMISSION_QUEUE_RETRY_MAX = 300
+SUBMISSION_QUEUE_MAX_ATTEMPTS = 20  # solo para errores no transitorios
+
+# Contraseñas (ver auth.py). Método de werkzeug con su costo: al cambiarlo, cada
+# usuario recibe un hash nuevo la próxima vez que inicia sesión.
+PASSWORD_HASH_METHOD = "scrypt:32768:8:1"
+AUTH_WORKERS = 4  # verificaciones de contraseña simultáneas
+AUTH_TIMEOUT = 30  # segundos máximos esperando al pool
+
+# Instrumentación de consultas (ver query_stats.py) y pestaña "Rendimiento"
+QUERY_STATS_ENABLED = True
+SLOW_QUERY_MS = 500  # sentencias más lentas quedan en el registro de consultas lentas
+SLOW_QUERY_LOG_SIZE = 100
+
+# Perfilador de reruns (ver rerun_profiler.py): desglose del costo de cada rerun en la barra lateral
+RERUN_PROFILER_ENABLED = False
+RERUN_PROFILER_HISTORY = 20  # reruns guardados por sesión
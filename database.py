@@ -3,13 +3,20 @@ import psycopg2
 import pandas as pd
 import json
 import os
+import functools
+import config
+import signatures
+import attachments
+import template_cache
+import form_schema
+import query_stats
+from db_pool import ConnectionPool
 
 # --- CONEXIÓN PRINCIPAL ---
 
-@st.cache_resource
-def get_db_connection():
+def _get_db_url():
     """
-    Se conecta a la base de datos Postgres.
+    Obtiene la URL de Postgres.
     Intenta leer de st.secrets primero, luego de variables de entorno.
     """
     db_url = None
@@ -31,180 +38,255 @@ def get_db_connection():
         st.error("❌ Error: No se encontró DB_URL en secrets.toml ni en variables de entorno.")
         st.stop()
 
-    # Dejamos que el error se propague si la conexión falla
-    conn = psycopg2.connect(db_url)
-    return conn
+    return db_url
+
+@st.cache_resource
+def get_db_pool():
+    """
+    Pool de conexiones compartido por todas las sesiones del proceso.
+    Dejamos que el error se propague si la conexión inicial falla.
+    """
+    connect = psycopg2.connect
+    if config.QUERY_STATS_ENABLED:
+        connect = functools.partial(psycopg2.connect, cursor_factory=query_stats.InstrumentedCursor)
+    return ConnectionPool(
+        _get_db_url(),
+        minconn=config.DB_POOL_MIN_CONN,
+        maxconn=config.DB_POOL_MAX_CONN,
+        timeout=config.DB_POOL_TIMEOUT,
+        healthcheck_interval=config.DB_POOL_HEALTHCHECK_INTERVAL,
+        connect=connect,
+    )
+
+def get_db_connection():
+    """
+    Presta una conexión del pool. Usar siempre como context manager:
+
+        with get_db_connection() as conn:
+            ...
+
+    Al salir, la conexión vuelve al pool (con rollback de cualquier
+    transacción pendiente) o se descarta si quedó rota. Con
+    config.QUERY_STATS_ENABLED el bloque se mide a nombre de la función que
+    lo abre (ver query_stats.py); el perfilador de reruns usa la misma medición.
+    """
+    if config.QUERY_STATS_ENABLED or config.RERUN_PROFILER_ENABLED:
+        return query_stats.measure(query_stats.caller_name(), get_db_pool().connection())
+    return get_db_pool().connection()
+
+def get_pool_stats():
+    """Estadísticas del pool: conexiones en uso, ociosas y tiempos de espera."""
+    return get_db_pool().stats()
 
 # --- INICIALIZACIÓN ---
 
 def create_tables():
     """Crea todas las tablas de la app si no existen."""
-    conn = get_db_connection()
-    if not conn: return
-
-    try:
-        with conn.cursor() as cur:
-            # Tabla de Áreas
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS form_areas (
-                    id SERIAL PRIMARY KEY,
-                    area_name VARCHAR(100) UNIQUE NOT NULL,
-                    description TEXT
-                );
-            """)
-            
-            # Tabla de Usuarios (crear si no existe — evitar borrados destructivos aquí)
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS usuarios (
-                    id SERIAL PRIMARY KEY,
-                    username VARCHAR(50) UNIQUE NOT NULL,
-                    password_hash VARCHAR(255) NOT NULL,
-                    role VARCHAR(20) NOT NULL CHECK (role IN ('admin', 'operador')),
-                    full_name VARCHAR(100)
-                );
-            """)
-            
-            # Tabla de Plantillas
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS form_templates (
-                    id SERIAL PRIMARY KEY,
-                    name VARCHAR(100) NOT NULL,
-                    structure JSONB NOT NULL,
-                    created_by_user_id INTEGER REFERENCES usuarios(id),
-                    area_id INTEGER REFERENCES form_areas(id)
-                );
-            """)
-            
-            # Tabla de Envíos
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS form_submissions (
-                    id SERIAL PRIMARY KEY,
-                    template_id INTEGER REFERENCES form_templates(id),
-                    user_id INTEGER REFERENCES usuarios(id),
-                    data JSONB NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    reviewed BOOLEAN DEFAULT FALSE,
-                    reviewed_by INTEGER REFERENCES usuarios(id),
-                    reviewed_at TIMESTAMP
-                );
-            """)
-            
-            # En caso de que la tabla ya existiera pero falten columnas (migración idempotente)
-            cur.execute("ALTER TABLE form_submissions ADD COLUMN IF NOT EXISTS reviewed BOOLEAN DEFAULT FALSE;")
-            cur.execute("ALTER TABLE form_submissions ADD COLUMN IF NOT EXISTS reviewed_by INTEGER;")
-            cur.execute("ALTER TABLE form_submissions ADD COLUMN IF NOT EXISTS reviewed_at TIMESTAMP;")
-        conn.commit()
-        print("✅ Tablas verificadas/creadas exitosamente.")
-    except Exception as e:
-        print(f"❌ Error creando tablas: {e}")
-    # NOTA: NO HAY 'conn.close()' AQUÍ. ES INTENCIONAL.
+    with get_db_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                # Tabla de Áreas
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS form_areas (
+                        id SERIAL PRIMARY KEY,
+                        area_name VARCHAR(100) UNIQUE NOT NULL,
+                        description TEXT
+                    );
+                """)
+                
+                # Tabla de Usuarios (crear si no existe — evitar borrados destructivos aquí)
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS usuarios (
+                        id SERIAL PRIMARY KEY,
+                        username VARCHAR(50) UNIQUE NOT NULL,
+                        password_hash VARCHAR(255) NOT NULL,
+                        role VARCHAR(20) NOT NULL CHECK (role IN ('admin', 'operador')),
+                        full_name VARCHAR(100)
+                    );
+                """)
+                
+                # Tabla de Plantillas
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS form_templates (
+                        id SERIAL PRIMARY KEY,
+                        name VARCHAR(100) NOT NULL,
+                        structure JSONB NOT NULL,
+                        created_by_user_id INTEGER REFERENCES usuarios(id),
+                        area_id INTEGER REFERENCES form_areas(id)
+                    );
+                """)
+                
+                # Tabla de Envíos
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS form_submissions (
+                        id SERIAL PRIMARY KEY,
+                        template_id INTEGER REFERENCES form_templates(id),
+                        user_id INTEGER REFERENCES usuarios(id),
+                        data JSONB NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        reviewed BOOLEAN DEFAULT FALSE,
+                        reviewed_by INTEGER REFERENCES usuarios(id),
+                        reviewed_at TIMESTAMP
+                    );
+                """)
+                
+                # En caso de que la tabla ya existiera pero falten columnas (migración idempotente)
+                cur.execute("ALTER TABLE form_submissions ADD COLUMN IF NOT EXISTS reviewed BOOLEAN DEFAULT FALSE;")
+                cur.execute("ALTER TABLE form_submissions ADD COLUMN IF NOT EXISTS reviewed_by INTEGER;")
+                cur.execute("ALTER TABLE form_submissions ADD COLUMN IF NOT EXISTS reviewed_at TIMESTAMP;")
+            conn.commit()
+            print("✅ Tablas verificadas/creadas exitosamente.")
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ Error creando tablas: {e}")
+    # La conexión vuelve al pool al salir del bloque 'with'.
 
 # --- FUNCIONES DE USUARIO ---
 
-def get_user(username):
-    conn = get_db_connection()
-    with conn.cursor() as cur:
-        cur.execute("SELECT id, username, password_hash, role, full_name FROM usuarios WHERE username = %s", (username,))
-        user_data = cur.fetchone()
-    # Sin conn.close()
-    if user_data:
-        return {"id": user_data[0], "username": user_data[1], "password_hash": user_data[2], "role": user_data[3], "full_name": user_data[4]}
+def get_user_credentials(username):
+    """Usuario con su password_hash (id, username, password_hash, role, full_name), o None."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT id, username, password_hash, role, full_name FROM usuarios WHERE username = %s", (username,))
+            u = cur.fetchone()
+    if u:
+        return {"id": u[0], "username": u[1], "password_hash": u[2], "role": u[3], "full_name": u[4]}
     return None
 
+def update_password_hash(user_id, new_hash, old_hash):
+    """
+    Reemplaza el hash de la contraseña solo si sigue siendo `old_hash` (otro
+    proceso pudo cambiar la contraseña entretanto). Retorna True si lo cambió.
+    """
+    with get_db_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("UPDATE usuarios SET password_hash = %s WHERE id = %s AND password_hash = %s",
+                            (new_hash, user_id, old_hash))
+                updated = cur.rowcount == 1
+            conn.commit()
+            return updated
+        except Exception:
+            conn.rollback()
+            raise
+
 def create_admin_user(username, password, full_name):
     from auth import hash_password
     hashed = hash_password(password)
-    conn = get_db_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("INSERT INTO usuarios (username, password_hash, role, full_name) VALUES (%s, %s, 'admin', %s)", (username, hashed, full_name))
-        conn.commit()
-        print(f"✅ Usuario admin '{username}' creado.")
-    except psycopg2.IntegrityError:
-        conn.rollback()
-        print(f"⚠️  Usuario admin '{username}' ya existe. No se creó de nuevo.")
-    except psycopg2.DatabaseError as e:
-        conn.rollback()
-        print(f"❌ Error de base de datos creando admin: {e}")
-    except Exception as e:
-        conn.rollback()
-        print(f"❌ Error creando admin: {e}")
-    # Sin conn.close()
+    with get_db_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("INSERT INTO usuarios (username, password_hash, role, full_name) VALUES (%s, %s, 'admin', %s)", (username, hashed, full_name))
+            conn.commit()
+            print(f"✅ Usuario admin '{username}' creado.")
+        except psycopg2.IntegrityError:
+            conn.rollback()
+            print(f"⚠️  Usuario admin '{username}' ya existe. No se creó de nuevo.")
+        except psycopg2.DatabaseError as e:
+            conn.rollback()
+            print(f"❌ Error de base de datos creando admin: {e}")
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ Error creando admin: {e}")
 
 def create_user(username, password, role, full_name):
     from auth import hash_password
     hashed = hash_password(password)
-    conn = get_db_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("INSERT INTO usuarios (username, password_hash, role, full_name) VALUES (%s, %s, %s, %s)", (username, hashed, role, full_name))
-        conn.commit()
-        return True, "Usuario creado."
-    except psycopg2.IntegrityError:
-        conn.rollback()
-        return False, "El usuario ya existe."
-    except psycopg2.DatabaseError as e:
-        conn.rollback()
-        return False, f"Error de base de datos: {str(e)[:50]}"
-    except Exception as e:
-        conn.rollback()
-        return False, f"Error: {str(e)[:50]}"
-    # Sin conn.close()
+    with get_db_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("INSERT INTO usuarios (username, password_hash, role, full_name) VALUES (%s, %s, %s, %s)", (username, hashed, role, full_name))
+            conn.commit()
+            return True, "Usuario creado."
+        except psycopg2.IntegrityError:
+            conn.rollback()
+            return False, "El usuario ya existe."
+        except psycopg2.DatabaseError as e:
+            conn.rollback()
+            return False, f"Error de base de datos: {str(e)[:50]}"
+        except Exception as e:
+            conn.rollback()
+            return False, f"Error: {str(e)[:50]}"
 
 def get_all_users():
-    conn = get_db_connection()
-    df = pd.read_sql("SELECT id, username, role, full_name FROM usuarios ORDER BY full_name", conn)
-    # Sin conn.close()
+    with get_db_connection() as conn:
+        df = pd.read_sql("SELECT id, username, role, full_name FROM usuarios ORDER BY full_name", conn)
     return df
 
 # --- FUNCIONES DE ÁREAS Y TEMPLATES ---
+# Las lecturas pasan por un caché en proceso (ver template_cache.py); toda
+# escritura sobre áreas o plantillas debe llamar a invalidate_template_cache().
+# Los valores devueltos son compartidos y no deben modificarse.
+
+def _get_catalog_version():
+    """Contador de cambios de áreas/plantillas (None si la migración 6 no está aplicada)."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('catalog_version')")
+            if cur.fetchone()[0] is None:
+                return None
+            cur.execute("SELECT version FROM catalog_version WHERE name = 'templates'")
+            res = cur.fetchone()
+    return res[0] if res else None
+
+_template_cache = template_cache.VersionedCache(_get_catalog_version,
+                                                config.TEMPLATE_CACHE_CHECK_INTERVAL)
+
+def invalidate_template_cache():
+    _template_cache.invalidate()
+
+def get_template_cache_stats():
+    return _template_cache.stats()
 
 def create_area(area_name, description):
-    conn = get_db_connection()
-    try:
+    with get_db_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("INSERT INTO form_areas (area_name, description) VALUES (%s, %s)", (area_name, description))
+            conn.commit()
+            invalidate_template_cache()
+            return True, "Área creada."
+        except psycopg2.IntegrityError:
+            conn.rollback()
+            return False, "El nombre de área ya existe."
+
+def _load_all_areas():
+    with get_db_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute("INSERT INTO form_areas (area_name, description) VALUES (%s, %s)", (area_name, description))
-        conn.commit()
-        return True, "Área creada."
-    except psycopg2.IntegrityError:
-        conn.rollback()
-        return False, "El nombre de área ya existe."
-    # Sin conn.close()
+            cur.execute("SELECT id, area_name, description FROM form_areas ORDER BY area_name")
+            data = [{"id": a[0], "name": a[1], "description": a[2]} for a in cur.fetchall()]
+    return data
 
 def get_all_areas():
-    conn = get_db_connection()
-    with conn.cursor() as cur:
-        cur.execute("SELECT id, area_name, description FROM form_areas ORDER BY area_name")
-        data = [{"id": a[0], "name": a[1], "description": a[2]} for a in cur.fetchall()]
-    # Sin conn.close()
-    return data
+    return _template_cache.get(("areas",), _load_all_areas)
 
 def save_form_template(name, structure, user_id, area_id):
-    conn = get_db_connection()
-    try:
+    with get_db_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("INSERT INTO form_templates (name, structure, created_by_user_id, area_id) VALUES (%s, %s, %s, %s)",
+                            (name, json.dumps(structure), user_id, area_id))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+    invalidate_template_cache()
+
+def _load_templates_by_area(area_id):
+    with get_db_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute("INSERT INTO form_templates (name, structure, created_by_user_id, area_id) VALUES (%s, %s, %s, %s)",
-                        (name, json.dumps(structure), user_id, area_id))
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
-        raise e
-    # Sin conn.close()
+            cur.execute("SELECT id, name FROM form_templates WHERE area_id = %s ORDER BY name", (area_id,))
+            data = [{"id": t[0], "name": t[1]} for t in cur.fetchall()]
+    return data
 
 def get_templates_by_area(area_id):
-    conn = get_db_connection()
-    with conn.cursor() as cur:
-        cur.execute("SELECT id, name FROM form_templates WHERE area_id = %s ORDER BY name", (area_id,))
-        data = [{"id": t[0], "name": t[1]} for t in cur.fetchall()]
-    # Sin conn.close()
-    return data
+    return _template_cache.get(("templates", area_id), lambda: _load_templates_by_area(area_id))
 
-def get_template_structure(template_id):
-    conn = get_db_connection()
-    with conn.cursor() as cur:
-        cur.execute("SELECT structure FROM form_templates WHERE id = %s", (template_id,))
-        res = cur.fetchone()
-    # Sin conn.close()
+def _load_template_structure(template_id):
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT structure FROM form_templates WHERE id = %s", (template_id,))
+            res = cur.fetchone()
     if not res:
         return None
 
@@ -219,69 +301,301 @@ def get_template_structure(template_id):
 
     return structure
 
+def get_template_structure(template_id):
+    return _template_cache.get(("structure", template_id), lambda: _load_template_structure(template_id))
+
+def get_compiled_schema(template_id):
+    """Esquema compilado de la plantilla (form_schema.CompiledSchema), o None si no existe."""
+    def compile_template():
+        structure = get_template_structure(template_id)
+        return form_schema.compile_schema(structure) if structure else None
+    return _template_cache.get(("schema", template_id), compile_template)
+
 # --- FUNCIONES DE ENVÍOS Y DASHBOARD ---
 
-def save_submission(template_id, user_id, data):
-    conn = get_db_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("INSERT INTO form_submissions (template_id, user_id, data) VALUES (%s, %s, %s)",
-                        (template_id, user_id, json.dumps(data, default=str)))
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
-        raise e
-    # Sin conn.close()
+def save_submission(template_id, user_id, data, submission_key=None, created_at=None):
+    """
+    Guarda un envío y retorna su id. Con `submission_key` (UUID) el guardado
+    es idempotente: si ya existe un envío con esa llave no se inserta otro y
+    se retorna None. `created_at` permite conservar la hora original de un
+    envío que llega tarde; si trae zona horaria se convierte a la de la base.
+    """
+    # Validación en el servidor con el esquema compilado de la plantilla
+    schema = get_compiled_schema(template_id)
+    if schema is None:
+        raise form_schema.FormValidationError(f"La plantilla {template_id} no existe.")
+    schema.check(data)
+    # Las firmas (PNG) van a su propia tabla; en `data` queda solo una referencia
+    payload, signature_images = signatures.split_signatures(data)
+    with get_db_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO form_submissions (template_id, user_id, data, submission_key, created_at)
+                    VALUES (%s, %s, %s, %s, COALESCE(%s::timestamptz, CURRENT_TIMESTAMP))
+                    ON CONFLICT (submission_key) DO NOTHING
+                    RETURNING id
+                """, (template_id, user_id, json.dumps(payload, default=str), submission_key, created_at))
+                res = cur.fetchone()
+                if res is None:
+                    # Reintento de un envío ya guardado
+                    conn.rollback()
+                    return None
+                submission_id = res[0]
+                for label, png_bytes in signature_images.items():
+                    cur.execute("INSERT INTO submission_signatures (submission_id, field_label, image) VALUES (%s, %s, %s)",
+                                (submission_id, label, psycopg2.Binary(png_bytes)))
+                # Los archivos ya están en el almacén de adjuntos; aquí solo se registran
+                for label, ref in payload.items():
+                    if attachments.is_reference(ref):
+                        cur.execute("""
+                            INSERT INTO submission_attachments
+                                (submission_id, field_label, sha256, filename, mime_type, byte_size)
+                            VALUES (%s, %s, %s, %s, %s, %s)
+                        """, (submission_id, label, ref[attachments.REFERENCE_KEY],
+                              ref.get("nombre"), ref.get("tipo"), ref.get("bytes", 0)))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+    return submission_id
 
 def get_submissions_by_user(user_id):
-    conn = get_db_connection()
-    df = pd.read_sql("""
-        SELECT s.id, t.name, s.created_at, s.data FROM form_submissions s 
-        JOIN form_templates t ON s.template_id = t.id WHERE s.user_id = %s ORDER BY s.created_at DESC
-    """, conn, params=(user_id,))
+    with get_db_connection() as conn:
+        df = pd.read_sql("""
+            SELECT s.id, t.name, s.created_at FROM form_submissions s 
+            JOIN form_templates t ON s.template_id = t.id WHERE s.user_id = %s ORDER BY s.created_at DESC
+        """, conn, params=(user_id,))
     return df
 
-def get_total_submission_count():
-    conn = get_db_connection()
-    with conn.cursor() as cur:
-        cur.execute("SELECT COUNT(*) FROM form_submissions")
-        count = cur.fetchone()[0]
-    return count
+# --- ESTADÍSTICAS PRE-AGREGADAS (DASHBOARD) ---
+# Los contadores viven en `submission_rollups` y los mantienen triggers sobre
+# form_submissions (migración 9), así que save_submission y
+# mark_submission_reviewed (y cualquier otro camino de escritura) los
+# actualizan sin código adicional. El dashboard lee O(áreas + usuarios) filas
+# en vez de recorrer los envíos. Cada contador está repartido en varias filas
+# (`slot`) para que los envíos concurrentes no se serialicen: se suman al leer.
+
+def rebuild_submission_rollups():
+    """Recalcula todos los contadores desde form_submissions (por si se desincronizan)."""
+    with get_db_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT submission_rollups_rebuild()")
+            conn.commit()
+            return True, "Estadísticas recalculadas."
+        except Exception as e:
+            conn.rollback()
+            return False, f"Error recalculando estadísticas: {str(e)[:80]}"
+
+def get_dashboard_counts():
+    """Totales del dashboard (envíos, revisados, áreas y usuarios) en una sola consulta."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT COALESCE(SUM(r.submission_count), 0)::bigint, COALESCE(SUM(r.reviewed_count), 0)::bigint,
+                       (SELECT COUNT(*) FROM form_areas), (SELECT COUNT(*) FROM usuarios)
+                FROM submission_rollups r
+                WHERE r.dimension = 'area'
+            """)
+            total, reviewed, areas, users = cur.fetchone()
+    return {"total": total, "reviewed": reviewed, "pending": total - reviewed, "areas": areas, "users": users}
 
 def get_submission_count_by_area():
-    conn = get_db_connection()
-    df = pd.read_sql("""
-        SELECT a.area_name, COUNT(s.id) as submission_count
-        FROM form_submissions s
-        JOIN form_templates t ON s.template_id = t.id
-        JOIN form_areas a ON t.area_id = a.id
-        GROUP BY a.area_name
-        ORDER BY submission_count DESC
-    """, conn)
+    with get_db_connection() as conn:
+        df = pd.read_sql("""
+            SELECT a.area_name, SUM(r.submission_count)::bigint AS submission_count
+            FROM submission_rollups r
+            JOIN form_areas a ON r.dim_key = a.id::text
+            WHERE r.dimension = 'area'
+            GROUP BY a.id, a.area_name
+            HAVING SUM(r.submission_count) > 0
+            ORDER BY submission_count DESC
+        """, conn)
     return df
 
 def get_submission_count_by_user():
-    conn = get_db_connection()
-    df = pd.read_sql("""
-        SELECT u.full_name, COUNT(s.id) as submission_count
-        FROM form_submissions s
-        JOIN usuarios u ON s.user_id = u.id
-        GROUP BY u.full_name
-        ORDER BY submission_count DESC
-    """, conn)
+    with get_db_connection() as conn:
+        df = pd.read_sql("""
+            SELECT u.full_name, SUM(r.submission_count)::bigint AS submission_count
+            FROM submission_rollups r
+            JOIN usuarios u ON r.dim_key = u.id::text
+            WHERE r.dimension = 'user'
+            GROUP BY u.id, u.full_name
+            HAVING SUM(r.submission_count) > 0
+            ORDER BY submission_count DESC
+        """, conn)
     return df
 
-def get_all_submissions_with_details():
-    conn = get_db_connection()
-    # Incluir también la columna `data` para poder mostrar detalles completos en la UI
-    df = pd.read_sql("""
-        SELECT s.id, u.full_name as user_name, t.name as template_name, a.area_name, s.data, s.created_at,
-               s.reviewed, s.reviewed_at, ru.full_name as reviewed_by_name
-        FROM form_submissions s
-        JOIN usuarios u ON s.user_id = u.id
-        JOIN form_templates t ON s.template_id = t.id
-        JOIN form_areas a ON t.area_id = a.id
-        LEFT JOIN usuarios ru ON s.reviewed_by = ru.id
-        ORDER BY s.created_at DESC
-    """, conn)
-    return df
\ No newline at end of file
+def get_submission_count_by_day(days=30):
+    with get_db_connection() as conn:
+        # Las fechas ISO se comparan como texto: evita castear claves de otras dimensiones
+        df = pd.read_sql("""
+            SELECT dim_key as day, SUM(submission_count)::bigint AS submission_count
+            FROM submission_rollups
+            WHERE dimension = 'day' AND dim_key <> ''
+              AND dim_key >= (CURRENT_DATE - %s)::text
+            GROUP BY dim_key
+            HAVING SUM(submission_count) > 0
+            ORDER BY dim_key
+        """, conn, params=(int(days),))
+    df['day'] = pd.to_datetime(df['day'])
+    return df
+
+@functools.lru_cache(maxsize=config.SUBMISSION_PAYLOAD_CACHE_SIZE)
+def _fetch_submission_payload(submission_id):
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT data FROM form_submissions WHERE id = %s", (submission_id,))
+            res = cur.fetchone()
+    if not res:
+        # Lanzar en vez de retornar None para que lru_cache no memorice ausencias
+        raise KeyError(submission_id)
+
+    data = res[0]
+    if isinstance(data, (str, bytes)):
+        data = json.loads(data)
+    return data
+
+def get_submission_payload(submission_id):
+    """
+    Devuelve el contenido (`data`) de un envío, o None si no existe.
+    Los envíos no se editan, así que se cachean los más recientes en memoria;
+    el diccionario devuelto es compartido y no debe modificarse.
+    """
+    try:
+        return _fetch_submission_payload(int(submission_id))
+    except KeyError:
+        return None
+
+def get_submission_signature(submission_id, field_label):
+    """Bytes PNG de la firma de un campo de un envío, o None si no existe."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT image FROM submission_signatures WHERE submission_id = %s AND field_label = %s",
+                        (submission_id, field_label))
+            res = cur.fetchone()
+    return bytes(res[0]) if res else None
+
+def get_attachment_hashes():
+    """Hashes de los adjuntos referenciados por algún envío guardado."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT DISTINCT sha256 FROM submission_attachments")
+            return {row[0] for row in cur.fetchall()}
+
+def migrate_legacy_signatures():
+    """
+    Convierte las firmas guardadas como listas de píxeles dentro de `data` al
+    formato PNG + referencia. Procesa un envío por transacción para no cargar
+    todos los MB en memoria a la vez. Retorna (éxito, mensaje).
+    """
+    # Firma antigua: arreglo de arreglos de arreglos (las tablas dinámicas son arreglos de objetos)
+    legacy_filter = """
+        EXISTS (SELECT 1 FROM jsonb_each(s.data) e
+                WHERE jsonb_typeof(e.value) = 'array'
+                  AND jsonb_typeof(e.value -> 0) = 'array'
+                  AND jsonb_typeof(e.value -> 0 -> 0) = 'array')
+    """
+    converted = 0
+    bytes_before = bytes_after = 0
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"SELECT s.id FROM form_submissions s WHERE {legacy_filter} ORDER BY s.id")
+                ids = [row[0] for row in cur.fetchall()]
+            conn.commit()
+
+            for submission_id in ids:
+                try:
+                    with conn.cursor() as cur:
+                        cur.execute("SELECT data, pg_column_size(data) FROM form_submissions WHERE id = %s FOR UPDATE",
+                                    (submission_id,))
+                        data, size_before = cur.fetchone()
+                        if isinstance(data, (str, bytes)):
+                            data = json.loads(data)
+                        for label, value in list(data.items()):
+                            if signatures.is_legacy_pixel_list(value):
+                                # Un lienzo vacío queda como None, igual que en los envíos nuevos
+                                data[label] = signatures.encode_signature(value)
+                        payload, signature_images = signatures.split_signatures(data)
+                        cur.execute("UPDATE form_submissions SET data = %s WHERE id = %s RETURNING pg_column_size(data)",
+                                    (json.dumps(payload, default=str), submission_id))
+                        size_after = cur.fetchone()[0]
+                        for label, png_bytes in signature_images.items():
+                            cur.execute("""
+                                INSERT INTO submission_signatures (submission_id, field_label, image)
+                                VALUES (%s, %s, %s)
+                                ON CONFLICT (submission_id, field_label) DO UPDATE SET image = EXCLUDED.image
+                            """, (submission_id, label, psycopg2.Binary(png_bytes)))
+                            size_after += len(png_bytes)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                converted += 1
+                bytes_before += size_before
+                bytes_after += size_after
+                _fetch_submission_payload.cache_clear()
+    except Exception as e:
+        return False, f"Error convirtiendo firmas (convertidos: {converted}): {e}"
+    if not converted:
+        return True, "No hay firmas en el formato anterior."
+    return True, (f"Firmas convertidas en {converted} envíos: "
+                  f"{bytes_before / 1024:.0f} KB -> {bytes_after / 1024:.0f} KB.")
+
+# --- CATÁLOGO DE CENTROS EN LA BASE (OPCIONAL, pg_trgm) ---
+# Requiere la migración opcional "centros_trgm" (ver migrations.py).
+
+def sync_centros_catalog(df_centros):
+    """Copia (upsert) el catálogo de centros del CSV a la tabla `centros`."""
+    from psycopg2.extras import execute_values
+    from centros_search import fold
+
+    def _value(row, col):
+        value = row.get(col)
+        return None if pd.isna(value) else value
+
+    rows = [
+        (str(r["CODSABER"]), r["CENTRO_EDUCATIVO"], fold(r["CENTRO_EDUCATIVO"]),
+         _value(r, "TIPO_INSTITUCION"), _value(r, "PROVINCIA"), _value(r, "CANTON"),
+         _value(r, "DISTRITO"), _value(r, "DIRECCION"), _value(r, "LATITUD"), _value(r, "LONGITUD"))
+        for r in df_centros.to_dict('records')
+    ]
+    with get_db_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                execute_values(cur, """
+                    INSERT INTO centros (codsaber, centro_educativo, nombre_normalizado, tipo_institucion,
+                                         provincia, canton, distrito, direccion, latitud, longitud)
+                    VALUES %s
+                    ON CONFLICT (codsaber) DO UPDATE SET
+                        centro_educativo = EXCLUDED.centro_educativo,
+                        nombre_normalizado = EXCLUDED.nombre_normalizado,
+                        tipo_institucion = EXCLUDED.tipo_institucion,
+                        provincia = EXCLUDED.provincia,
+                        canton = EXCLUDED.canton,
+                        distrito = EXCLUDED.distrito,
+                        direccion = EXCLUDED.direccion,
+                        latitud = EXCLUDED.latitud,
+                        longitud = EXCLUDED.longitud
+                """, rows, page_size=1000)
+            conn.commit()
+            return True, f"{len(rows)} centros sincronizados."
+        except Exception as e:
+            conn.rollback()
+            return False, f"Error sincronizando centros: {str(e)[:80]}"
+
+def search_centros_trgm(query, limit=10):
+    """Equivalente en Postgres de CentrosSearchIndex.search_fuzzy (word_similarity de pg_trgm)."""
+    from centros_search import fold
+    with get_db_connection() as conn:
+        df = pd.read_sql("""
+            SELECT codsaber, centro_educativo, provincia, canton,
+                   word_similarity(%(q)s, nombre_normalizado) AS similitud
+            FROM centros
+            WHERE %(q)s <%% nombre_normalizado
+            ORDER BY similitud DESC, codsaber
+            LIMIT %(limit)s
+        """, conn, params={"q": fold(query), "limit": int(limit)})
+    return df
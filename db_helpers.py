@@ -1,112 +1,180 @@
 import pandas as pd
-from database import get_db_connection
-
-
-def get_all_submissions_with_details():
-    conn = get_db_connection()
-    df = pd.read_sql("""
-        SELECT s.id, u.full_name as user_name, t.name as template_name, a.area_name, s.data, s.created_at,
-               s.reviewed, s.reviewed_at, ru.full_name as reviewed_by_name
-        FROM form_submissions s
-        JOIN usuarios u ON s.user_id = u.id
-        JOIN form_templates t ON s.template_id = t.id
-        JOIN form_areas a ON t.area_id = a.id
-        LEFT JOIN usuarios ru ON s.reviewed_by = ru.id
-        ORDER BY s.created_at DESC
-    """, conn)
-    return df
+from database import get_db_connection, invalidate_template_cache
+
+
+# Las consultas de listado no traen `data` (JSONB con firmas, tablas, etc.);
+# el contenido se pide por separado con database.get_submission_payload.
+_SUBMISSION_DETAIL_COLUMNS = """
+    s.id, u.full_name as user_name, t.name as template_name, a.area_name, s.created_at,
+    s.reviewed, s.reviewed_at, ru.full_name as reviewed_by_name
+"""
+
+_SUBMISSION_DETAIL_FROM = """
+    FROM form_submissions s
+    JOIN usuarios u ON s.user_id = u.id
+    JOIN form_templates t ON s.template_id = t.id
+    JOIN form_areas a ON t.area_id = a.id
+    LEFT JOIN usuarios ru ON s.reviewed_by = ru.id
+"""
+
+
+def _submission_filters(area_ids=None, user_ids=None, reviewed=None):
+    """Construye las condiciones WHERE (y sus parámetros) para filtrar envíos en SQL."""
+    conditions, params = [], []
+    if area_ids is not None:
+        conditions.append("t.area_id = ANY(%s)")
+        params.append(list(area_ids))
+    if user_ids is not None:
+        conditions.append("s.user_id = ANY(%s)")
+        params.append(list(user_ids))
+    if reviewed is not None:
+        conditions.append("s.reviewed = %s")
+        params.append(bool(reviewed))
+    return conditions, params
+
+
+def get_submissions_page(page_size=50, cursor=None, direction="next",
+                         area_ids=None, user_ids=None, reviewed=None):
+    """
+    Devuelve una página de envíos usando paginación por llave (keyset) sobre
+    (created_at, id), del más reciente al más antiguo.
+
+    - cursor: tupla (created_at, id) de la fila donde termina/empieza la página
+      actual; None para la primera página.
+    - direction: "next" trae envíos más antiguos que el cursor, "prev" más recientes.
+
+    Retorna (df, has_more): has_more indica si quedan filas en esa dirección.
+    A diferencia de OFFSET, el costo no crece con el número de página.
+    """
+    if direction not in ("next", "prev"):
+        raise ValueError("direction debe ser 'next' o 'prev'.")
+
+    conditions, params = _submission_filters(area_ids, user_ids, reviewed)
+    if cursor is not None:
+        op = "<" if direction == "next" else ">"
+        conditions.append(f"(s.created_at, s.id) {op} (%s, %s)")
+        params.extend([cursor[0], int(cursor[1])])
+
+    order = "DESC" if direction == "next" else "ASC"
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    # Pedimos una fila extra para saber si hay más páginas sin un COUNT(*)
+    sql = f"SELECT {_SUBMISSION_DETAIL_COLUMNS} {_SUBMISSION_DETAIL_FROM} {where} ORDER BY s.created_at {order}, s.id {order} LIMIT %s"
+    params.append(int(page_size) + 1)
+
+    with get_db_connection() as conn:
+        df = pd.read_sql(sql, conn, params=params)
+
+    has_more = len(df) > page_size
+    df = df.iloc[:page_size]
+    if direction == "prev":
+        df = df.iloc[::-1]
+    return df.reset_index(drop=True), has_more
+
+
+def page_cursors(df):
+    """Cursores (primero, último) de una página para navegar hacia atrás/adelante."""
+    if df.empty:
+        return None, None
+    first, last = df.iloc[0], df.iloc[-1]
+    return (first["created_at"], int(first["id"])), (last["created_at"], int(last["id"]))
+
+
+def get_submission_review_stats(area_ids=None, user_ids=None, reviewed=None):
+    """Totales para las métricas de revisión, calculados en SQL sin traer filas."""
+    conditions, params = _submission_filters(area_ids, user_ids, reviewed)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                SELECT COUNT(*),
+                       COUNT(*) FILTER (WHERE s.created_at > CURRENT_TIMESTAMP - INTERVAL '1 day'),
+                       COUNT(DISTINCT t.area_id)
+                FROM form_submissions s
+                JOIN form_templates t ON s.template_id = t.id
+                {where}
+            """, params or None)
+            total, last_24h, areas = cur.fetchone()
+    return {"total": total, "last_24h": last_24h, "areas": areas}
 
 
 def mark_submission_reviewed(submission_id, reviewer_user_id, reviewed=True):
-    conn = get_db_connection()
-    try:
-        with conn.cursor() as cur:
-            if reviewed:
-                cur.execute("UPDATE form_submissions SET reviewed = TRUE, reviewed_by = %s, reviewed_at = CURRENT_TIMESTAMP WHERE id = %s",
-                            (reviewer_user_id, submission_id))
-            else:
-                cur.execute("UPDATE form_submissions SET reviewed = FALSE, reviewed_by = NULL, reviewed_at = NULL WHERE id = %s",
-                            (submission_id,))
-        conn.commit()
-        return True, "Estado de revisión actualizado."
-    except Exception as e:
-        conn.rollback()
-        return False, f"Error actualizando estado: {str(e)[:80]}"
-
-
-def get_unreviewed_submissions():
-    conn = get_db_connection()
-    df = pd.read_sql("""
-        SELECT s.id, u.full_name as user_name, t.name as template_name, a.area_name, s.data, s.created_at
-        FROM form_submissions s
-        JOIN usuarios u ON s.user_id = u.id
-        JOIN form_templates t ON s.template_id = t.id
-        JOIN form_areas a ON t.area_id = a.id
-        WHERE s.reviewed = FALSE
-        ORDER BY s.created_at DESC
-    """, conn)
-    return df
+    with get_db_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                if reviewed:
+                    cur.execute("UPDATE form_submissions SET reviewed = TRUE, reviewed_by = %s, reviewed_at = CURRENT_TIMESTAMP WHERE id = %s",
+                                (reviewer_user_id, submission_id))
+                else:
+                    cur.execute("UPDATE form_submissions SET reviewed = FALSE, reviewed_by = NULL, reviewed_at = NULL WHERE id = %s",
+                                (submission_id,))
+            conn.commit()
+            return True, "Estado de revisión actualizado."
+        except Exception as e:
+            conn.rollback()
+            return False, f"Error actualizando estado: {str(e)[:80]}"
 
 
 def update_area(area_id, area_name, description):
-    conn = get_db_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("UPDATE form_areas SET area_name = %s, description = %s WHERE id = %s",
-                        (area_name, description, area_id))
-        conn.commit()
-        return True, "Área actualizada."
-    except Exception as e:
-        conn.rollback()
-        return False, f"Error actualizando área: {str(e)[:80]}"
+    with get_db_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("UPDATE form_areas SET area_name = %s, description = %s WHERE id = %s",
+                            (area_name, description, area_id))
+            conn.commit()
+            invalidate_template_cache()
+            return True, "Área actualizada."
+        except Exception as e:
+            conn.rollback()
+            return False, f"Error actualizando área: {str(e)[:80]}"
 
 
 def delete_area(area_id):
-    conn = get_db_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("DELETE FROM form_areas WHERE id = %s", (area_id,))
-        conn.commit()
-        return True, "Área eliminada."
-    except Exception as e:
-        conn.rollback()
-        return False, f"Error eliminando área: {str(e)[:80]}"
+    with get_db_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM form_areas WHERE id = %s", (area_id,))
+            conn.commit()
+            invalidate_template_cache()
+            return True, "Área eliminada."
+        except Exception as e:
+            conn.rollback()
+            return False, f"Error eliminando área: {str(e)[:80]}"
 
 
 def get_user_by_id(user_id):
-    conn = get_db_connection()
-    with conn.cursor() as cur:
-        cur.execute("SELECT id, username, role, full_name FROM usuarios WHERE id = %s", (user_id,))
-        u = cur.fetchone()
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT id, username, role, full_name FROM usuarios WHERE id = %s", (user_id,))
+            u = cur.fetchone()
     if u:
         return {"id": u[0], "username": u[1], "role": u[2], "full_name": u[3]}
     return None
 
 
 def update_user(user_id, role=None, full_name=None):
-    conn = get_db_connection()
-    try:
-        with conn.cursor() as cur:
-            if role is not None and full_name is not None:
-                cur.execute("UPDATE usuarios SET role = %s, full_name = %s WHERE id = %s", (role, full_name, user_id))
-            elif role is not None:
-                cur.execute("UPDATE usuarios SET role = %s WHERE id = %s", (role, user_id))
-            elif full_name is not None:
-                cur.execute("UPDATE usuarios SET full_name = %s WHERE id = %s", (full_name, user_id))
-        conn.commit()
-        return True, "Usuario actualizado."
-    except Exception as e:
-        conn.rollback()
-        return False, f"Error actualizando usuario: {str(e)[:80]}"
+    with get_db_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                if role is not None and full_name is not None:
+                    cur.execute("UPDATE usuarios SET role = %s, full_name = %s WHERE id = %s", (role, full_name, user_id))
+                elif role is not None:
+                    cur.execute("UPDATE usuarios SET role = %s WHERE id = %s", (role, user_id))
+                elif full_name is not None:
+                    cur.execute("UPDATE usuarios SET full_name = %s WHERE id = %s", (full_name, user_id))
+            conn.commit()
+            return True, "Usuario actualizado."
+        except Exception as e:
+            conn.rollback()
+            return False, f"Error actualizando usuario: {str(e)[:80]}"
 
 
 def delete_user(user_id):
-    conn = get_db_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("DELETE FROM usuarios WHERE id = %s", (user_id,))
-        conn.commit()
-        return True, "Usuario eliminado."
-    except Exception as e:
-        conn.rollback()
-        return False, f"Error eliminando usuario: {str(e)[:80]}"
+    with get_db_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM usuarios WHERE id = %s", (user_id,))
+            conn.commit()
+            return True, "Usuario eliminado."
+        except Exception as e:
+            conn.rollback()
+            return False, f"Error eliminando usuario: {str(e)[:80]}"
@@ -0,0 +1,217 @@
+"""
+Pool de conexiones a PostgreSQL seguro para hilos.
+
+Streamlit atiende cada sesión en su propio hilo, así que una única conexión
+compartida serializa todas las consultas y, si una transacción falla, deja la
+conexión inutilizable para todos. Este pool presta una conexión por operación
+(checkout/checkin), verifica su salud al prestarla y reemplaza las conexiones
+que se cayeron (por ejemplo, cuando Neon suspende el cómputo).
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolTimeoutError(psycopg2.OperationalError):
+    """No se liberó ninguna conexión dentro del tiempo de espera."""
+
+
+class ConnectionPool:
+    """
+    Pool con tamaño mínimo/máximo de conexiones.
+
+    Uso:
+        with pool.connection() as conn:
+            with conn.cursor() as cur:
+                ...
+    """
+
+    def __init__(self, dsn, minconn=1, maxconn=10, timeout=30.0,
+                 healthcheck_interval=30.0, connect=psycopg2.connect):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Tamaños de pool inválidos: se requiere 0 <= minconn <= maxconn y maxconn >= 1.")
+
+        self._dsn = dsn
+        self._connect = connect
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.healthcheck_interval = healthcheck_interval
+
+        self._cond = threading.Condition()
+        self._idle = []  # [(conn, último_uso)] — LIFO para reutilizar conexiones "calientes"
+        self._total = 0
+        self._in_use = 0
+        self._closed = False
+
+        # Estadísticas
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._timeouts = 0
+        self._reconnects = 0
+
+        for _ in range(minconn):
+            conn = self._connect(self._dsn)
+            self._total += 1
+            self._idle.append((conn, time.monotonic()))
+
+    # --- PRÉSTAMO Y DEVOLUCIÓN ---
+
+    def getconn(self):
+        """Presta una conexión sana; espera hasta `timeout` si el pool está lleno."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+        conn = None
+        last_used = None
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise psycopg2.InterfaceError("El pool de conexiones está cerrado.")
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._total < self.maxconn:
+                    # Reservar el hueco antes de conectar fuera del candado
+                    self._total += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"No hay conexiones libres tras {self.timeout:.0f}s "
+                        f"(máximo {self.maxconn} en uso)."
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+            self._in_use += 1
+            self._checkouts += 1
+            wait_time = time.monotonic() - start
+            if waited:
+                self._waits += 1
+            self._wait_time_total += wait_time
+            self._wait_time_max = max(self._wait_time_max, wait_time)
+
+        try:
+            if conn is None:
+                conn = self._connect(self._dsn)
+            elif not self._is_healthy(conn, last_used):
+                self._close_quietly(conn)
+                conn = self._connect(self._dsn)
+                with self._cond:
+                    self._reconnects += 1
+        except Exception:
+            # No se pudo abrir la conexión: liberar el hueco reservado
+            with self._cond:
+                self._in_use -= 1
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+        return conn
+
+    def putconn(self, conn, discard=False):
+        """Devuelve una conexión al pool; si está rota (o `discard`), se cierra."""
+        if not discard:
+            discard = not self._reset(conn)
+        if discard:
+            self._close_quietly(conn)
+
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._total -= 1
+                if self._closed and not discard:
+                    self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager de checkout/checkin."""
+        conn = self.getconn()
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            # La conexión probablemente murió: la próxima se abrirá de nuevo
+            discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+
+    def closeall(self):
+        """Cierra las conexiones ociosas; las prestadas se cierran al devolverse."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    # --- ESTADÍSTICAS ---
+
+    def stats(self):
+        """Instantánea del estado del pool, útil para dimensionarlo."""
+        with self._cond:
+            checkouts = self._checkouts
+            return {
+                "min": self.minconn,
+                "max": self.maxconn,
+                "total": self._total,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "checkouts": checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "reconnects": self._reconnects,
+                "wait_time_total_s": round(self._wait_time_total, 6),
+                "wait_time_avg_ms": round(self._wait_time_total / checkouts * 1000, 3) if checkouts else 0.0,
+                "wait_time_max_ms": round(self._wait_time_max * 1000, 3),
+            }
+
+    # --- INTERNOS ---
+
+    def _is_healthy(self, conn, last_used):
+        if conn.closed:
+            return False
+        if last_used is not None and time.monotonic() - last_used < self.healthcheck_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+                cur.fetchone()
+            conn.rollback()
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return False
+
+    def _reset(self, conn):
+        """Deja la conexión sin transacción abierta. Devuelve False si quedó inservible."""
+        if conn.closed:
+            return False
+        try:
+            status = conn.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                return False
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
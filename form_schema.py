@@ -0,0 +1,153 @@
+"""
+Esquemas de formulario compilados.
+
+La estructura guardada de una plantilla es una lista de dicts
+({"Etiqueta del Campo", "Tipo de Campo", "Requerido"}). compile_schema la
+convierte una sola vez en un CompiledSchema inmutable: cada campo trae ya su
+llave de widget, su etiqueta visible, la columna del CSV de centros con que se
+pre-llena y un validador según su tipo. Lo usan el formulario del operador
+(render y validación) y database.save_submission (validación en el servidor).
+
+database.get_compiled_schema lo cachea por plantilla junto con el resto del
+caché de plantillas, así que se recompila solo cuando la plantilla cambia.
+"""
+import datetime
+
+import config
+
+
+class FormValidationError(ValueError):
+    pass
+
+
+def _make_validator(label, field_type, required):
+    """
+    Closure valor -> mensaje de error o None, especializada por tipo de campo.
+    Un valor vacío (None, texto en blanco, lista vacía) solo es error si el
+    campo es requerido; uno de tipo incorrecto siempre lo es.
+    """
+    required_msg = f"El campo '{label}' es requerido." if required else None
+    type_msg = f"El campo '{label}' no tiene un valor válido para el tipo '{field_type}'."
+
+    if field_type in ("Texto", "Área de Texto"):
+        def validate(value):
+            if value.__class__ is str:
+                return required_msg if required and not value.strip() else None
+            if value is None:
+                return required_msg
+            return type_msg
+    elif field_type == "Fecha":
+        def validate(value):
+            if value is None or (value.__class__ is str and not value.strip()):
+                return required_msg
+            if isinstance(value, datetime.date):
+                return None
+            # Texto (carga masiva, cola): solo AAAA-MM-DD de una fecha que exista;
+            # otra cosa rompería la proyección analítica
+            if value.__class__ is str and len(value) == 10:
+                try:
+                    datetime.date.fromisoformat(value)
+                    return None
+                except ValueError:
+                    pass
+            return type_msg
+    elif field_type == "Tabla Dinámica":
+        def validate(value):
+            if value is None:
+                return required_msg
+            if value.__class__ is not list or not all(isinstance(row, dict) for row in value):
+                return type_msg
+            # Filas de st.data_editor (dicts): la tabla solo está vacía si no tiene filas
+            return required_msg if not value else None
+    else:
+        accepts = {
+            "Geolocalización": dict,
+            # PNG recién dibujado o la referencia ya separada por save_submission
+            "Firma": (bytes, dict),
+            "Carga de Imagen": dict,
+        }.get(field_type, object)
+        needs_coords = field_type == "Geolocalización"
+
+        def validate(value):
+            if value is None or (value.__class__ is str and not value.strip()):
+                return required_msg
+            if not isinstance(value, accepts) or (needs_coords and ("lat" not in value or "lng" not in value)):
+                return type_msg
+            return None
+
+    return validate
+
+
+class CompiledField:
+    __slots__ = ("label", "field_type", "required", "key", "display_label",
+                 "prefill_column", "validate")
+
+    def __init__(self, label, field_type, required, prefill_column):
+        self.label = label
+        self.field_type = field_type
+        self.required = required
+        self.key = f"form_field_{label.replace(' ', '_')}"
+        self.display_label = f"{label}*" if required else label
+        self.prefill_column = prefill_column
+        self.validate = _make_validator(label, field_type, required)
+
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError(f"CompiledField es inmutable ('{name}')")
+        object.__setattr__(self, name, value)
+
+
+class CompiledSchema:
+    __slots__ = ("fields", "labels", "_prefill_pairs", "_validators")
+
+    def __init__(self, fields):
+        object.__setattr__(self, "fields", tuple(fields))
+        object.__setattr__(self, "labels", frozenset(f.label for f in self.fields))
+        object.__setattr__(self, "_prefill_pairs",
+                           tuple((f.label, f.prefill_column) for f in self.fields if f.prefill_column))
+        object.__setattr__(self, "_validators", tuple((f.label, f.validate) for f in self.fields))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledSchema es inmutable")
+
+    def __len__(self):
+        return len(self.fields)
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def prefill(self, centro):
+        """{etiqueta: valor} desde un registro de centro (CentrosRegistry.get)."""
+        if not centro:
+            return {}
+        return {label: centro[column] for label, column in self._prefill_pairs if column in centro}
+
+    def validate(self, data):
+        """(True, "") o (False, mensaje) con el primer campo inválido."""
+        get = data.get
+        for label, validate in self._validators:
+            error = validate(get(label))
+            if error:
+                return False, error
+        return True, ""
+
+    def check(self, data):
+        """Como validate, pero lanza FormValidationError."""
+        ok, error = self.validate(data)
+        if not ok:
+            raise FormValidationError(error)
+
+
+def compile_schema(structure):
+    """Compila la estructura guardada de una plantilla."""
+    form_to_csv = {label: column for column, label in config.CSV_TO_FORM_MAP.items()}
+    fields = []
+    for field in structure or []:
+        label = str(field["Etiqueta del Campo"])
+        fields.append(CompiledField(
+            label=label,
+            field_type=field["Tipo de Campo"],
+            required=bool(field.get("Requerido", False)),
+            prefill_column=form_to_csv.get(label),
+        ))
+    return CompiledSchema(fields)
@@ -54,6 +54,7 @@ os.environ["DB_URL"] = db_url
 # 2. Ahora sí importar la base de datos (después de configurar el entorno)
 try:
     import database
+    import migrations
 except ImportError as e:
     print(f"❌ Error importando database.py: {e}")
     sys.exit(1)
@@ -68,6 +69,9 @@ def run_init():
         # La conexión se prueba aquí al crear las tablas
         database.create_tables()
         print("✅ ¡Conexión exitosa y tablas creadas!")
+
+        print("\nAplicando migraciones del esquema...")
+        migrations.run_migrations()
     
     except psycopg2.OperationalError as e:
         print("="*50)
@@ -96,5 +100,125 @@ def run_init():
     print(f"Pass: {admin_pass}")
     print("\nAhora ejecuta: streamlit run app.py")
 
+def run_rebuild_stats():
+    """Recalcula las estadísticas pre-agregadas del dashboard."""
+    print("\nRecalculando estadísticas del dashboard...")
+    database.create_tables()
+    migrations.run_migrations()
+    success, msg = database.rebuild_submission_rollups()
+    print(("✅ " if success else "❌ ") + msg)
+    if not success:
+        sys.exit(1)
+
+def run_check_indexes():
+    """Verifica con EXPLAIN que las consultas principales usan sus índices."""
+    print("\nVerificando planes de consulta...")
+    migrations.run_migrations()
+    all_ok = True
+    for name, ok, used in migrations.check_query_plans():
+        all_ok = all_ok and ok
+        print(f"{'✅' if ok else '❌'} {name}: {', '.join(used) or 'sin índice'}")
+    if not all_ok:
+        sys.exit(1)
+
+def run_sync_centros():
+    """Copia datos_centros.csv a la tabla `centros` (requiere la migración opcional centros_trgm)."""
+    import config
+    import centros_data
+    if "centros_trgm" not in config.DB_OPTIONAL_MIGRATIONS:
+        print("❌ Habilita 'centros_trgm' en config.DB_OPTIONAL_MIGRATIONS para usar esta opción.")
+        sys.exit(1)
+    migrations.run_migrations()
+    df, info = centros_data.load_centros()
+    print(f"Centros leídos: {len(df)} (codificación {info['encoding']})")
+    success, msg = database.sync_centros_catalog(df)
+    print(("✅ " if success else "❌ ") + msg)
+    if not success:
+        sys.exit(1)
+
+def run_migrate_signatures():
+    """Convierte las firmas antiguas (listas de píxeles en JSONB) a PNG."""
+    print("\nConvirtiendo firmas al formato PNG...")
+    migrations.run_migrations()
+    success, msg = database.migrate_legacy_signatures()
+    print(("✅ " if success else "❌ ") + msg)
+    if not success:
+        sys.exit(1)
+
+def run_ingest(path, strict=False):
+    """Carga un lote de envíos desde un archivo JSONL (ver bulk_ingest.py)."""
+    import time
+    import bulk_ingest
+    print(f"\nCargando envíos desde {path}...")
+    records, parse_errors = bulk_ingest.read_jsonl(path)
+    start = time.perf_counter()
+    if strict and parse_errors:
+        result = {"inserted": 0, "ids": [], "duplicates": 0, "errors": []}
+    else:
+        result = bulk_ingest.ingest_submissions(records, strict=strict)
+    elapsed = time.perf_counter() - start
+    errors = sorted(parse_errors + result["errors"])
+    for line_no, msg in errors:
+        print(f"❌ Línea {line_no}: {msg}")
+    if result["inserted"]:
+        print(f"✅ {result['inserted']} envíos insertados en {elapsed:.2f} s "
+              f"({result['inserted'] / max(elapsed, 1e-9):.0f} filas/s).")
+    elif not result["duplicates"]:
+        print("❌ No se insertó ningún envío." if errors else "No hay envíos en el archivo.")
+    if result["duplicates"]:
+        print(f"ℹ️ {result['duplicates']} envíos omitidos: su submission_key ya estaba cargado.")
+    if errors:
+        sys.exit(1)
+
+def run_refresh_analytics():
+    """Actualiza las tablas analíticas por plantilla con los envíos nuevos."""
+    import analytics
+    print("\nActualizando tablas analíticas...")
+    migrations.run_migrations()
+    failed = False
+    for template_id, success, msg in analytics.refresh_all():
+        print(("✅ " if success else "❌ ") + msg)
+        failed = failed or not success
+    if failed:
+        sys.exit(1)
+
+def run_sweep_attachments():
+    """Borra los adjuntos que ningún envío (guardado o en la cola) referencia."""
+    import config
+    import attachments
+    import submission_queue
+    print("\nBuscando adjuntos sin envío...")
+    migrations.run_migrations()
+    referenced = database.get_attachment_hashes()
+    if os.path.exists(config.SUBMISSION_SPOOL_PATH):
+        spool = submission_queue.SubmissionSpool(config.SUBMISSION_SPOOL_PATH)
+        try:
+            referenced |= spool.attachment_hashes()
+        finally:
+            spool.close()
+    removed = attachments.get_store().sweep(referenced)
+    print(f"✅ {removed} archivos sin envío borrados "
+          f"(más de {config.ATTACHMENT_SWEEP_MIN_AGE // 3600} h de antigüedad).")
+
 if __name__ == "__main__":
-    run_init()
\ No newline at end of file
+    if "--rebuild-stats" in sys.argv[1:]:
+        run_rebuild_stats()
+    elif "--sweep-attachments" in sys.argv[1:]:
+        run_sweep_attachments()
+    elif "--check-indexes" in sys.argv[1:]:
+        run_check_indexes()
+    elif "--sync-centros" in sys.argv[1:]:
+        run_sync_centros()
+    elif "--migrate-signatures" in sys.argv[1:]:
+        run_migrate_signatures()
+    elif "--refresh-analytics" in sys.argv[1:]:
+        run_refresh_analytics()
+    elif "--ingest" in sys.argv[1:]:
+        args = sys.argv[1:]
+        position = args.index("--ingest")
+        if position + 1 >= len(args):
+            print("❌ Uso: python init_db.py --ingest lote.jsonl [--strict]")
+            sys.exit(1)
+        run_ingest(args[position + 1], strict="--strict" in args)
+    else:
+        run_init()
\ No newline at end of file
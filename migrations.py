@@ -0,0 +1,456 @@
+"""
+Migraciones versionadas del esquema (solo hacia adelante).
+
+`database.create_tables` crea el esquema base; las migraciones de esta lista se
+aplican después, en orden de versión, y cada una queda registrada en la tabla
+`schema_version`. Para cambiar el esquema se AGREGA una migración nueva al final;
+nunca se edita una ya publicada.
+
+Las migraciones con `optional` solo se aplican si su nombre está habilitado en
+config.DB_OPTIONAL_MIGRATIONS. Mientras estén deshabilitadas no se registran, de
+modo que al habilitarlas más tarde se aplican en la siguiente ejecución.
+"""
+import json
+
+import config
+from database import get_db_connection
+
+MIGRATIONS = [
+    {
+        "version": 1,
+        "description": "Índices para los patrones de consulta de envíos y plantillas",
+        "sql": """
+            CREATE INDEX IF NOT EXISTS idx_submissions_user_created
+                ON form_submissions (user_id, created_at DESC);
+            CREATE INDEX IF NOT EXISTS idx_submissions_created_id
+                ON form_submissions (created_at DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS idx_submissions_unreviewed
+                ON form_submissions (created_at DESC, id DESC) WHERE reviewed = FALSE;
+            CREATE INDEX IF NOT EXISTS idx_submissions_template
+                ON form_submissions (template_id);
+            CREATE INDEX IF NOT EXISTS idx_templates_area
+                ON form_templates (area_id);
+            ANALYZE form_submissions;
+            ANALYZE form_templates;
+        """,
+    },
+    {
+        "version": 2,
+        "description": "Índice GIN sobre el contenido JSONB de los envíos",
+        "optional": "data_gin_index",
+        "sql": """
+            CREATE INDEX IF NOT EXISTS idx_submissions_data_gin
+                ON form_submissions USING GIN (data jsonb_path_ops);
+        """,
+    },
+    {
+        "version": 3,
+        "description": "Catálogo de centros en la base con índice de trigramas (pg_trgm)",
+        "optional": "centros_trgm",
+        "sql": """
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+            CREATE TABLE IF NOT EXISTS centros (
+                codsaber VARCHAR(20) PRIMARY KEY,
+                centro_educativo TEXT NOT NULL,
+                nombre_normalizado TEXT NOT NULL,
+                tipo_institucion TEXT,
+                provincia TEXT,
+                canton TEXT,
+                distrito TEXT,
+                direccion TEXT,
+                latitud DOUBLE PRECISION,
+                longitud DOUBLE PRECISION
+            );
+            CREATE INDEX IF NOT EXISTS idx_centros_nombre_trgm
+                ON centros USING GIN (nombre_normalizado gin_trgm_ops);
+        """,
+    },
+    {
+        "version": 4,
+        "description": "Firmas de los envíos como PNG fuera del JSONB",
+        "sql": """
+            CREATE TABLE IF NOT EXISTS submission_signatures (
+                submission_id INTEGER NOT NULL REFERENCES form_submissions(id) ON DELETE CASCADE,
+                field_label TEXT NOT NULL,
+                image BYTEA NOT NULL,
+                mime_type VARCHAR(50) NOT NULL DEFAULT 'image/png',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (submission_id, field_label)
+            );
+        """,
+    },
+    {
+        "version": 5,
+        "description": "Adjuntos (Carga de Imagen) referenciados por hash",
+        "sql": """
+            CREATE TABLE IF NOT EXISTS submission_attachments (
+                submission_id INTEGER NOT NULL REFERENCES form_submissions(id) ON DELETE CASCADE,
+                field_label TEXT NOT NULL,
+                sha256 CHAR(64) NOT NULL,
+                filename TEXT,
+                mime_type VARCHAR(100),
+                byte_size BIGINT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (submission_id, field_label)
+            );
+            CREATE INDEX IF NOT EXISTS idx_submission_attachments_sha256
+                ON submission_attachments (sha256);
+        """,
+    },
+    {
+        "version": 6,
+        "description": "Contador de versión de áreas y plantillas para invalidar cachés",
+        "sql": """
+            CREATE TABLE IF NOT EXISTS catalog_version (
+                name VARCHAR(50) PRIMARY KEY,
+                version BIGINT NOT NULL DEFAULT 0
+            );
+            INSERT INTO catalog_version (name, version) VALUES ('templates', 0)
+                ON CONFLICT (name) DO NOTHING;
+
+            CREATE OR REPLACE FUNCTION bump_templates_version() RETURNS TRIGGER AS $$
+            BEGIN
+                UPDATE catalog_version SET version = version + 1 WHERE name = 'templates';
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            DROP TRIGGER IF EXISTS trg_form_areas_version ON form_areas;
+            CREATE TRIGGER trg_form_areas_version
+                AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON form_areas
+                FOR EACH STATEMENT EXECUTE FUNCTION bump_templates_version();
+            DROP TRIGGER IF EXISTS trg_form_templates_version ON form_templates;
+            CREATE TRIGGER trg_form_templates_version
+                AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON form_templates
+                FOR EACH STATEMENT EXECUTE FUNCTION bump_templates_version();
+        """,
+    },
+    {
+        "version": 7,
+        "description": "Catálogo de tablas analíticas por plantilla (ver analytics.py)",
+        "sql": """
+            CREATE TABLE IF NOT EXISTS analytics_tables (
+                template_id INTEGER PRIMARY KEY REFERENCES form_templates(id) ON DELETE CASCADE,
+                table_name VARCHAR(63) NOT NULL,
+                columns JSONB NOT NULL,
+                structure_hash VARCHAR(64) NOT NULL,
+                last_processed_id INTEGER NOT NULL DEFAULT 0,
+                refreshed_at TIMESTAMP
+            );
+        """,
+    },
+    {
+        "version": 8,
+        "description": "Llave de idempotencia de los envíos",
+        "sql": """
+            ALTER TABLE form_submissions ADD COLUMN IF NOT EXISTS submission_key UUID;
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_submissions_key ON form_submissions(submission_key);
+        """,
+    },
+    {
+        "version": 9,
+        "description": "Estadísticas pre-agregadas del dashboard (submission_rollups y triggers)",
+        "sql": """
+            -- Cada contador se reparte en 16 filas (slot = pid del backend mod 16)
+            -- que se suman al leer: envíos concurrentes de la misma área, plantilla
+            -- o día actualizan filas distintas en vez de hacer fila en una sola.
+            -- No hay fila de total global; el total es la suma de las filas 'area'.
+            CREATE TABLE IF NOT EXISTS submission_rollups (
+                dimension VARCHAR(20) NOT NULL,
+                dim_key TEXT NOT NULL,
+                slot SMALLINT NOT NULL DEFAULT 0,
+                submission_count BIGINT NOT NULL DEFAULT 0,
+                reviewed_count BIGINT NOT NULL DEFAULT 0,
+                PRIMARY KEY (dimension, dim_key, slot)
+            );
+
+            -- Deltas de varios envíos a la vez, agregados por contador y aplicados
+            -- en orden de llave: dos transacciones nunca bloquean filas en orden
+            -- inverso (sin interbloqueos entre cargas masivas y envíos sueltos)
+            CREATE OR REPLACE FUNCTION submission_rollup_apply(
+                p_template_ids INTEGER[], p_user_ids INTEGER[], p_created_at TIMESTAMP[],
+                p_count_deltas INTEGER[], p_reviewed_deltas INTEGER[]
+            ) RETURNS VOID AS $$
+            BEGIN
+                -- FOR SHARE: si otra transacción cambia el área de una plantilla,
+                -- esperamos a que termine para no sumar en el área vieja
+                PERFORM 1 FROM form_templates WHERE id = ANY(p_template_ids) ORDER BY id FOR SHARE;
+                INSERT INTO submission_rollups AS r (dimension, dim_key, slot, submission_count, reviewed_count)
+                SELECT k.dimension, k.dim_key, mod(pg_backend_pid(), 16),
+                       SUM(d.count_delta), SUM(d.reviewed_delta)
+                FROM unnest(p_template_ids, p_user_ids, p_created_at, p_count_deltas, p_reviewed_deltas)
+                     AS d(template_id, user_id, created_at, count_delta, reviewed_delta)
+                LEFT JOIN form_templates t ON t.id = d.template_id
+                CROSS JOIN LATERAL (VALUES
+                    ('area', COALESCE(t.area_id::text, '')),
+                    ('user', COALESCE(d.user_id::text, '')),
+                    ('template', COALESCE(d.template_id::text, '')),
+                    ('day', COALESCE(d.created_at::date::text, ''))
+                ) AS k(dimension, dim_key)
+                GROUP BY k.dimension, k.dim_key
+                HAVING SUM(d.count_delta) <> 0 OR SUM(d.reviewed_delta) <> 0
+                ORDER BY k.dimension, k.dim_key
+                ON CONFLICT (dimension, dim_key, slot) DO UPDATE
+                    SET submission_count = r.submission_count + EXCLUDED.submission_count,
+                        reviewed_count = r.reviewed_count + EXCLUDED.reviewed_count;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            -- Un disparo por sentencia con las filas afectadas (tablas de transición):
+            -- una carga masiva aplica sus deltas de una vez, no fila por fila
+            CREATE OR REPLACE FUNCTION submission_rollup_trigger() RETURNS TRIGGER AS $$
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    PERFORM submission_rollup_apply(
+                        array_agg(template_id), array_agg(user_id), array_agg(created_at),
+                        array_agg(1), array_agg(CASE WHEN COALESCE(reviewed, FALSE) THEN 1 ELSE 0 END))
+                    FROM new_rows HAVING COUNT(*) > 0;
+                ELSIF TG_OP = 'DELETE' THEN
+                    PERFORM submission_rollup_apply(
+                        array_agg(template_id), array_agg(user_id), array_agg(created_at),
+                        array_agg(-1), array_agg(CASE WHEN COALESCE(reviewed, FALSE) THEN -1 ELSE 0 END))
+                    FROM old_rows HAVING COUNT(*) > 0;
+                ELSE
+                    -- Solo las filas que cambiaron algo que se cuenta: -1 la versión vieja, +1 la nueva
+                    PERFORM submission_rollup_apply(
+                        array_agg(d.template_id), array_agg(d.user_id), array_agg(d.created_at),
+                        array_agg(d.count_delta), array_agg(d.reviewed_delta))
+                    FROM (
+                        SELECT o.template_id, o.user_id, o.created_at, -1 AS count_delta,
+                               CASE WHEN COALESCE(o.reviewed, FALSE) THEN -1 ELSE 0 END AS reviewed_delta, o.id
+                        FROM old_rows o
+                        UNION ALL
+                        SELECT n.template_id, n.user_id, n.created_at, 1,
+                               CASE WHEN COALESCE(n.reviewed, FALSE) THEN 1 ELSE 0 END, n.id
+                        FROM new_rows n
+                    ) d
+                    WHERE d.id IN (
+                        SELECT o.id FROM old_rows o JOIN new_rows n ON n.id = o.id
+                        WHERE (COALESCE(o.reviewed, FALSE), o.template_id, o.user_id, o.created_at)
+                              IS DISTINCT FROM (COALESCE(n.reviewed, FALSE), n.template_id, n.user_id, n.created_at)
+                    )
+                    HAVING COUNT(*) > 0;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            -- Las tablas de transición exigen un trigger por evento
+            DROP TRIGGER IF EXISTS trg_submission_rollups_insert ON form_submissions;
+            CREATE TRIGGER trg_submission_rollups_insert
+                AFTER INSERT ON form_submissions REFERENCING NEW TABLE AS new_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION submission_rollup_trigger();
+            DROP TRIGGER IF EXISTS trg_submission_rollups_delete ON form_submissions;
+            CREATE TRIGGER trg_submission_rollups_delete
+                AFTER DELETE ON form_submissions REFERENCING OLD TABLE AS old_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION submission_rollup_trigger();
+            DROP TRIGGER IF EXISTS trg_submission_rollups_update ON form_submissions;
+            CREATE TRIGGER trg_submission_rollups_update
+                AFTER UPDATE ON form_submissions REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION submission_rollup_trigger();
+
+            -- Al mover una plantilla de área, sus envíos pasan con ella
+            CREATE OR REPLACE FUNCTION submission_rollup_move_template() RETURNS TRIGGER AS $$
+            DECLARE
+                v_count BIGINT;
+                v_reviewed BIGINT;
+            BEGIN
+                SELECT COALESCE(SUM(submission_count), 0), COALESCE(SUM(reviewed_count), 0)
+                INTO v_count, v_reviewed
+                FROM submission_rollups WHERE dimension = 'template' AND dim_key = NEW.id::text;
+                IF v_count <> 0 OR v_reviewed <> 0 THEN
+                    INSERT INTO submission_rollups AS r (dimension, dim_key, slot, submission_count, reviewed_count)
+                    SELECT 'area', k.dim_key, mod(pg_backend_pid(), 16), k.sign * v_count, k.sign * v_reviewed
+                    FROM (VALUES (COALESCE(OLD.area_id::text, ''), -1),
+                                 (COALESCE(NEW.area_id::text, ''), 1)) AS k(dim_key, sign)
+                    ORDER BY k.dim_key
+                    ON CONFLICT (dimension, dim_key, slot) DO UPDATE
+                        SET submission_count = r.submission_count + EXCLUDED.submission_count,
+                            reviewed_count = r.reviewed_count + EXCLUDED.reviewed_count;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            DROP TRIGGER IF EXISTS trg_submission_rollups_area ON form_templates;
+            CREATE TRIGGER trg_submission_rollups_area
+                AFTER UPDATE OF area_id ON form_templates
+                FOR EACH ROW WHEN (OLD.area_id IS DISTINCT FROM NEW.area_id)
+                EXECUTE FUNCTION submission_rollup_move_template();
+
+            -- Recalcular desde cero (init_db.py --rebuild-stats); SHARE bloquea
+            -- las escrituras concurrentes mientras tanto, para no perder deltas
+            CREATE OR REPLACE FUNCTION submission_rollups_rebuild() RETURNS VOID AS $$
+            BEGIN
+                LOCK TABLE form_submissions IN SHARE MODE;
+                DELETE FROM submission_rollups;
+                INSERT INTO submission_rollups (dimension, dim_key, submission_count, reviewed_count)
+                SELECT 'area', COALESCE(t.area_id::text, ''), COUNT(*), COUNT(*) FILTER (WHERE s.reviewed)
+                FROM form_submissions s LEFT JOIN form_templates t ON s.template_id = t.id
+                GROUP BY t.area_id
+                UNION ALL
+                SELECT 'user', COALESCE(s.user_id::text, ''), COUNT(*), COUNT(*) FILTER (WHERE s.reviewed)
+                FROM form_submissions s GROUP BY s.user_id
+                UNION ALL
+                SELECT 'template', COALESCE(s.template_id::text, ''), COUNT(*), COUNT(*) FILTER (WHERE s.reviewed)
+                FROM form_submissions s GROUP BY s.template_id
+                UNION ALL
+                SELECT 'day', COALESCE(s.created_at::date::text, ''), COUNT(*), COUNT(*) FILTER (WHERE s.reviewed)
+                FROM form_submissions s GROUP BY s.created_at::date;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            SELECT submission_rollups_rebuild();
+        """,
+    },
+]
+
+# Identificador arbitrario para pg_advisory_xact_lock: evita que dos procesos
+# apliquen migraciones a la vez.
+_MIGRATION_LOCK_ID = 727001
+
+# Consultas principales y el índice que cada una debe poder usar
+QUERY_PLAN_CHECKS = [
+    {
+        "name": "Envíos de un usuario (Mis Envíos)",
+        "sql": "SELECT s.id, s.created_at FROM form_submissions s WHERE s.user_id = 1 ORDER BY s.created_at DESC",
+        "index": "idx_submissions_user_created",
+    },
+    {
+        "name": "Página de revisión (keyset)",
+        "sql": "SELECT s.id FROM form_submissions s ORDER BY s.created_at DESC, s.id DESC LIMIT 51",
+        "index": "idx_submissions_created_id",
+    },
+    {
+        "name": "Envíos pendientes de revisión",
+        "sql": "SELECT s.id FROM form_submissions s WHERE s.reviewed = FALSE ORDER BY s.created_at DESC, s.id DESC LIMIT 51",
+        "index": "idx_submissions_unreviewed",
+    },
+    {
+        "name": "Envíos de una plantilla",
+        "sql": "SELECT s.id FROM form_submissions s WHERE s.template_id = 1",
+        "index": "idx_submissions_template",
+    },
+    {
+        "name": "Plantillas de un área",
+        "sql": "SELECT id, name FROM form_templates WHERE area_id = 1 ORDER BY name",
+        "index": "idx_templates_area",
+    },
+]
+
+
+def _validate_migrations(migrations):
+    versions = [m["version"] for m in migrations]
+    if versions != sorted(versions) or len(set(versions)) != len(versions):
+        raise ValueError("Las versiones de migración deben ser únicas y estar en orden ascendente.")
+
+
+def pending_migrations(applied_versions, enabled_optional=(), migrations=None):
+    """Migraciones que faltan por aplicar, en orden."""
+    migrations = MIGRATIONS if migrations is None else migrations
+    _validate_migrations(migrations)
+    applied = set(applied_versions)
+    return [
+        m for m in migrations
+        if m["version"] not in applied
+        and (not m.get("optional") or m["optional"] in enabled_optional)
+    ]
+
+
+def run_migrations():
+    """Aplica las migraciones pendientes. Retorna la lista de versiones aplicadas."""
+    applied_now = []
+    with get_db_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_version (
+                        version INTEGER PRIMARY KEY,
+                        description TEXT NOT NULL,
+                        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    );
+                """)
+                cur.execute("SELECT pg_advisory_xact_lock(%s)", (_MIGRATION_LOCK_ID,))
+                cur.execute("SELECT version FROM schema_version")
+                applied = [row[0] for row in cur.fetchall()]
+
+                for migration in pending_migrations(applied, config.DB_OPTIONAL_MIGRATIONS):
+                    cur.execute(migration["sql"])
+                    cur.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                                (migration["version"], migration["description"]))
+                    applied_now.append(migration["version"])
+                    print(f"✅ Migración {migration['version']} aplicada: {migration['description']}")
+            # Todas en una transacción: si una falla, no queda el esquema a medias
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    if not applied_now:
+        print("✅ Esquema al día, no hay migraciones pendientes.")
+    return applied_now
+
+
+def get_pending_migrations():
+    """Migraciones que la base aún no tiene (sin aplicarlas); las revisa app.py al iniciar."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('schema_version')")
+            if cur.fetchone()[0] is None:
+                applied = []
+            else:
+                cur.execute("SELECT version FROM schema_version")
+                applied = [row[0] for row in cur.fetchall()]
+    return pending_migrations(applied, config.DB_OPTIONAL_MIGRATIONS)
+
+
+def get_schema_version():
+    """Última versión aplicada (0 si no hay ninguna)."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('schema_version')")
+            if cur.fetchone()[0] is None:
+                return 0
+            cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+            return cur.fetchone()[0]
+
+
+def _plan_index_names(plan):
+    """Nombres de índices usados en un plan de EXPLAIN (FORMAT JSON)."""
+    names = set()
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict):
+            if "Index Name" in node:
+                names.add(node["Index Name"])
+            stack.extend(v for v in node.values() if isinstance(v, (dict, list)))
+    return names
+
+
+def check_query_plans(checks=None):
+    """
+    Ejecuta EXPLAIN sobre las consultas principales y verifica que usen su índice.
+
+    Se desactiva el seq scan dentro de la transacción: con tablas pequeñas el
+    planificador prefiere recorrerlas completas, y lo que interesa comprobar es
+    que exista un índice aplicable. Retorna [(nombre, ok, índices_usados)].
+    """
+    checks = QUERY_PLAN_CHECKS if checks is None else checks
+    results = []
+    with get_db_connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SET LOCAL enable_seqscan = off")
+                for check in checks:
+                    cur.execute("EXPLAIN (FORMAT JSON) " + check["sql"])
+                    plan = cur.fetchone()[0]
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    used = _plan_index_names(plan)
+                    results.append((check["name"], check["index"] in used, sorted(used)))
+        finally:
+            conn.rollback()
+    return results
@@ -3,40 +3,39 @@ import pandas as pd
 import database
 import config
 import json
+import uuid
+import centros_view
+import signatures
+import attachments
+import submission_view
+import submission_queue
+import rerun_profiler
 from streamlit_folium import st_folium
 from streamlit_drawable_canvas import st_canvas
 
-# --- LÓGICA DE PRE-LLENADO ---
-# Mapeo de columnas CSV a etiquetas de formulario ESPERADAS
-CSV_TO_FORM_MAP = config.CSV_TO_FORM_MAP
-
-def _render_form_from_structure(structure):
-    """Función interna para dibujar el formulario dinámico."""
+def _render_form_from_structure(schema):
+    """
+    Función interna para dibujar el formulario dinámico desde su esquema compilado.
+    Retorna (form_data, uploads): los archivos subidos van aparte, {etiqueta: UploadedFile},
+    y se guardan en el almacén solo al enviar (ver _store_uploads).
+    """
     form_data = {}
+    uploads = {}
     
     # --- LÓGICA DE PRE-LLENADO ---
-    prefill_data = {}
-    if "centro_adjunto" in st.session_state and st.session_state.centro_adjunto:
-        # Invertir el mapa para buscar fácilmente por la etiqueta del formulario
-        FORM_TO_CSV_MAP = {v: k for k, v in CSV_TO_FORM_MAP.items()}
-        
-        for form_label, csv_col in FORM_TO_CSV_MAP.items():
-            if csv_col in st.session_state.centro_adjunto:
-                prefill_data[form_label] = st.session_state.centro_adjunto[csv_col]
+    # centro_adjunto es el registro completo (CentrosRegistry.get); el esquema ya
+    # sabe qué columna del CSV corresponde a cada campo
+    prefill_data = schema.prefill(st.session_state.get("centro_adjunto"))
     # --- FIN LÓGICA PRE-LLENADO ---
 
-    for field in structure:
-        label = field["Etiqueta del Campo"]
-        field_type = field["Tipo de Campo"]
-        required = field["Requerido"]
-        
-        field_key = f"form_field_{label.replace(' ', '_')}" # Clave única
+    for field in schema:
+        label = field.label
+        field_type = field.field_type
+        field_key = field.key
+        display_label = field.display_label
         
         # Obtener el valor por defecto del diccionario prefill_data
         default_value = prefill_data.get(label, None)
-        
-        # Add a visual indicator for required fields
-        display_label = f"{label}*" if required else label
 
         if field_type == "Texto":
             value = st.text_input(display_label, value=default_value or "", key=field_key)
@@ -79,46 +78,203 @@ def _render_form_from_structure(structure):
                 drawing_mode="freedraw",
                 key=field_key
             )
-            if canvas_result.image_data is not None:
-                form_data[label] = canvas_result.image_data.tolist() 
-            else:
-                form_data[label] = None
+            # PNG comprimido (None si el lienzo está vacío); save_submission lo
+            # guarda fuera del JSON del envío
+            form_data[label] = signatures.encode_signature(canvas_result.image_data)
         
         elif field_type == "Carga de Imagen":
             st.subheader(display_label)
             uploaded_file = st.file_uploader(display_label, type=["png", "jpg", "jpeg"], key=field_key)
+            form_data[label] = None
             if uploaded_file:
-                form_data[label] = uploaded_file.name
-            else:
-                form_data[label] = None
+                # Por ahora solo los metadatos (para validar); el archivo se copia
+                # al almacén cuando el envío ya pasó la validación
+                uploads[label] = uploaded_file
+                form_data[label] = {"nombre": uploaded_file.name, "tipo": uploaded_file.type,
+                                    "bytes": uploaded_file.size}
                 
-    return form_data
-
-def _validate_form(form_data, structure):
-    """Checks if all required fields are filled."""
-    for field in structure:
-        if field["Requerido"]:
-            label = field["Etiqueta del Campo"]
-            value = form_data.get(label)
-            
-            # Verificar si el valor está vacío
-            if value is None:
-                return False, f"El campo '{label}' es requerido."
-            
-            # Para strings, verificar que no esté solo whitespace
-            if isinstance(value, str):
-                if not value.strip():
-                    return False, f"El campo '{label}' es requerido."
-            
-            # Para listas (tabla dinámica), verificar que no esté vacía
-            if isinstance(value, list):
-                if len(value) == 0 or all(not str(item).strip() for item in value):
-                    return False, f"El campo '{label}' es requerido."
-    
-    return True, ""
+    return form_data, uploads
+
+
+def _store_uploads(form_data, uploads):
+    """
+    Copia por bloques al almacén de adjuntos los archivos de un envío ya validado
+    y deja sus referencias en form_data. Revisa todos los tamaños antes de guardar
+    el primero, para no dejar archivos huérfanos si se rechaza otro.
+    """
+    store = attachments.get_store()
+    for uploaded_file in uploads.values():
+        store.check_size(uploaded_file.size, uploaded_file.name)
+    for label, uploaded_file in uploads.items():
+        form_data[label] = store.put_uploaded_file(uploaded_file)
+
+
+def _remember_fragment_profile(profile):
+    # Un fragmento no puede dibujar en la barra lateral: solo queda en el
+    # historial, que app.show_rerun_profile muestra en el siguiente rerun completo
+    rerun_profiler.remember(st.session_state.setdefault("rerun_profiles", []), profile)
+
+
+@st.fragment
+def _fill_form_section():
+    """
+    Pasos 1 y 2: área y formulario. Es un fragmento: cambiar de área o de
+    formulario reejecuta solo esta función (y el formulario que contiene), no
+    el buscador de centros ni el historial de envíos.
+    """
+    with rerun_profiler.fragment("Selección de formulario", on_finish=_remember_fragment_profile):
+        try:
+            # Paso 1: Seleccionar Área
+            st.subheader("Paso 1️⃣: Selecciona el Área")
+            areas_list = database.get_all_areas()
+            area_options = {area['id']: area['name'] for area in areas_list}
+
+            if not area_options:
+                st.warning("⚠️ No hay formularios disponibles. Contacta al administrador.")
+                return
+
+            selected_area_id = st.selectbox(
+                "Selecciona un área:",
+                options=area_options.keys(),
+                format_func=lambda x: area_options[x],
+                key="area_select"
+            )
+
+            # Paso 2: Seleccionar Plantilla
+            st.subheader("Paso 2️⃣: Selecciona el Formulario")
+            template_list = database.get_templates_by_area(selected_area_id)
+            template_options = {t['id']: t['name'] for t in template_list}
+
+            if not template_options:
+                st.info("ℹ️ No hay formularios disponibles en esta área.")
+                return
+
+            selected_template_id = st.selectbox(
+                "Selecciona un formulario:",
+                options=template_options.keys(),
+                format_func=lambda x: template_options[x],
+                key="template_select"
+            )
+        except Exception as e:
+            st.error(f"❌ Error cargando formularios: {str(e)[:100]}")
+            return
+
+        _dynamic_form(selected_template_id, template_options[selected_template_id],
+                      area_options[selected_area_id])
+
+
+@st.fragment
+def _dynamic_form(template_id, template_name, area_name):
+    """
+    Paso 3: el formulario de la plantilla elegida. Fragmento anidado: escribir,
+    dibujar la firma, marcar el mapa, subir una imagen o enviar reejecuta solo
+    esta función; la lista de áreas y plantillas no se vuelve a consultar.
+    """
+    with rerun_profiler.fragment("Formulario", on_finish=_remember_fragment_profile):
+        # Mostrar si hay un centro adjunto
+        if "centro_adjunto" in st.session_state and st.session_state.centro_adjunto:
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                centro_nombre = st.session_state.centro_adjunto['CENTRO_EDUCATIVO']
+                st.info(f"✅ Centro Adjunto: **{centro_nombre}**")
+                st.write("*Los datos se pre-llenarán automáticamente en los campos correspondientes.*")
+            with col2:
+                if st.button("❌ Quitar", key="remove_centro"):
+                    st.session_state.centro_adjunto = None
+                    st.rerun(scope="fragment")
+
+        st.divider()
+        st.subheader("Paso 3️⃣: Completa el Formulario")
+
+        try:
+            # Esquema compilado y cacheado por plantilla (ver form_schema.py)
+            form_schema = database.get_compiled_schema(template_id)
+        except Exception as e:
+            st.error(f"❌ Error cargando formularios: {str(e)[:100]}")
+            return
+        if not form_schema:
+            st.error("❌ No se pudo cargar la estructura de este formulario.")
+            return
+
+        # Mostrar información del formulario
+        with st.expander("📋 Ver información del formulario", expanded=False):
+            st.write(f"**Nombre**: {template_name}")
+            st.write(f"**Área**: {area_name}")
+            st.write(f"**Campos**: {len(form_schema)}")
+            for i, field in enumerate(form_schema, 1):
+                req = "✅ Requerido" if field.required else "⭕ Opcional"
+                st.write(f"{i}. {field.label} ({field.field_type}) - {req}")
+
+        # Llave de idempotencia del formulario en pantalla: se mantiene en los
+        # reruns (doble clic, reintento tras un commit lento) y se renueva
+        # solo después de un envío exitoso
+        if "submission_key" not in st.session_state:
+            st.session_state.submission_key = str(uuid.uuid4())
+        submission_key = st.session_state.submission_key
+
+        with st.form("dynamic_form", clear_on_submit=True):
+            # Renderizar todos los campos
+            form_data, uploads = _render_form_from_structure(form_schema)
+
+            col1, col2 = st.columns(2)
+            with col1:
+                submitted = st.form_submit_button("✅ Enviar Formulario", use_container_width=True)
+            with col2:
+                st.form_submit_button("🔄 Limpiar Formulario", use_container_width=True)
+
+            if submitted:
+                is_valid, error_message = form_schema.validate(form_data)
+                if is_valid:
+                    try:
+                        _store_uploads(form_data, uploads)
+                        if config.SUBMISSION_QUEUE_ENABLED:
+                            # Al spool local; el worker lo guarda en la base en segundo plano
+                            submission_queue.get_queue().enqueue(
+                                template_id,
+                                st.session_state["user_id"],
+                                form_data,
+                                submission_key=submission_key
+                            )
+                        else:
+                            database.save_submission(
+                                template_id,
+                                st.session_state["user_id"],
+                                form_data,
+                                submission_key=submission_key
+                            )
+                        # Envío aceptado: el siguiente formulario lleva una llave nueva
+                        st.session_state.submission_key = str(uuid.uuid4())
+                        st.success("✅ ¡Formulario enviado con éxito!")
+                        st.balloons()
 
+                        # Limpiar el centro adjunto después de un envío exitoso
+                        if "centro_adjunto" in st.session_state:
+                            st.session_state.centro_adjunto = None
 
-def show_ui(df_centros):
+                        # Mostrar resumen
+                        with st.expander("📋 Ver resumen del envío"):
+                            st.write(f"**Formulario**: {template_name}")
+                            st.write(f"**Área**: {area_name}")
+                            st.write(f"**Hora**: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                            st.write("**Datos enviados:**")
+                            for key, value in form_data.items():
+                                if isinstance(value, bytes):
+                                    st.write(f"- {key}: 🖊️ Firma registrada ({len(value) / 1024:.1f} KB)")
+                                elif attachments.is_reference(value):
+                                    st.write(f"- {key}: 📎 {value['nombre']} ({value['bytes'] / 1024:.0f} KB)")
+                                elif value and str(value) != '[]':
+                                    st.write(f"- {key}: {str(value)[:100]}")
+
+                        st.info("💡 Puedes seguir completando más formularios o ir a 'Mis Envíos' para ver tu historial.")
+                    except attachments.AttachmentTooLargeError as e:
+                        st.error(f"❌ {e}")
+                    except Exception as e:
+                        st.error(f"❌ Error al guardar el envío: {str(e)[:100]}")
+                else:
+                    st.error(f"❌ {error_message}")
+
+
+def show_ui(centros, centros_index, geo_index, registry):
     st.title(f"Panel de Operador - {st.session_state.get('full_name', 'Usuario')}")
     
     tab_buscador, tab_fill_form, tab_my_submissions = st.tabs([
@@ -128,7 +284,7 @@ def show_ui(df_centros):
     ])
     
     # --- 1. BUSCADOR DE CENTROS (CON LÓGICA DE ADJUNTAR) ---
-    with tab_buscador:
+    with tab_buscador, rerun_profiler.section("Buscador de Centros"):
         st.header("🔎 Consulta de Centros Educativos")
         
         # Filtros
@@ -137,178 +293,68 @@ def show_ui(df_centros):
             search_term = st.text_input("🔍 Buscar centro:", placeholder="Ej: Científico")
         with col2:
             provincia_filter = st.selectbox("📍 Provincia:", 
-                                           ["Todas"] + sorted(df_centros['PROVINCIA'].unique().tolist()),
+                                           ["Todas"] + registry.provincias,
                                            key="op_prov")
         with col3:
             tipo_filter = st.selectbox("🏢 Tipo:",
-                                      ["Todos"] + sorted(df_centros['TIPO_INSTITUCION'].unique().tolist()),
+                                      ["Todos"] + registry.tipos,
                                       key="op_tipo")
         
-        # Aplicar filtros
-        df_filtered = df_centros.copy()
-        
-        if search_term:
-            df_filtered = df_filtered[
-                df_filtered['CENTRO_EDUCATIVO'].str.contains(search_term, case=False, na=False)
-            ]
+        fuzzy_search = st.checkbox("🔤 Tolerar errores de escritura (búsqueda aproximada)", key="op_fuzzy")
         
-        if provincia_filter != "Todas":
-            df_filtered = df_filtered[df_filtered['PROVINCIA'] == provincia_filter]
-        
-        if tipo_filter != "Todos":
-            df_filtered = df_filtered[df_filtered['TIPO_INSTITUCION'] == tipo_filter]
+        # Aplicar filtros: posiciones de fila sobre el catálogo compartido, sin copiarlo
+        positions, similarity = centros.select(
+            centros_index,
+            search_term=search_term,
+            provincia=provincia_filter if provincia_filter != "Todas" else None,
+            tipo=tipo_filter if tipo_filter != "Todos" else None,
+            fuzzy=fuzzy_search
+        )
         
-        st.info(f"📊 Resultados: {len(df_filtered)} de {len(df_centros)} centros")
-        st.dataframe(df_filtered, use_container_width=True, height=300)
+        st.info(f"📊 Resultados: {len(positions)} de {len(centros)} centros")
+        st.dataframe(centros.take(positions, similarity), use_container_width=True, height=300)
         
         st.divider()
         st.subheader("📎 Adjuntar Centro a mi Formulario")
         st.write("Seleccione un centro para pre-llenar sus datos automáticamente.")
 
-        lista_nombres_centros = sorted(df_centros['CENTRO_EDUCATIVO'].unique().tolist())
-
-        centro_para_adjuntar = st.selectbox(
+        # Opciones por CODSABER: el nombre no es único
+        codigo_para_adjuntar = st.selectbox(
             "Seleccione el centro que desea usar:",
-            options=lista_nombres_centros,
+            options=registry.attach_options,
+            format_func=registry.label,
             index=None,
             placeholder="Escriba o seleccione un centro...",
             key="operator_attach_selectbox"
         )
 
         if st.button("✅ Adjuntar Centro", key="btn_adjuntar_operator"):
-            if centro_para_adjuntar:
-                datos_centro_seleccionado = df_centros[
-                    df_centros['CENTRO_EDUCATIVO'] == centro_para_adjuntar
-                ].iloc[0]
+            if codigo_para_adjuntar:
+                datos_centro_seleccionado = registry.get(codigo_para_adjuntar)
                 
-                st.session_state.centro_adjunto = datos_centro_seleccionado.to_dict()
+                st.session_state.centro_adjunto = datos_centro_seleccionado
                 
-                st.success(f"✅ Centro '{centro_para_adjuntar}' adjuntado exitosamente!")
+                st.success(f"✅ Centro '{datos_centro_seleccionado['CENTRO_EDUCATIVO']}' adjuntado exitosamente!")
                 st.info("💡 Los datos aparecerán pre-llenados en el siguiente formulario.")
                 
                 with st.expander("👁️ Ver detalles del centro"):
                     cols_to_show = ['CENTRO_EDUCATIVO', 'PROVINCIA', 'CANTON', 'DISTRITO', 'DIRECCION', 'CODSABER']
                     for col in cols_to_show:
-                        if col in datos_centro_seleccionado.index:
+                        if col in datos_centro_seleccionado:
                             st.write(f"**{col}**: {datos_centro_seleccionado[col]}")
             else:
                 st.warning("⚠️ Por favor, seleccione un centro.")
 
+        st.divider()
+        centros_view.render_nearest_centers(registry, geo_index, key_prefix="op")
+
     # --- 2. LLENAR FORMULARIO ---
-    with tab_fill_form:
+    with tab_fill_form, rerun_profiler.section("Llenar Formulario"):
         st.header("📝 Llenar Nuevo Formulario")
-        
-        # Mostrar si hay un centro adjunto
-        if "centro_adjunto" in st.session_state and st.session_state.centro_adjunto:
-            col1, col2 = st.columns([4, 1])
-            with col1:
-                centro_nombre = st.session_state.centro_adjunto['CENTRO_EDUCATIVO']
-                st.info(f"✅ Centro Adjunto: **{centro_nombre}**")
-                st.write("*Los datos se pre-llenarán automáticamente en los campos correspondientes.*")
-            with col2:
-                if st.button("❌ Quitar", key="remove_centro"):
-                    st.session_state.centro_adjunto = None
-                    st.rerun()
-            st.divider()
-        
-        try:
-            # Paso 1: Seleccionar Área
-            st.subheader("Paso 1️⃣: Selecciona el Área")
-            areas_list = database.get_all_areas()
-            area_options = {area['id']: area['name'] for area in areas_list}
-            
-            if not area_options:
-                st.warning("⚠️ No hay formularios disponibles. Contacta al administrador.")
-                st.stop()
-            
-            selected_area_id = st.selectbox(
-                "Selecciona un área:",
-                options=area_options.keys(),
-                format_func=lambda x: area_options[x],
-                key="area_select"
-            )
-            
-            # Paso 2: Seleccionar Plantilla
-            st.subheader("Paso 2️⃣: Selecciona el Formulario")
-            template_list = database.get_templates_by_area(selected_area_id)
-            template_options = {t['id']: t['name'] for t in template_list}
-            
-            if not template_options:
-                st.info("ℹ️ No hay formularios disponibles en esta área.")
-                st.stop()
-            
-            selected_template_id = st.selectbox(
-                "Selecciona un formulario:",
-                options=template_options.keys(),
-                format_func=lambda x: template_options[x],
-                key="template_select"
-            )
-            
-            # Paso 3: Renderizar el formulario
-            st.divider()
-            st.subheader("Paso 3️⃣: Completa el Formulario")
-            
-            form_structure = database.get_template_structure(selected_template_id)
-            if not form_structure:
-                st.error("❌ No se pudo cargar la estructura de este formulario.")
-                st.stop()
-            
-            # Mostrar información del formulario
-            with st.expander("📋 Ver información del formulario", expanded=False):
-                st.write(f"**Nombre**: {template_options[selected_template_id]}")
-                st.write(f"**Área**: {area_options[selected_area_id]}")
-                st.write(f"**Campos**: {len(form_structure)}")
-                for i, field in enumerate(form_structure, 1):
-                    req = "✅ Requerido" if field.get("Requerido", False) else "⭕ Opcional"
-                    st.write(f"{i}. {field['Etiqueta del Campo']} ({field['Tipo de Campo']}) - {req}")
-                
-            with st.form("dynamic_form", clear_on_submit=True):
-                # Renderizar todos los campos
-                form_data = _render_form_from_structure(form_structure)
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    submitted = st.form_submit_button("✅ Enviar Formulario", use_container_width=True)
-                with col2:
-                    st.form_submit_button("🔄 Limpiar Formulario", use_container_width=True)
-                
-                if submitted:
-                    is_valid, error_message = _validate_form(form_data, form_structure)
-                    if is_valid:
-                        try:
-                            database.save_submission(
-                                selected_template_id,
-                                st.session_state["user_id"],
-                                form_data
-                            )
-                            st.success("✅ ¡Formulario enviado con éxito!")
-                            st.balloons()
-                            
-                            # Limpiar el centro adjunto después de un envío exitoso
-                            if "centro_adjunto" in st.session_state:
-                                st.session_state.centro_adjunto = None
-                            
-                            # Mostrar resumen
-                            with st.expander("📋 Ver resumen del envío"):
-                                st.write(f"**Formulario**: {template_options[selected_template_id]}")
-                                st.write(f"**Área**: {area_options[selected_area_id]}")
-                                st.write(f"**Hora**: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                                st.write("**Datos enviados:**")
-                                for key, value in form_data.items():
-                                    if value and str(value) != '[]':
-                                        st.write(f"- {key}: {str(value)[:100]}")
-                            
-                            st.info("💡 Puedes seguir completando más formularios o ir a 'Mis Envíos' para ver tu historial.")
-                        except Exception as e:
-                            st.error(f"❌ Error al guardar el envío: {str(e)[:100]}")
-                    else:
-                        st.error(f"❌ {error_message}")
-
-        except Exception as e:
-            st.error(f"❌ Error cargando formularios: {str(e)[:100]}")
+        _fill_form_section()
 
     # --- 3. MIS ENVÍOS ---
-    with tab_my_submissions:
+    with tab_my_submissions, rerun_profiler.section("Mis Envíos"):
         st.header("📋 Historial de Mis Envíos")
         
         try:
@@ -330,14 +376,16 @@ def show_ui(df_centros):
                     st.write("• Verifica tus datos antes de enviar")
             else:
                 # Estadísticas
+                with rerun_profiler.section("estadísticas de envíos", kind="df"):
+                    last_24h = len(my_submissions_df[my_submissions_df['created_at'] > pd.Timestamp.now() - pd.Timedelta(days=1)])
+                    form_count = my_submissions_df['name'].nunique()
                 col1, col2, col3 = st.columns(3)
                 with col1:
                     st.metric("📝 Total de Envíos", len(my_submissions_df))
                 with col2:
-                    st.metric("📅 Últimas 24h", 
-                             len(my_submissions_df[my_submissions_df['created_at'] > pd.Timestamp.now() - pd.Timedelta(days=1)]))
+                    st.metric("📅 Últimas 24h", last_24h)
                 with col3:
-                    st.metric("📋 Formularios Diferentes", my_submissions_df['name'].nunique())
+                    st.metric("📋 Formularios Diferentes", form_count)
                 
                 st.divider()
                 
@@ -357,11 +405,13 @@ def show_ui(df_centros):
                 # Mostrar tabla
                 st.subheader(f"Mostrando {len(df_filtered)} envíos")
                 
-                # Crear vista mejorada sin la columna 'data'
-                display_df = df_filtered.drop(columns=['data']).copy()
-                display_df['created_at'] = pd.to_datetime(display_df['created_at']).dt.strftime('%Y-%m-%d %H:%M')
+                # La consulta de listado ya no trae la columna 'data'
+                with rerun_profiler.section("formatear historial", kind="df"):
+                    display_df = df_filtered.copy()
+                    display_df['created_at'] = pd.to_datetime(display_df['created_at']).dt.strftime('%Y-%m-%d %H:%M')
                 
-                st.dataframe(display_df, use_container_width=True, hide_index=True, height=300)
+                with rerun_profiler.section("tabla de historial", kind="render"):
+                    st.dataframe(display_df, use_container_width=True, hide_index=True, height=300)
                 
                 # Opción para ver detalles
                 st.subheader("👁️ Ver Detalles de un Envío")
@@ -372,24 +422,16 @@ def show_ui(df_centros):
                         format_func=lambda x: f"Envío {x} - {df_filtered[df_filtered['id']==x]['name'].values[0]}"
                     )
                     
-                    submission_data = df_filtered[df_filtered['id'] == selected_id]['data'].iloc[0]
-                    
-                    with st.expander("📄 Mostrar todos los datos del envío"):
-                        if isinstance(submission_data, str):
-                            import json
-                            submission_data = json.loads(submission_data)
+                    # El contenido del envío solo se consulta cuando se pide verlo
+                    if st.toggle("📄 Mostrar todos los datos del envío", key=f"my_show_data_{selected_id}"):
+                        submission_data = database.get_submission_payload(selected_id) or {}
                         
-                        for key, value in submission_data.items():
-                            st.write(f"**{key}**: {value}")
+                        submission_view.render_submission_payload(selected_id, submission_data, key_prefix="my")
                 
-                # Descargar datos
-                csv_download = display_df.to_csv(index=False)
-                st.download_button(
-                    label="📥 Descargar mis envíos como CSV",
-                    data=csv_download,
-                    file_name=f"mis_envios_{st.session_state['username']}.csv",
-                    mime="text/csv"
-                )
+                # Descargar datos (con una columna por campo del formulario)
+                submission_view.render_export({"user_ids": [st.session_state["user_id"]]},
+                                              file_stem=f"mis_envios_{st.session_state['username']}",
+                                              key_prefix="my")
                 
         except Exception as e:
             st.error(f"❌ Error al cargar tus envíos: {str(e)[:100]}")
\ No newline at end of file
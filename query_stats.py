@@ -0,0 +1,321 @@
+"""
+Instrumentación de las consultas a la base de datos.
+
+Cada bloque `with database.get_db_connection() as conn:` es una medición con
+el nombre de la función que lo abre (p. ej. "db_helpers.get_submissions_page"),
+así que todas las funciones de database.py, db_helpers.py y los demás módulos
+quedan medidas sin decorarlas una por una. Por bloque se registra:
+
+- tiempo total (incluye la espera por una conexión del pool),
+- tiempo en la base: execute + fetch del cursor (InstrumentedCursor, que el
+  pool instala como cursor_factory),
+- conversión: el resto del bloque, es decir pandas (read_sql), json y Python,
+- filas y bytes leídos (aproximados: largo de textos y binarios, 8 bytes por
+  cualquier otro valor) y número de sentencias.
+
+Los tiempos totales van a histogramas por función. Las sentencias que superan
+config.SLOW_QUERY_MS quedan en un registro acotado con el SQL y la forma de
+sus parámetros (tipos y largos, nunca los valores).
+
+Con config.QUERY_STATS_ENABLED = False el pool usa cursores normales y
+get_db_connection no envuelve nada: el costo es cero.
+"""
+import bisect
+import collections
+import contextvars
+import datetime
+import json
+import logging
+import sys
+import threading
+import time
+
+import psycopg2.extensions
+from psycopg2 import sql
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Límite superior (ms) de cada bucket; el último bucket es "más de 10 s"
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+_BUCKET_LABELS = [f"<={b}" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}"]
+
+
+class Histogram:
+    """Histograma de latencias con buckets fijos (ms)."""
+
+    __slots__ = ("counts", "count", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, p):
+        """Límite superior del bucket que contiene el percentil p (0-100)."""
+        if not self.count:
+            return 0.0
+        target = self.count * p / 100.0
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target and n:
+                return float(BUCKETS_MS[i]) if i < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": {label: n for label, n in zip(_BUCKET_LABELS, self.counts) if n},
+        }
+
+
+class _FunctionStats:
+    __slots__ = ("wall", "db_ms", "convert_ms", "rows", "bytes", "queries", "errors")
+
+    def __init__(self):
+        self.wall = Histogram()
+        self.db_ms = 0.0
+        self.convert_ms = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.queries = 0
+        self.errors = 0
+
+
+class _Scope:
+    """Acumulador de la medición en curso (uno por bloque get_db_connection)."""
+
+    __slots__ = ("name", "db_s", "rows", "bytes", "queries")
+
+    def __init__(self, name):
+        self.name = name
+        self.db_s = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.queries = 0
+
+
+_current_scope = contextvars.ContextVar("query_stats_scope", default=None)
+
+
+def params_shape(params):
+    """Tipos (y largos de listas) de los parámetros, sin sus valores."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {k: params_shape(v) if isinstance(v, (list, tuple)) else type(v).__name__
+                for k, v in params.items()}
+    if isinstance(params, (list, tuple)):
+        if len(params) > 10:
+            return f"{type(params).__name__}[{len(params)}]"
+        return [params_shape(v) if isinstance(v, (list, tuple, dict)) else type(v).__name__ for v in params]
+    return type(params).__name__
+
+
+def _row_bytes(rows):
+    total = 0
+    for row in rows:
+        for value in row:
+            if value is None:
+                continue
+            if isinstance(value, (str, bytes, bytearray, memoryview)):
+                total += len(value)
+            else:
+                total += 8
+    return total
+
+
+class QueryStats:
+    """Registro en proceso de las mediciones, seguro entre hilos."""
+
+    def __init__(self, slow_query_ms=None, slow_log_size=None):
+        self.slow_query_ms = config.SLOW_QUERY_MS if slow_query_ms is None else slow_query_ms
+        self._lock = threading.Lock()
+        self._functions = collections.defaultdict(_FunctionStats)
+        self._slow = collections.deque(maxlen=slow_log_size or config.SLOW_QUERY_LOG_SIZE)
+        self._since = datetime.datetime.now()
+
+    def record(self, name, wall_s, db_s, rows, nbytes, queries, error=False):
+        wall_ms = wall_s * 1000
+        db_ms = min(db_s * 1000, wall_ms)
+        with self._lock:
+            stats = self._functions[name]
+            stats.wall.add(wall_ms)
+            stats.db_ms += db_ms
+            stats.convert_ms += wall_ms - db_ms
+            stats.rows += rows
+            stats.bytes += nbytes
+            stats.queries += queries
+            stats.errors += bool(error)
+
+    def record_slow(self, name, query, params, ms):
+        entry = {
+            "at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "function": name,
+            "ms": round(ms, 1),
+            "sql": " ".join(str(query).split())[:1000],
+            "params": params_shape(params),
+        }
+        with self._lock:
+            self._slow.append(entry)
+        logger.warning("Consulta lenta (%.0f ms) en %s: %s", ms, name, entry["sql"][:200])
+
+    def snapshot(self):
+        """Dict serializable con todas las mediciones desde el último reset."""
+        with self._lock:
+            functions = {}
+            for name, stats in self._functions.items():
+                functions[name] = {
+                    "calls": stats.wall.count,
+                    "wall": stats.wall.to_dict(),
+                    "db_ms_total": round(stats.db_ms, 3),
+                    "convert_ms_total": round(stats.convert_ms, 3),
+                    "rows_total": stats.rows,
+                    "bytes_total": stats.bytes,
+                    "queries_total": stats.queries,
+                    "errors": stats.errors,
+                }
+            slow = list(self._slow)
+        return {
+            "since": self._since.isoformat(timespec="seconds"),
+            "generated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "slow_query_ms": self.slow_query_ms,
+            "functions": functions,
+            "slow_queries": slow,
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def reset(self):
+        with self._lock:
+            self._functions.clear()
+            self._slow.clear()
+            self._since = datetime.datetime.now()
+
+
+_stats = QueryStats()
+_listeners = []
+
+
+def get_stats():
+    return _stats
+
+
+def add_listener(listener):
+    """listener(nombre, segundos) se llama al cerrar cada bloque medido (ver rerun_profiler.py)."""
+    _listeners.append(listener)
+
+
+def caller_name(depth=2):
+    """'módulo.función' de quien llamó a la función que llama a caller_name."""
+    frame = sys._getframe(depth)
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+
+
+class measure:
+    """
+    Context manager que mide un bloque envolviendo otro context manager (la
+    conexión del pool): `with measure(nombre, pool.connection()) as conn:`.
+    """
+
+    __slots__ = ("_name", "_inner", "_scope", "_token", "_start")
+
+    def __init__(self, name, inner):
+        self._name = name
+        self._inner = inner
+
+    def __enter__(self):
+        self._scope = _Scope(self._name)
+        self._token = _current_scope.set(self._scope)
+        self._start = time.perf_counter()
+        try:
+            return self._inner.__enter__()
+        except BaseException:
+            _current_scope.reset(self._token)
+            raise
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            return self._inner.__exit__(exc_type, exc, tb)
+        finally:
+            wall = time.perf_counter() - self._start
+            _current_scope.reset(self._token)
+            scope = self._scope
+            _stats.record(scope.name, wall, scope.db_s, scope.rows, scope.bytes, scope.queries,
+                          error=exc_type is not None)
+            for listener in _listeners:
+                listener(scope.name, wall)
+
+
+class InstrumentedCursor(psycopg2.extensions.cursor):
+    """Cursor que suma al bloque en curso el tiempo de execute/fetch, filas y bytes."""
+
+    def _timed_execute(self, method, query, params):
+        start = time.perf_counter()
+        try:
+            return method(query, params)
+        finally:
+            elapsed = time.perf_counter() - start
+            scope = _current_scope.get()
+            if scope is not None:
+                scope.db_s += elapsed
+                scope.queries += 1
+            if elapsed * 1000 >= _stats.slow_query_ms:
+                if isinstance(query, sql.Composable):
+                    query = query.as_string(self)
+                elif isinstance(query, bytes):
+                    query = query.decode("utf-8", "replace")
+                _stats.record_slow(scope.name if scope else caller_name(3), query, params, elapsed * 1000)
+
+    def execute(self, query, vars=None):
+        return self._timed_execute(super().execute, query, vars)
+
+    def executemany(self, query, vars_list):
+        return self._timed_execute(super().executemany, query, vars_list)
+
+    def _timed_fetch(self, method, *args):
+        start = time.perf_counter()
+        rows = method(*args)
+        elapsed = time.perf_counter() - start
+        scope = _current_scope.get()
+        if scope is not None:
+            scope.db_s += elapsed
+            if rows is not None:
+                batch = [rows] if not isinstance(rows, list) else rows
+                scope.rows += len(batch)
+                scope.bytes += _row_bytes(batch)
+        return rows
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed_fetch(super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+
+    def __iter__(self):
+        # Los cursores con nombre traen `itersize` filas por viaje
+        size = self.itersize if self.name else self.arraysize
+        while True:
+            rows = self.fetchmany(size)
+            if not rows:
+                return
+            yield from rows
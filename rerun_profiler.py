@@ -0,0 +1,197 @@
+"""
+Perfilador de reruns de Streamlit.
+
+Streamlit vuelve a ejecutar todo el script en cada interacción; este módulo
+mide cuánto cuesta cada parte de ese rerun para ver qué trabajo se hace en
+vano (p. ej. pestañas ocultas que igual consultan la base):
+
+    with rerun_profiler.rerun("admin") as profile:      # todo el rerun
+        with tab_dashboard, rerun_profiler.section("Dashboard"):
+            ...
+            with rerun_profiler.section("ordenar envíos", kind="df"):
+                df = df.sort_values(...)
+
+Los bloques `get_db_connection` abiertos durante el rerun se agregan solos
+como secciones de tipo "db" (vía query_stats, si QUERY_STATS_ENABLED).
+
+Las funciones @st.fragment se miden con fragment(): dentro de un rerun
+completo son una sección más; cuando Streamlit reejecuta solo el fragmento
+(app.py no corre) son un rerun propio, "fragmento: <nombre>", que se guarda en
+el mismo historial para comparar su costo con el del rerun completo
+(compare() da la mediana de cada uno).
+
+Con config.RERUN_PROFILER_ENABLED = False, rerun(), section() y fragment()
+devuelven un context manager vacío compartido: el costo es una lectura de
+atributo.
+"""
+import contextlib
+import contextvars
+import logging
+import statistics
+import time
+
+import config
+import query_stats
+
+logger = logging.getLogger(__name__)
+
+_NULL = contextlib.nullcontext()
+_current = contextvars.ContextVar("rerun_profile", default=None)
+
+
+class RerunProfile:
+    """Secciones medidas de un rerun, en orden de inicio."""
+
+    def __init__(self, name, clock=time.perf_counter):
+        self.name = name
+        self._clock = clock
+        self.started = clock()
+        self.total_ms = None
+        # [profundidad, ruta, tipo, ms, anidada_en_su_tipo]; ms es None mientras sigue abierta
+        self.entries = []
+        self._stack = []
+
+    def _new_entry(self, name, kind, ms=None):
+        path = f"{self._stack[-1][1]}/{name}" if self._stack else name
+        nested = any(open_entry[2] == kind for open_entry in self._stack)
+        entry = [len(self._stack), path, kind, ms, nested]
+        self.entries.append(entry)
+        return entry
+
+    def open(self, name, kind):
+        entry = self._new_entry(name, kind)
+        self._stack.append(entry)
+        return entry, self._clock()
+
+    def close(self, entry, started):
+        entry[3] = (self._clock() - started) * 1000
+        if self._stack and self._stack[-1] is entry:
+            self._stack.pop()
+
+    def add(self, name, kind, ms):
+        """Sección ya medida por otro (p. ej. un bloque de base de datos)."""
+        self._new_entry(name, kind, ms)
+
+    def finish(self):
+        self.total_ms = (self._clock() - self.started) * 1000
+
+    def breakdown(self):
+        """Filas {sección, ruta, tipo, ms, % del rerun} y una final con lo no medido."""
+        total = self.total_ms or 0.0
+
+        def share(ms):
+            return round(100 * ms / total, 1) if total else 0.0
+
+        rows = [{"sección": "  " * depth + path.rsplit("/", 1)[-1], "ruta": path, "tipo": kind,
+                 "ms": round(ms or 0.0, 1), "% del rerun": share(ms or 0.0)}
+                for depth, path, kind, ms, _ in self.entries]
+        unmeasured = max(0.0, total - sum(e[3] or 0.0 for e in self.entries if e[0] == 0))
+        rows.append({"sección": "(sin medir)", "ruta": "", "tipo": "", "ms": round(unmeasured, 1),
+                     "% del rerun": share(unmeasured)})
+        return rows
+
+    def totals_by_kind(self):
+        """ms por tipo; una sección dentro de otra del mismo tipo no se cuenta dos veces."""
+        totals = {}
+        for _, _, kind, ms, nested in self.entries:
+            if not nested:
+                totals[kind] = totals.get(kind, 0.0) + (ms or 0.0)
+        return totals
+
+    def summary(self):
+        """Fila del historial: nombre, total y ms por tipo."""
+        row = {"rerun": self.name, "total ms": round(self.total_ms or 0.0, 1)}
+        row.update({f"{kind} ms": round(ms, 1) for kind, ms in self.totals_by_kind().items()})
+        return row
+
+
+def remember(history, profile):
+    """Agrega el resumen del perfil a `history` (lista) y la recorta a RERUN_PROFILER_HISTORY."""
+    history.append(profile.summary())
+    del history[:-config.RERUN_PROFILER_HISTORY]
+
+
+def compare(history):
+    """
+    Mediana de "total ms" y "db ms" por tipo de rerun del historial, p. ej. los
+    reruns completos ("operador") frente a los del fragmento ("fragmento: Formulario").
+    """
+    by_name = {}
+    for row in history:
+        by_name.setdefault(row["rerun"], []).append(row)
+    rows = []
+    for name, runs in by_name.items():
+        rows.append({"rerun": name, "reruns": len(runs),
+                     "mediana total ms": statistics.median(r["total ms"] for r in runs),
+                     "mediana db ms": statistics.median(r.get("db ms", 0.0) for r in runs)})
+    return rows
+
+
+class _Section:
+    __slots__ = ("_profile", "_name", "_kind", "_entry", "_started")
+
+    def __init__(self, profile, name, kind):
+        self._profile = profile
+        self._name = name
+        self._kind = kind
+
+    def __enter__(self):
+        self._entry, self._started = self._profile.open(self._name, self._kind)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._profile.close(self._entry, self._started)
+        return False
+
+
+@contextlib.contextmanager
+def _profiled_rerun(name, on_finish):
+    profile = RerunProfile(name)
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+        profile.finish()
+        logger.debug("Rerun %s: %.1f ms %s", name, profile.total_ms, profile.totals_by_kind())
+        if on_finish is not None:
+            on_finish(profile)
+
+
+def rerun(name, on_finish=None):
+    """Mide un rerun completo; on_finish(perfil) se llama al terminar (aun con st.stop)."""
+    if not config.RERUN_PROFILER_ENABLED:
+        return _NULL
+    return _profiled_rerun(name, on_finish)
+
+
+def section(name, kind="sección"):
+    """Mide una parte del rerun en curso (no hace nada si no hay uno)."""
+    if not config.RERUN_PROFILER_ENABLED:
+        return _NULL
+    profile = _current.get()
+    if profile is None:
+        return _NULL
+    return _Section(profile, name, kind)
+
+
+def fragment(name, on_finish=None):
+    """
+    Mide una función @st.fragment: sección del rerun en curso si corre dentro
+    de uno, o rerun propio (y on_finish) si Streamlit reejecuta solo el fragmento.
+    """
+    if not config.RERUN_PROFILER_ENABLED:
+        return _NULL
+    profile = _current.get()
+    if profile is not None:
+        return _Section(profile, name, "fragmento")
+    return _profiled_rerun(f"fragmento: {name}", on_finish)
+
+
+def _on_db_block(name, wall_s):
+    profile = _current.get()
+    if profile is not None:
+        profile.add(name.split(".", 1)[-1], "db", wall_s * 1000)
+
+
+query_stats.add_listener(_on_db_block)
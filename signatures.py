@@ -0,0 +1,89 @@
+"""
+Almacenamiento compacto de los campos "Firma".
+
+El lienzo de st_canvas entrega un arreglo RGBA de 200x700x4. Guardarlo con
+`.tolist()` dentro del JSONB del envío ocupaba varios MB por firma; aquí se
+codifica como PNG en escala de grises (unos pocos KB), que se guarda en la
+tabla `submission_signatures` (ver database.save_submission). En `data` solo
+queda una referencia pequeña:
+
+    {"firma_png": true, "bytes": 2345}
+
+La imagen se lee únicamente al mostrarla (database.get_submission_signature).
+"""
+import io
+
+import numpy as np
+from PIL import Image
+
+REFERENCE_KEY = "firma_png"
+# Un píxel más oscuro que esto cuenta como trazo (0 = negro, 255 = blanco)
+INK_THRESHOLD = 250
+
+
+def _to_grayscale(image_data):
+    """Arreglo RGBA (o RGB/gris) -> arreglo uint8 en gris sobre fondo blanco."""
+    pixels = np.asarray(image_data, dtype=np.float32)
+    if pixels.ndim == 2:
+        return np.clip(pixels, 0, 255).astype(np.uint8)
+    if pixels.ndim != 3 or pixels.shape[2] not in (3, 4):
+        raise ValueError(f"Forma de imagen no soportada para una firma: {pixels.shape}")
+
+    luminance = pixels[..., 0] * 0.299 + pixels[..., 1] * 0.587 + pixels[..., 2] * 0.114
+    if pixels.shape[2] == 4:
+        # Componer sobre blanco: lo transparente del lienzo es papel en blanco
+        alpha = pixels[..., 3] / 255.0
+        luminance = luminance * alpha + 255.0 * (1.0 - alpha)
+    return np.clip(np.rint(luminance), 0, 255).astype(np.uint8)
+
+
+def encode_signature(image_data):
+    """
+    Codifica el lienzo de una firma como PNG.
+    Retorna los bytes del PNG, o None si el lienzo está vacío (sin trazos).
+    """
+    if image_data is None:
+        return None
+    gray = _to_grayscale(image_data)
+    if gray.size == 0 or int(gray.min()) >= INK_THRESHOLD:
+        return None
+    buffer = io.BytesIO()
+    Image.fromarray(gray, mode="L").save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def decode_signature(png_bytes):
+    """PNG -> arreglo numpy (alto x ancho) en escala de grises."""
+    with Image.open(io.BytesIO(png_bytes)) as image:
+        return np.asarray(image.convert("L"))
+
+
+def make_reference(png_bytes):
+    """Referencia que sustituye a la firma dentro de `data`."""
+    return {REFERENCE_KEY: True, "bytes": len(png_bytes)}
+
+
+def is_reference(value):
+    return isinstance(value, dict) and value.get(REFERENCE_KEY) is True
+
+
+def split_signatures(data):
+    """
+    Separa las firmas (bytes PNG) del resto de los datos del envío.
+    Retorna (datos_con_referencias, {etiqueta: png_bytes}).
+    """
+    payload = {}
+    images = {}
+    for label, value in data.items():
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            images[label] = bytes(value)
+            payload[label] = make_reference(images[label])
+        else:
+            payload[label] = value
+    return payload, images
+
+
+def is_legacy_pixel_list(value):
+    """True para una firma guardada al estilo anterior (listas anidadas de píxeles)."""
+    return bool(isinstance(value, list) and value and isinstance(value[0], list)
+                and value[0] and isinstance(value[0][0], list))
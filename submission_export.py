@@ -0,0 +1,208 @@
+"""
+Exportación de envíos a CSV, Excel (XLSX) o Parquet en streaming.
+
+Los envíos se leen con un cursor de servidor (con nombre) en bloques de
+config.EXPORT_CHUNK_SIZE filas y se escriben de inmediato a un archivo
+temporal, así que la memoria no crece con el número de envíos. El JSONB
+`data` se aplana en una columna por campo, según la estructura de las
+plantillas que aparecen en el resultado; los datos que no corresponden a
+ningún campo (plantillas editadas después del envío) van a `otros_campos`.
+
+XLSX usa `xlsxwriter` (modo constant_memory) y Parquet `pyarrow`; ambos
+están en requirements.txt.
+"""
+import csv
+import json
+import os
+import tempfile
+
+import config
+import attachments
+import signatures
+from database import get_db_connection
+from db_helpers import _SUBMISSION_DETAIL_COLUMNS, _SUBMISSION_DETAIL_FROM, _submission_filters
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+BASE_COLUMNS = ["id", "user_name", "template_name", "area_name", "created_at",
+                "reviewed", "reviewed_at", "reviewed_by_name"]
+EXTRA_COLUMN = "otros_campos"
+XLSX_MAX_ROWS = 1048576
+
+FORMATS = {
+    "csv": {"label": "CSV", "suffix": ".csv", "mime": "text/csv"},
+    "xlsx": {"label": "Excel (XLSX)", "suffix": ".xlsx",
+             "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
+    "parquet": {"label": "Parquet", "suffix": ".parquet", "mime": "application/vnd.apache.parquet"},
+}
+
+
+def available_formats():
+    """Formatos cuya dependencia está instalada."""
+    return [fmt for fmt in FORMATS
+            if (fmt != "xlsx" or xlsxwriter is not None) and (fmt != "parquet" or pq is not None)]
+
+
+def flatten_value(value):
+    """Valor de un campo del envío -> texto para una celda."""
+    if value is None:
+        return None
+    if signatures.is_reference(value):
+        return "[firma]"
+    if attachments.is_reference(value):
+        return value.get("nombre") or value[attachments.REFERENCE_KEY]
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return str(value)
+
+
+def field_columns(structures):
+    """Etiquetas de campo de varias plantillas, sin repetir y en orden de aparición."""
+    columns = []
+    seen = set(BASE_COLUMNS) | {EXTRA_COLUMN}
+    for structure in structures:
+        for field in structure or []:
+            label = str(field.get("Etiqueta del Campo", ""))
+            if label and label not in seen:
+                seen.add(label)
+                columns.append(label)
+    return columns
+
+
+def flatten_row(base_values, data, fields, field_set):
+    """Fila de salida: columnas base + una por campo + otros_campos."""
+    data = data or {}
+    if isinstance(data, (str, bytes)):
+        data = json.loads(data)
+    extra = {k: v for k, v in data.items() if k not in field_set}
+    return (list(base_values)
+            + [flatten_value(data.get(label)) for label in fields]
+            + [json.dumps(extra, ensure_ascii=False, default=str) if extra else None])
+
+
+class _CsvWriter:
+    def __init__(self, path, columns):
+        self._file = open(path, "w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class _XlsxWriter:
+    def __init__(self, path, columns):
+        if xlsxwriter is None:
+            raise RuntimeError("Exportar a Excel requiere el paquete 'xlsxwriter'.")
+        # constant_memory escribe cada fila al disco en cuanto se completa
+        self._book = xlsxwriter.Workbook(path, {"constant_memory": True, "remove_timezone": True})
+        self._sheet = self._book.add_worksheet("Envíos")
+        self._datetime = self._book.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"})
+        self._sheet.write_row(0, 0, columns)
+        self._row = 1
+
+    def write(self, rows):
+        if self._row + len(rows) > XLSX_MAX_ROWS:
+            raise ValueError(f"Excel admite como máximo {XLSX_MAX_ROWS:,} filas; use CSV o Parquet.")
+        for row in rows:
+            for col, value in enumerate(row):
+                if value is None:
+                    continue
+                if hasattr(value, "year") and hasattr(value, "hour"):
+                    self._sheet.write_datetime(self._row, col, value, self._datetime)
+                else:
+                    self._sheet.write(self._row, col, value)
+            self._row += 1
+
+    def close(self):
+        self._book.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path, columns):
+        if pq is None:
+            raise RuntimeError("Exportar a Parquet requiere el paquete 'pyarrow'.")
+        base_types = {"id": pa.int64(), "created_at": pa.timestamp("us"), "reviewed": pa.bool_(),
+                      "reviewed_at": pa.timestamp("us")}
+        self._schema = pa.schema([(col, base_types.get(col, pa.string())) for col in columns])
+        self._writer = pq.ParquetWriter(path, self._schema, compression="zstd")
+
+    def write(self, rows):
+        # Un row group por bloque leído de la base
+        self._writer.write_table(pa.Table.from_pylist(
+            [dict(zip(self._schema.names, row)) for row in rows], schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+_WRITERS = {"csv": _CsvWriter, "xlsx": _XlsxWriter, "parquet": _ParquetWriter}
+
+
+def _export_structures(cur, where, params):
+    """Estructuras de las plantillas que tienen al menos un envío en el resultado."""
+    cur.execute(f"""
+        SELECT structure FROM form_templates
+        WHERE id IN (SELECT DISTINCT s.template_id FROM form_submissions s
+                     JOIN form_templates t ON s.template_id = t.id {where})
+        ORDER BY id
+    """, params or None)
+    structures = []
+    for (structure,) in cur.fetchall():
+        structures.append(json.loads(structure) if isinstance(structure, (str, bytes)) else structure)
+    return structures
+
+
+def export_submissions(fmt="csv", area_ids=None, user_ids=None, reviewed=None, chunk_size=None):
+    """
+    Escribe los envíos filtrados a un archivo temporal en el formato pedido.
+    Retorna (ruta, filas_escritas); quien llama debe borrar el archivo.
+    """
+    if fmt not in _WRITERS:
+        raise ValueError(f"Formato de exportación desconocido: {fmt}")
+    chunk_size = chunk_size or config.EXPORT_CHUNK_SIZE
+    conditions, params = _submission_filters(area_ids, user_ids, reviewed)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    fd, path = tempfile.mkstemp(prefix="envios_", suffix=FORMATS[fmt]["suffix"])
+    os.close(fd)
+    written = 0
+    try:
+        with get_db_connection() as conn:
+            try:
+                with conn.cursor() as cur:
+                    fields = field_columns(_export_structures(cur, where, params))
+                field_set = set(fields)
+                writer = _WRITERS[fmt](path, BASE_COLUMNS + fields + [EXTRA_COLUMN])
+                try:
+                    # Cursor de servidor: la base entrega `chunk_size` filas por viaje
+                    with conn.cursor(name="export_submissions") as cur:
+                        cur.itersize = chunk_size
+                        cur.execute(f"SELECT {_SUBMISSION_DETAIL_COLUMNS}, s.data {_SUBMISSION_DETAIL_FROM} "
+                                    f"{where} ORDER BY s.created_at DESC, s.id DESC", params or None)
+                        while True:
+                            rows = cur.fetchmany(chunk_size)
+                            if not rows:
+                                break
+                            writer.write([flatten_row(row[:-1], row[-1], fields, field_set) for row in rows])
+                            written += len(rows)
+                finally:
+                    writer.close()
+            finally:
+                conn.rollback()
+    except Exception:
+        os.remove(path)
+        raise
+    return path, written
@@ -0,0 +1,340 @@
+"""
+Cola de escritura diferida (write-behind) de envíos.
+
+El formulario del operador no espera a PostgreSQL: enqueue() escribe el envío
+en un spool SQLite local (WAL, un commit por envío, sobrevive a reinicios) y
+retorna de inmediato. Un hilo en segundo plano vacía el spool en lotes de
+config.SUBMISSION_QUEUE_BATCH_SIZE: cada envío se valida con
+bulk_ingest.prepare_row y el lote se inserta en una sola transacción
+(bulk_ingest.save_prepared, execute_values ... ON CONFLICT DO NOTHING).
+
+- Cada envío lleva una llave de idempotencia (UUID): si el worker se cae entre
+  el commit en PostgreSQL y el borrado del spool, el reintento no duplica. Los
+  que no vuelven en RETURNING ya estaban guardados y también salen del spool.
+- Un error transitorio (base dormida, red) reprograma el lote con espera
+  exponencial.
+- Un error de validación es permanente: el envío queda en estado 'failed'
+  para que el administrador lo vea (requeue_failed() lo reintenta).
+- Si otro error rechaza el lote entero, se guarda uno por uno para aislar al
+  envío culpable.
+
+stats() expone profundidad y antigüedad del envío pendiente más viejo (lag).
+"""
+import base64
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import psycopg2
+
+import attachments
+import bulk_ingest
+import config
+import form_schema
+
+logger = logging.getLogger(__name__)
+
+# Marca para guardar bytes (PNG de firmas) dentro del JSON del spool
+_BYTES_KEY = "__bytes_b64__"
+
+_SPOOL_DDL = """
+    CREATE TABLE IF NOT EXISTS spool (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        submission_key TEXT NOT NULL UNIQUE,
+        template_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        data TEXT NOT NULL,
+        enqueued_at REAL NOT NULL,
+        state TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL DEFAULT 0,
+        last_error TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_spool_pending ON spool (state, next_attempt_at, seq);
+"""
+
+# Errores que justifican reintentar: conexión caída, base suspendida, pool agotado
+TRANSIENT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+def _encode(value):
+    if isinstance(value, (bytes, bytearray)):
+        return {_BYTES_KEY: base64.b64encode(bytes(value)).decode("ascii")}
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_encode(v) for v in value]
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        if len(value) == 1 and _BYTES_KEY in value:
+            return base64.b64decode(value[_BYTES_KEY])
+        return {k: _decode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    return value
+
+
+def dumps_data(data):
+    """Datos del formulario -> JSON del spool (bytes en base64, fechas en ISO)."""
+    return json.dumps(_encode(data), default=str, ensure_ascii=False)
+
+
+def loads_data(text):
+    return _decode(json.loads(text))
+
+
+def retry_delay(attempts, base=None, maximum=None):
+    """Espera antes del intento número `attempts + 1`: base * 2^(intentos-1), con tope."""
+    base = config.SUBMISSION_QUEUE_RETRY_BASE if base is None else base
+    maximum = config.SUBMISSION_QUEUE_RETRY_MAX if maximum is None else maximum
+    return min(maximum, base * (2 ** max(0, attempts - 1)))
+
+
+class SubmissionSpool:
+    """Almacén SQLite de envíos pendientes, seguro entre hilos."""
+
+    def __init__(self, path, clock=time.time):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(_SPOOL_DDL)
+
+    def add(self, template_id, user_id, data, submission_key=None):
+        submission_key = str(submission_key or uuid.uuid4())
+        with self._lock:
+            # Reencolar la misma llave (doble clic) no crea otra fila
+            self._conn.execute(
+                "INSERT OR IGNORE INTO spool (submission_key, template_id, user_id, data, enqueued_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (submission_key, int(template_id), int(user_id), dumps_data(data), self._clock()))
+        return submission_key
+
+    def due(self, limit):
+        """Envíos pendientes cuyo próximo intento ya venció, en orden de llegada."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, submission_key, template_id, user_id, data, enqueued_at, attempts FROM spool "
+                "WHERE state = 'pending' AND next_attempt_at <= ? ORDER BY seq LIMIT ?",
+                (self._clock(), int(limit))).fetchall()
+        return [{"seq": r[0], "submission_key": r[1], "template_id": r[2], "user_id": r[3],
+                 "data": r[4], "enqueued_at": r[5], "attempts": r[6]} for r in rows]
+
+    def remove(self, seqs):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("DELETE FROM spool WHERE seq = ?", [(seq,) for seq in seqs])
+            self._conn.execute("COMMIT")
+
+    def reschedule(self, seq, attempts, delay, error):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE spool SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE seq = ?",
+                (attempts, self._clock() + delay, error, seq))
+
+    def fail(self, seq, error):
+        with self._lock:
+            self._conn.execute("UPDATE spool SET state = 'failed', last_error = ? WHERE seq = ?", (error, seq))
+
+    def requeue_failed(self):
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE spool SET state = 'pending', attempts = 0, next_attempt_at = 0 WHERE state = 'failed'")
+            return cur.rowcount
+
+    def failed(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT submission_key, template_id, user_id, enqueued_at, last_error FROM spool "
+                "WHERE state = 'failed' ORDER BY seq").fetchall()
+        return [{"submission_key": r[0], "template_id": r[1], "user_id": r[2],
+                 "enqueued_at": datetime.datetime.fromtimestamp(r[3]), "last_error": r[4]} for r in rows]
+
+    def attachment_hashes(self):
+        """Hashes de los adjuntos de los envíos que siguen en el spool (pendientes o fallidos)."""
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM spool").fetchall()
+        return {value[attachments.REFERENCE_KEY]
+                for (data,) in rows for value in loads_data(data).values() if attachments.is_reference(value)}
+
+    def counts(self):
+        """(pendientes, fallidos, enqueued_at del pendiente más viejo o None)."""
+        with self._lock:
+            pending, oldest = self._conn.execute(
+                "SELECT COUNT(*), MIN(enqueued_at) FROM spool WHERE state = 'pending'").fetchone()
+            failed = self._conn.execute("SELECT COUNT(*) FROM spool WHERE state = 'failed'").fetchone()[0]
+        return pending, failed, oldest
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SubmissionQueue:
+    """
+    Worker que vacía el spool hacia PostgreSQL.
+
+    `save_batch` recibe filas de bulk_ingest.prepare_row y retorna
+    {submission_key: id} de las insertadas; por defecto
+    bulk_ingest.save_prepared. `schema_for` es database.get_compiled_schema.
+    drain_once() procesa un lote de forma síncrona (lo usan el hilo y las pruebas).
+    """
+
+    def __init__(self, spool, save_batch=None, schema_for=None, batch_size=None, poll_interval=None,
+                 clock=time.time):
+        if schema_for is None:
+            import database
+            schema_for = database.get_compiled_schema
+        self.spool = spool
+        self._save_batch = save_batch or bulk_ingest.save_prepared
+        self._schema_for = schema_for
+        self.batch_size = batch_size or config.SUBMISSION_QUEUE_BATCH_SIZE
+        self.poll_interval = config.SUBMISSION_QUEUE_POLL_INTERVAL if poll_interval is None else poll_interval
+        self._clock = clock
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._saved = 0
+        self._last_saved_at = None
+        self._last_error = None
+
+    def enqueue(self, template_id, user_id, data, submission_key=None):
+        """Guarda el envío en el spool y despierta al worker; retorna su llave."""
+        key = self.spool.add(template_id, user_id, data, submission_key)
+        self._wake.set()
+        return key
+
+    def _prepare(self, item):
+        record = {
+            "template_id": item["template_id"],
+            "user_id": item["user_id"],
+            "data": loads_data(item["data"]),
+            # Hora UTC explícita: la base la convierte a su zona, igual que CURRENT_TIMESTAMP
+            "created_at": datetime.datetime.fromtimestamp(item["enqueued_at"], tz=datetime.timezone.utc),
+            "submission_key": item["submission_key"],
+        }
+        return bulk_ingest.prepare_row(record, self._schema_for, lambda r: r["user_id"])
+
+    def _commit(self, batch):
+        """Guarda [(item, fila preparada)] en una transacción; retorna cuántos salieron del spool."""
+        self._save_batch([prepared for _, prepared in batch])
+        # Insertados o ya guardados antes con esa llave: en ambos casos terminaron
+        self.spool.remove([item["seq"] for item, _ in batch])
+        self._saved += len(batch)
+        self._last_saved_at = self._clock()
+        return len(batch)
+
+    def _retry(self, batch, error, transient):
+        message = str(error)[:500]
+        self._last_error = message
+        for item, _ in batch:
+            attempts = item["attempts"] + 1
+            if not transient and attempts >= config.SUBMISSION_QUEUE_MAX_ATTEMPTS:
+                self.spool.fail(item["seq"], message)
+            else:
+                self.spool.reschedule(item["seq"], attempts, retry_delay(attempts), message)
+
+    def drain_once(self):
+        """Procesa un lote de envíos vencidos. Retorna cuántos salieron del spool."""
+        batch = []
+        for item in self.spool.due(self.batch_size):
+            try:
+                batch.append((item, self._prepare(item)))
+            except form_schema.FormValidationError as e:
+                # La plantilla cambió o el envío es inválido: reintentar no sirve
+                self.spool.fail(item["seq"], str(e))
+                self._last_error = str(e)
+        if not batch:
+            return 0
+
+        try:
+            return self._commit(batch)
+        except TRANSIENT_ERRORS as e:
+            self._retry(batch, e, transient=True)
+            return 0
+        except Exception as e:
+            if len(batch) == 1:
+                self._retry(batch, e, transient=False)
+                logger.exception("Error guardando el envío %s", batch[0][0]["submission_key"])
+                return 0
+            logger.warning("El lote de %d envíos falló (%s); se guardan uno por uno", len(batch), e)
+
+        saved = 0
+        for entry in batch:
+            try:
+                saved += self._commit([entry])
+            except TRANSIENT_ERRORS as e:
+                # Si la base no responde, el resto del lote fallaría igual
+                self._retry([entry], e, transient=True)
+                break
+            except Exception as e:
+                self._retry([entry], e, transient=False)
+                logger.exception("Error guardando el envío %s", entry[0]["submission_key"])
+        return saved
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                saved = self.drain_once()
+            except Exception:
+                logger.exception("Error en el worker de la cola de envíos")
+                saved = 0
+            # Lote lleno: seguir sin esperar; si no, dormir hasta un nuevo envío o el siguiente sondeo
+            if saved < self.batch_size:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="submission-queue", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def requeue_failed(self):
+        count = self.spool.requeue_failed()
+        self._wake.set()
+        return count
+
+    def stats(self):
+        pending, failed, oldest = self.spool.counts()
+        return {
+            "pending": pending,
+            "failed": failed,
+            "lag_seconds": max(0.0, self._clock() - oldest) if oldest is not None else 0.0,
+            "saved": self._saved,
+            "last_saved_at": self._last_saved_at,
+            "last_error": self._last_error,
+            "running": self._thread is not None and self._thread.is_alive(),
+        }
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    """Cola del proceso (spool en config.SUBMISSION_SPOOL_PATH), con el worker ya iniciado."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = SubmissionQueue(SubmissionSpool(config.SUBMISSION_SPOOL_PATH)).start()
+    return _queue
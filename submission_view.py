@@ -0,0 +1,81 @@
+import os
+
+import streamlit as st
+
+import attachments
+import database
+import signatures
+import submission_export
+
+# Presentación del contenido de un envío, compartida por admin_view y operator_view
+
+
+def render_submission_value(submission_id, label, value, key_prefix):
+    """Muestra un campo del envío; firmas e imágenes se leen solo al mostrarlas."""
+    if signatures.is_reference(value):
+        st.write(f"**{label}**:")
+        png_bytes = database.get_submission_signature(submission_id, label)
+        if png_bytes:
+            st.image(png_bytes)
+        else:
+            st.caption("Firma no disponible.")
+    elif attachments.is_reference(value):
+        _render_attachment(submission_id, label, value, key_prefix)
+    else:
+        st.write(f"**{label}**: {value}")
+
+
+def _render_attachment(submission_id, label, ref, key_prefix):
+    store = attachments.get_store()
+    sha256 = ref[attachments.REFERENCE_KEY]
+    st.write(f"**{label}**: {ref.get('nombre')} ({ref.get('bytes', 0) / 1024:.0f} KB)")
+    if not store.exists(sha256):
+        st.caption("Archivo no disponible en el almacén.")
+        return
+    try:
+        st.image(store.thumbnail(sha256))
+    except OSError:
+        st.caption("No se pudo generar la vista previa.")
+
+    # El original (varios MB) solo se lee si se pide
+    if st.toggle("🔍 Ver original", key=f"{key_prefix}_original_{submission_id}_{label}"):
+        st.image(store.original_path(sha256))
+        with store.open(sha256) as original:
+            st.download_button("📥 Descargar original", data=original,
+                               file_name=os.path.basename(ref.get("nombre") or sha256),
+                               mime=ref.get("tipo") or "application/octet-stream",
+                               key=f"{key_prefix}_download_{submission_id}_{label}")
+
+
+def render_submission_payload(submission_id, payload, key_prefix):
+    for label, value in payload.items():
+        render_submission_value(submission_id, label, value, key_prefix)
+
+
+def render_export(filters, file_stem, key_prefix):
+    """Formato + botón que genera la exportación en streaming y ofrece descargarla."""
+    formats = submission_export.available_formats()
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        fmt = st.selectbox("Formato:", formats, key=f"{key_prefix}_export_format",
+                           format_func=lambda f: submission_export.FORMATS[f]["label"])
+    with col2:
+        st.write("")
+        prepare = st.button("📦 Preparar descarga", key=f"{key_prefix}_export_prepare")
+    if not prepare:
+        return
+
+    with st.spinner("Exportando envíos..."):
+        path, rows = submission_export.export_submissions(fmt, **filters)
+    try:
+        info = submission_export.FORMATS[fmt]
+        with open(path, "rb") as exported:
+            st.download_button(
+                label=f"📥 Descargar {rows} envíos ({info['label']}, {os.path.getsize(path) / 1024:.0f} KB)",
+                data=exported,
+                file_name=f"{file_stem}{info['suffix']}",
+                mime=info["mime"],
+                key=f"{key_prefix}_export_download"
+            )
+    finally:
+        os.remove(path)
@@ -0,0 +1,77 @@
+"""
+Caché en proceso de áreas y plantillas de formulario, con invalidación.
+
+Las plantillas casi nunca cambian, pero "Llenar Formulario" las consultaba en
+cada rerun (cada tecla dentro del formulario). VersionedCache guarda los
+resultados y los descarta cuando:
+
+- este proceso escribe (database.save_form_template, create_area,
+  db_helpers.update_area/delete_area llaman a invalidate()), o
+- cambia el contador `catalog_version` de la base, que mantienen triggers
+  sobre form_areas y form_templates (migración 6). Así otro proceso de la app
+  que escribe invalida a todos; el contador se consulta como mucho una vez
+  cada `check_interval` segundos.
+"""
+import threading
+import time
+
+
+class VersionedCache:
+    """Dict llave -> valor que se vacía al cambiar la versión remota o al invalidar."""
+
+    def __init__(self, version_loader, check_interval, clock=time.monotonic):
+        self._version_loader = version_loader
+        self._check_interval = check_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._version = None
+        self._checked_at = None
+        # Aumenta con cada vaciado: una carga iniciada antes no se guarda después
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _clear(self):
+        self._entries.clear()
+        self._generation += 1
+
+    def _sync_version(self):
+        now = self._clock()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self._check_interval:
+                return
+            self._checked_at = now
+        version = self._version_loader()
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._clear()
+
+    def get(self, key, loader):
+        """Valor cacheado de `key`, o el resultado de loader(). Los None no se guardan."""
+        self._sync_version()
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            generation = self._generation
+
+        value = loader()
+        if value is not None:
+            with self._lock:
+                if generation == self._generation:
+                    self._entries[key] = value
+        return value
+
+    def invalidate(self):
+        """Descarta todo y obliga a releer la versión en la próxima consulta."""
+        with self._lock:
+            self._clear()
+            self._checked_at = None
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "version": self._version}
@@ -0,0 +1,84 @@
+import sys
+import os
+import datetime
+import re
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import analytics
+from analytics import plan_columns, structure_hash, table_name
+
+STRUCTURE = [
+    {"Etiqueta del Campo": "Provincia", "Tipo de Campo": "Texto"},
+    {"Etiqueta del Campo": "Fecha de Visita", "Tipo de Campo": "Fecha"},
+    {"Etiqueta del Campo": "Ubicación", "Tipo de Campo": "Geolocalización"},
+    {"Etiqueta del Campo": "Asistentes", "Tipo de Campo": "Tabla Dinámica"},
+    {"Etiqueta del Campo": "Firma del Director", "Tipo de Campo": "Firma"},
+    {"Etiqueta del Campo": "Foto", "Tipo de Campo": "Carga de Imagen"},
+]
+
+
+class TestAnalytics(unittest.TestCase):
+
+    def test_plan_columns_types(self):
+        columns = plan_columns(STRUCTURE)
+        self.assertEqual([(c["column"], c["sql_type"], c["kind"]) for c in columns], [
+            ("f1_provincia", "TEXT", "text"),
+            ("f2_fecha_de_visita", "DATE", "date"),
+            ("f3_ubicacion_lat", "DOUBLE PRECISION", "lat"),
+            ("f3_ubicacion_lng", "DOUBLE PRECISION", "lng"),
+            ("f4_asistentes_filas", "INTEGER", "rows"),
+            ("f5_firma_del_director", "BOOLEAN", "present"),
+            ("f6_foto", "TEXT", "attachment"),
+        ])
+        self.assertEqual(columns[2]["label"], "Ubicación")
+
+    def test_plan_columns_skips_unknown_and_unlabeled(self):
+        structure = [{"Etiqueta del Campo": "", "Tipo de Campo": "Texto"},
+                     {"Etiqueta del Campo": "Otro", "Tipo de Campo": "Desconocido"},
+                     {"Etiqueta del Campo": "¿¡!?", "Tipo de Campo": "Texto"}]
+        self.assertEqual([c["column"] for c in plan_columns(structure)], ["f3_campo"])
+
+    def test_plan_columns_identifier_length(self):
+        columns = plan_columns([{"Etiqueta del Campo": "x" * 200, "Tipo de Campo": "Geolocalización"}])
+        self.assertTrue(all(len(c["column"]) <= 63 for c in columns))
+        self.assertEqual(len({c["column"] for c in columns}), 2)
+
+    def test_structure_hash_changes_with_structure(self):
+        changed = STRUCTURE[:-1]
+        self.assertEqual(structure_hash(STRUCTURE), structure_hash(list(STRUCTURE)))
+        self.assertNotEqual(structure_hash(STRUCTURE), structure_hash(changed))
+
+    def test_table_name(self):
+        self.assertEqual(table_name(7), "analytics_t7")
+        with self.assertRaises(ValueError):
+            table_name("7; DROP TABLE x")
+
+    def test_date_pattern_rejects_impossible_dates(self):
+        pattern = re.compile(analytics.DATE_PATTERN)
+        for value in ["2026-02-30", "2023-02-29", "2026-04-31", "2026-13-01", "0000-01-01", "26-03-01"]:
+            self.assertIsNone(pattern.match(value), value)
+        for value in ["2026-03-01", "2024-02-29", "2000-02-29", "2026-03-01T10:00:00"]:
+            self.assertIsNotNone(pattern.match(value), value)
+
+    def test_date_pattern_matches_calendar(self):
+        pattern = re.compile(analytics.DATE_PATTERN)
+        for year in (1, 4, 100, 400, 1900, 2000, 2023, 2024, 9999):
+            for month in range(1, 13):
+                for day in range(1, 32):
+                    value = f"{year:04d}-{month:02d}-{day:02d}"
+                    try:
+                        datetime.date.fromisoformat(value)
+                        valid = True
+                    except ValueError:
+                        valid = False
+                    self.assertEqual(pattern.match(value) is not None, valid, value)
+
+    def test_projection_rejects_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            analytics._projection({"label": "x", "kind": "otro"})
+
+
+if __name__ == '__main__':
+    unittest.main()
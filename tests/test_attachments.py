@@ -0,0 +1,111 @@
+import sys
+import os
+import io
+import shutil
+import tempfile
+import time
+import unittest
+
+from PIL import Image
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from attachments import AttachmentStore, AttachmentTooLargeError, is_reference, REFERENCE_KEY
+
+
+class RecordingReader(io.BytesIO):
+    """BytesIO que registra el tamaño de cada lectura."""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.reads = []
+
+    def read(self, size=-1):
+        self.reads.append(size)
+        return super().read(size)
+
+
+def make_jpeg(size=(1600, 1200), color=(200, 30, 30)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+class TestAttachmentStore(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = AttachmentStore(root=self.root, chunk_size=4096, max_bytes=1024 * 1024,
+                                     thumbnail_size=(320, 320))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_put_streams_in_chunks_and_returns_reference(self):
+        data = make_jpeg()
+        reader = RecordingReader(data)
+        ref = self.store.put_stream(reader, "foto.jpg", "image/jpeg")
+        self.assertTrue(is_reference(ref))
+        self.assertEqual(ref["bytes"], len(data))
+        self.assertTrue(all(size == 4096 for size in reader.reads))
+        with self.store.open(ref[REFERENCE_KEY]) as f:
+            self.assertEqual(f.read(), data)
+
+    def test_same_content_is_stored_once(self):
+        data = make_jpeg()
+        first = self.store.put_stream(io.BytesIO(data), "a.jpg")
+        second = self.store.put_stream(io.BytesIO(data), "b.jpg")
+        self.assertEqual(first[REFERENCE_KEY], second[REFERENCE_KEY])
+        objects = [f for _, _, files in os.walk(os.path.join(self.root, "objects")) for f in files]
+        self.assertEqual(len(objects), 1)
+        self.assertEqual(os.listdir(os.path.join(self.root, "tmp")), [])
+
+    def test_thumbnail_is_generated_once_and_downsized(self):
+        ref = self.store.put_stream(io.BytesIO(make_jpeg()), "foto.jpg")
+        thumb_path = self.store.thumbnail(ref[REFERENCE_KEY])
+        with Image.open(thumb_path) as thumb:
+            self.assertLessEqual(max(thumb.size), 320)
+        mtime = os.path.getmtime(thumb_path)
+        self.assertEqual(self.store.thumbnail(ref[REFERENCE_KEY]), thumb_path)
+        self.assertEqual(os.path.getmtime(thumb_path), mtime)
+
+    def test_too_large_upload_is_rejected_without_leftovers(self):
+        with self.assertRaises(AttachmentTooLargeError):
+            self.store.put_stream(io.BytesIO(b"x" * (1024 * 1024 + 1)), "grande.bin")
+        self.assertEqual(os.listdir(os.path.join(self.root, "tmp")), [])
+
+    def test_check_size_before_storing(self):
+        self.store.check_size(1024 * 1024, "justo.bin")
+        with self.assertRaises(AttachmentTooLargeError):
+            self.store.check_size(1024 * 1024 + 1, "grande.bin")
+
+    def test_invalid_hash_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.store.original_path("../../etc/passwd")
+
+    def test_sweep_removes_old_unreferenced_objects(self):
+        kept = self.store.put_stream(io.BytesIO(make_jpeg()), "enviada.jpg")[REFERENCE_KEY]
+        orphan = self.store.put_stream(io.BytesIO(make_jpeg(color=(0, 0, 200))), "huerfana.jpg")[REFERENCE_KEY]
+        self.store.thumbnail(orphan)
+        with open(os.path.join(self.root, "tmp", "abandonado.part"), "wb") as f:
+            f.write(b"x")
+        now = time.time() + 3600
+        self.assertEqual(self.store.sweep({kept}, min_age=3600 * 2, now=now), 0)
+        self.assertEqual(self.store.sweep({kept}, min_age=60, now=now), 2)
+        self.assertTrue(os.path.exists(self.store.original_path(kept)))
+        self.assertFalse(os.path.exists(self.store.original_path(orphan)))
+        self.assertFalse(os.path.exists(self.store.thumbnail_path(orphan)))
+        self.assertEqual(os.listdir(os.path.join(self.root, "tmp")), [])
+
+    def test_reupload_protects_object_from_sweep(self):
+        data = make_jpeg()
+        sha256 = self.store.put_stream(io.BytesIO(data), "a.jpg")[REFERENCE_KEY]
+        old = time.time() - 7200
+        os.utime(self.store.original_path(sha256), (old, old))
+        self.store.put_stream(io.BytesIO(data), "b.jpg")
+        self.assertEqual(self.store.sweep(set(), min_age=3600), 0)
+        self.assertTrue(os.path.exists(self.store.original_path(sha256)))
+
+
+if __name__ == '__main__':
+    unittest.main()
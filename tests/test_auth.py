@@ -1,7 +1,7 @@
 import sys
 import os
 import unittest
-from auth import hash_password, check_password
+from auth import hash_password, check_password, authenticate, hash_method, needs_rehash
 
 # Add the parent directory to the Python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -28,5 +28,30 @@ class TestAuth(unittest.TestCase):
 
         self.assertFalse(check_password(wrong_password, hashed_password))
 
+    def test_hash_uses_requested_method(self):
+        hashed = hash_password("mysecretpassword", method="pbkdf2:sha256:1000")
+        self.assertEqual(hash_method(hashed), "pbkdf2:sha256:1000")
+        self.assertTrue(check_password("mysecretpassword", hashed))
+
+    def test_needs_rehash(self):
+        hashed = hash_password("mysecretpassword", method="pbkdf2:sha256:1000")
+        self.assertFalse(needs_rehash(hashed, method="pbkdf2:sha256:1000"))
+        self.assertTrue(needs_rehash(hashed, method="pbkdf2:sha256:2000"))
+        self.assertTrue(needs_rehash(hashed, method="scrypt:16384:8:1"))
+
+    def test_authenticate_rehashes_outdated_hash(self):
+        old = hash_password("mysecretpassword", method="pbkdf2:sha256:1000")
+        ok, new_hash = authenticate(old, "mysecretpassword", method="pbkdf2:sha256:2000")
+        self.assertTrue(ok)
+        self.assertEqual(hash_method(new_hash), "pbkdf2:sha256:2000")
+        self.assertTrue(check_password("mysecretpassword", new_hash))
+
+        self.assertEqual(authenticate(new_hash, "mysecretpassword", method="pbkdf2:sha256:2000"),
+                         (True, None))
+        self.assertEqual(authenticate(old, "wrong", method="pbkdf2:sha256:2000"), (False, None))
+
+    def test_authenticate_unknown_user(self):
+        self.assertEqual(authenticate(None, "mysecretpassword", method="pbkdf2:sha256:1000"), (False, None))
+
 if __name__ == '__main__':
     unittest.main()
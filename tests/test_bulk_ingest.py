@@ -0,0 +1,75 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+import uuid
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bulk_ingest import prepare_row, read_jsonl
+from form_schema import FormValidationError, compile_schema
+
+SCHEMAS = {
+    7: compile_schema([
+        {"Etiqueta del Campo": "Nombre del Centro", "Tipo de Campo": "Texto", "Requerido": True},
+        {"Etiqueta del Campo": "Firma", "Tipo de Campo": "Firma", "Requerido": False},
+    ])
+}
+USERS = {"operador1": 4}
+
+
+def user_id_for(record):
+    return record.get("user_id") or USERS.get(record.get("username"))
+
+
+class TestBulkIngest(unittest.TestCase):
+
+    def test_prepare_valid_row(self):
+        record = {"template_id": "7", "username": "operador1", "created_at": "2026-03-01T10:15:00",
+                  "data": {"Nombre del Centro": "ESCUELA SAN PEDRO", "Firma": b"\x89PNG"}}
+        row, images, refs = prepare_row(record, SCHEMAS.get, user_id_for)
+        template_id, user_id, created_at, data_json, submission_key = row
+        self.assertEqual(str(uuid.UUID(submission_key)), submission_key)
+        self.assertEqual((template_id, user_id), (7, 4))
+        self.assertEqual(created_at.isoformat(), "2026-03-01T10:15:00")
+        self.assertEqual(images, {"Firma": b"\x89PNG"})
+        self.assertEqual(json.loads(data_json)["Firma"], {"firma_png": True, "bytes": 4})
+        self.assertEqual(refs, {})
+
+    def test_prepare_keeps_given_submission_key(self):
+        key = "0f8fad5b-d9cb-469f-a165-70867728950e"
+        record = {"template_id": 7, "user_id": 4, "submission_key": key.upper(),
+                  "data": {"Nombre del Centro": "ESCUELA SAN PEDRO"}}
+        row, _, _ = prepare_row(record, SCHEMAS.get, user_id_for)
+        self.assertEqual(row[4], key)
+
+    def test_row_errors_are_explicit(self):
+        cases = [
+            ({"template_id": 7, "username": "nadie", "data": {"Nombre del Centro": "X"}}, "Usuario desconocido"),
+            ({"template_id": 99, "user_id": 4, "data": {"Nombre del Centro": "X"}}, "no existe"),
+            ({"template_id": 7, "user_id": 4, "data": {"Nombre del Centro": " "}}, "es requerido"),
+            ({"template_id": 7, "user_id": 4, "data": {"Nombre del Centro": "X"}, "created_at": "ayer"}, "created_at"),
+            ({"user_id": 4, "data": {}}, "template_id"),
+            ({"template_id": 7, "user_id": 4, "data": {"Nombre del Centro": "X"}, "submission_key": "abc"},
+             "submission_key"),
+            (["no", "es", "objeto"], "objeto JSON"),
+        ]
+        for record, expected in cases:
+            with self.assertRaises(FormValidationError) as ctx:
+                prepare_row(record, SCHEMAS.get, user_id_for)
+            self.assertIn(expected, str(ctx.exception))
+
+    def test_read_jsonl_reports_line_numbers(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False, encoding="utf-8") as f:
+            f.write('{"template_id": 7, "user_id": 4, "data": {}}\n\n{roto\n{"template_id": 7}\n')
+        try:
+            records, errors = read_jsonl(f.name)
+        finally:
+            os.remove(f.name)
+        self.assertEqual([line for line, _ in records], [1, 4])
+        self.assertEqual([line for line, _ in errors], [3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import centros_data
+
+CSV_CONTENT = (
+    "CODSABER,CENTRO_EDUCATIVO,TIPO_INSTITUCION,REGIONAL,PROVINCIA,CANTON,DISTRITO,LATITUD,LONGITUD\n"
+    "100182-00,CIENTÍFICO DE SAN PEDRO,PÚBLICO,SAN JOSÉ NORTE,SAN JOSÉ,MONTES DE OCA,SAN PEDRO,9.938,-84.047\n"
+    "100299-00,ESCUELA PÉREZ ZELEDÓN,PÚBLICO,PÉREZ ZELEDÓN,SAN JOSÉ,PÉREZ ZELEDÓN,SAN ISIDRO,\"10,947\",\"-84,577\"\n"
+)
+
+
+class TestCentrosData(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.tmpdir, "centros.csv")
+        self.cache_dir = os.path.join(self.tmpdir, "cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write_csv(self, content, encoding):
+        with open(self.csv_path, "w", encoding=encoding) as f:
+            f.write(content)
+
+    def test_detects_cp1252_and_normalizes_types(self):
+        self.write_csv(CSV_CONTENT, "cp1252")
+        df, info = centros_data.load_centros(self.csv_path, self.cache_dir)
+        self.assertEqual(info, {"encoding": "cp1252", "from_cache": False})
+        self.assertEqual(df.loc[0, "CENTRO_EDUCATIVO"], "CIENTÍFICO DE SAN PEDRO")
+        self.assertEqual(str(df["PROVINCIA"].dtype), "category")
+        self.assertAlmostEqual(df.loc[1, "LATITUD"], 10.947)
+
+    def test_second_load_comes_from_cache(self):
+        self.write_csv(CSV_CONTENT, "utf-8")
+        centros_data.load_centros(self.csv_path, self.cache_dir)
+        df, info = centros_data.load_centros(self.csv_path, self.cache_dir)
+        self.assertTrue(info["from_cache"])
+        self.assertEqual(info["encoding"], "utf-8")
+        self.assertEqual(len(df), 2)
+
+    def test_changed_csv_invalidates_cache(self):
+        self.write_csv(CSV_CONTENT, "utf-8")
+        centros_data.load_centros(self.csv_path, self.cache_dir)
+        self.write_csv(CSV_CONTENT + "100300-00,NUEVO,PRIVADO,R,CARTAGO,C,D,9.8,-83.9\n", "utf-8")
+        df, info = centros_data.load_centros(self.csv_path, self.cache_dir)
+        self.assertFalse(info["from_cache"])
+        self.assertEqual(len(df), 3)
+
+    def test_touched_csv_is_read_again(self):
+        self.write_csv(CSV_CONTENT, "utf-8")
+        centros_data.load_centros(self.csv_path, self.cache_dir)
+        stat = os.stat(self.csv_path)
+        os.utime(self.csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        _, info = centros_data.load_centros(self.csv_path, self.cache_dir)
+        self.assertFalse(info["from_cache"])
+        self.assertEqual(os.listdir(self.cache_dir), ["centros.arrow"])
+
+    def test_arrow_table_is_memory_mapped_and_invalidated(self):
+        self.write_csv(CSV_CONTENT, "cp1252")
+        table, info = centros_data.load_centros_table(self.csv_path, self.cache_dir)
+        self.assertEqual(info, {"encoding": "cp1252", "from_cache": False, "memory_mapped": True})
+        self.assertEqual(table.column("PROVINCIA").type.value_type, "large_string")
+
+        table, info = centros_data.load_centros_table(self.csv_path, self.cache_dir)
+        self.assertTrue(info["from_cache"])
+        self.assertEqual(table.column("CENTRO_EDUCATIVO")[0].as_py(), "CIENTÍFICO DE SAN PEDRO")
+
+        self.write_csv(CSV_CONTENT + "100300-00,NUEVO,PRIVADO,R,CARTAGO,C,D,9.8,-83.9\n", "utf-8")
+        table, info = centros_data.load_centros_table(self.csv_path, self.cache_dir)
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(info["encoding"], "utf-8")
+
+if __name__ == '__main__':
+    unittest.main()
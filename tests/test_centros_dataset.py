@@ -0,0 +1,73 @@
+import sys
+import os
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from centros_dataset import CentrosDataset
+from centros_search import CentrosSearchIndex
+
+
+def make_df():
+    df = pd.DataFrame([
+        {"CODSABER": "100182-00", "CENTRO_EDUCATIVO": "CIENTÍFICO COSTARRICENSE DE SAN PEDRO",
+         "PROVINCIA": "SAN JOSÉ", "TIPO_INSTITUCION": "PÚBLICO", "LATITUD": 9.938},
+        {"CODSABER": "100210-00", "CENTRO_EDUCATIVO": "CIENTÍFICO DE PÉREZ ZELEDÓN",
+         "PROVINCIA": "SAN JOSÉ", "TIPO_INSTITUCION": "PÚBLICO", "LATITUD": None},
+        {"CODSABER": "300100-00", "CENTRO_EDUCATIVO": "ESCUELA SAN PEDRO",
+         "PROVINCIA": "CARTAGO", "TIPO_INSTITUCION": "PRIVADO", "LATITUD": 9.86},
+    ])
+    df["PROVINCIA"] = df["PROVINCIA"].astype("category")
+    return df
+
+
+class TestCentrosDataset(unittest.TestCase):
+
+    def setUp(self):
+        df = make_df()
+        self.dataset = CentrosDataset.from_dataframe(df)
+        self.index = CentrosSearchIndex(df)
+
+    def test_without_filters_shares_positions_and_table(self):
+        positions, similarity = self.dataset.select(self.index)
+        self.assertIs(positions, self.dataset.all_positions)
+        self.assertIsNone(similarity)
+        self.assertIs(self.dataset.take(positions), self.dataset.table)
+        with self.assertRaises(ValueError):
+            positions[0] = 2
+
+    def test_search_and_filters_return_positions(self):
+        positions, _ = self.dataset.select(self.index, search_term="san pedro", provincia="CARTAGO")
+        self.assertEqual(positions.tolist(), [2])
+        # TIPO_INSTITUCION no es categórica en el DataFrame: se codifica al construir
+        positions, _ = self.dataset.select(self.index, tipo="PÚBLICO")
+        self.assertEqual(positions.tolist(), [0, 1])
+        positions, _ = self.dataset.select(self.index, provincia="LIMÓN")
+        self.assertEqual(len(positions), 0)
+        self.assertEqual(self.dataset.take(positions).num_rows, 0)
+
+    def test_masks_are_computed_once_per_value(self):
+        mask = self.dataset.equals_mask("PROVINCIA", "SAN JOSÉ")
+        self.assertIs(self.dataset.equals_mask("PROVINCIA", "SAN JOSÉ"), mask)
+        self.assertFalse(mask.flags.writeable)
+
+    def test_fuzzy_keeps_similarity_aligned(self):
+        positions, similarity = self.dataset.select(self.index, search_term="cientifco san pdro",
+                                                    fuzzy=True, provincia="SAN JOSÉ")
+        self.assertEqual(len(positions), len(similarity))
+        self.assertEqual(positions[0], 0)
+        table = self.dataset.take(positions, similarity)
+        self.assertEqual(table.column("SIMILITUD").to_pylist(), similarity.tolist())
+        self.assertNotIn("SIMILITUD", self.dataset.columns)
+
+    def test_numeric_column_uses_nan_for_nulls(self):
+        lats = self.dataset.numeric("LATITUD")
+        self.assertTrue(np.isnan(lats[1]))
+        self.assertAlmostEqual(lats[2], 9.86)
+
+
+if __name__ == '__main__':
+    unittest.main()
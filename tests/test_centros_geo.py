@@ -0,0 +1,67 @@
+import sys
+import os
+import unittest
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from centros_geo import CentrosGeoIndex, haversine_km
+
+BOUNDS = (5.0, 11.5, -87.5, -82.5)
+
+
+def brute_sorted(index, lat, lon):
+    distances = haversine_km(lat, lon, index.lats, index.lons)
+    order = np.lexsort((index.positions, distances))
+    return [int(index.positions[i]) for i in order], distances[order]
+
+
+class TestCentrosGeoIndex(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.lats = rng.uniform(8.0, 11.0, 400)
+        self.lons = rng.uniform(-86.0, -83.0, 400)
+        self.index = CentrosGeoIndex(self.lats, self.lons, cell_deg=0.1, bounds=BOUNDS)
+        self.queries = list(zip(rng.uniform(7.5, 11.5, 50), rng.uniform(-86.5, -82.5, 50)))
+
+    def test_haversine_known_distance(self):
+        # San José - Limón, unos 116 km en línea recta
+        self.assertAlmostEqual(float(haversine_km(9.9281, -84.0907, 9.9907, -83.0360)), 115.9, delta=1.0)
+        self.assertEqual(float(haversine_km(10.0, -84.0, 10.0, -84.0)), 0.0)
+
+    def test_nearest_matches_brute_force(self):
+        for lat, lon in self.queries:
+            expected, _ = brute_sorted(self.index, lat, lon)
+            got = [p for p, _ in self.index.nearest(lat, lon, k=5)]
+            self.assertEqual(got, expected[:5])
+
+    def test_nearest_k_larger_than_dataset(self):
+        self.assertEqual(len(self.index.nearest(9.9, -84.0, k=1000)), 400)
+
+    def test_within_radius_matches_brute_force(self):
+        for lat, lon in self.queries[:20]:
+            expected, distances = brute_sorted(self.index, lat, lon)
+            expected = expected[:int(np.sum(distances <= 25.0))]
+            self.assertEqual([p for p, _ in self.index.within_radius(lat, lon, 25.0)], expected)
+
+    def test_within_bbox(self):
+        expected = sorted(int(p) for p in np.flatnonzero(
+            (self.lats >= 9.0) & (self.lats <= 9.5) & (self.lons >= -84.5) & (self.lons <= -84.0)))
+        self.assertEqual(self.index.within_bbox(9.0, -84.5, 9.5, -84.0), expected)
+
+    def test_invalid_coordinates_are_excluded(self):
+        index = CentrosGeoIndex([9.9, 0.0, np.nan, 9.91, 5e6], [-84.0, 0.0, -84.0, -84.01, -84.0],
+                                cell_deg=0.05, bounds=BOUNDS)
+        self.assertEqual(index.size, 2)
+        self.assertEqual([p for p, _ in index.nearest(9.9, -84.0, k=5)], [0, 3])
+
+    def test_empty_index(self):
+        index = CentrosGeoIndex([], [], bounds=BOUNDS)
+        self.assertEqual(index.nearest(9.9, -84.0), [])
+        self.assertEqual(index.within_radius(9.9, -84.0, 10), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
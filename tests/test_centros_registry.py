@@ -0,0 +1,58 @@
+import sys
+import os
+import unittest
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from centros_registry import CentrosRegistry
+
+
+def make_df():
+    return pd.DataFrame([
+        {"CODSABER": "300100-00", "CENTRO_EDUCATIVO": "ESCUELA SAN PEDRO", "PROVINCIA": "CARTAGO",
+         "TIPO_INSTITUCION": "PRIVADO", "LATITUD": 9.86, "LONGITUD": -83.92},
+        {"CODSABER": "100182-00", "CENTRO_EDUCATIVO": "CIENTÍFICO COSTARRICENSE DE SAN PEDRO", "PROVINCIA": "SAN JOSÉ",
+         "TIPO_INSTITUCION": "PÚBLICO", "LATITUD": 9.94, "LONGITUD": -84.05},
+        {"CODSABER": "100300-00", "CENTRO_EDUCATIVO": "ESCUELA SAN PEDRO", "PROVINCIA": "SAN JOSÉ",
+         "TIPO_INSTITUCION": "PÚBLICO", "LATITUD": 9.93, "LONGITUD": -84.05},
+    ])
+
+
+class TestCentrosRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = CentrosRegistry(make_df())
+
+    def test_get_by_codsaber(self):
+        record = self.registry.get("100300-00")
+        self.assertEqual(record["PROVINCIA"], "SAN JOSÉ")
+        self.assertEqual(record["CENTRO_EDUCATIVO"], "ESCUELA SAN PEDRO")
+        self.assertEqual(self.registry.position_of(" 100300-00 "), 2)
+        self.assertIsNone(self.registry.get("999999-99"))
+        self.assertIsNone(self.registry.get(None))
+
+    def test_duplicate_names_map_to_all_codes(self):
+        self.assertEqual(self.registry.codes_for_name("ESCUELA SAN PEDRO"), ["300100-00", "100300-00"])
+        self.assertEqual(self.registry.codes_for_name("NO EXISTE"), [])
+
+    def test_attach_options_sorted_by_name_then_code(self):
+        self.assertEqual(self.registry.attach_options, ["100182-00", "100300-00", "300100-00"])
+        # Las etiquetas distinguen los centros con el mismo nombre
+        self.assertEqual(self.registry.label("100300-00"), "ESCUELA SAN PEDRO (100300-00 — SAN JOSÉ)")
+        self.assertNotEqual(self.registry.label("100300-00"), self.registry.label("300100-00"))
+
+    def test_filter_options(self):
+        self.assertEqual(self.registry.provincias, ["CARTAGO", "SAN JOSÉ"])
+        self.assertEqual(self.registry.tipos, ["PRIVADO", "PÚBLICO"])
+
+    def test_for_submission_joins_by_codigo_saber(self):
+        record = self.registry.for_submission({"Nombre del Centro": "ESCUELA SAN PEDRO", "Código Saber": "300100-00"})
+        self.assertEqual(record["PROVINCIA"], "CARTAGO")
+        self.assertIsNone(self.registry.for_submission({"Nombre del Centro": "ESCUELA SAN PEDRO"}))
+        self.assertIsNone(self.registry.for_submission(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
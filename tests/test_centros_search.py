@@ -0,0 +1,81 @@
+import sys
+import os
+import unittest
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from centros_search import CentrosSearchIndex, TrigramIndex, fold, trigrams
+
+
+def make_df():
+    return pd.DataFrame([
+        {"CODSABER": "100182-00", "CENTRO_EDUCATIVO": "CIENTÍFICO COSTARRICENSE DE SAN PEDRO",
+         "POBLADO": "CALLE LA CRUZ", "DIRECCION": "50E DE AGRONOMÍA", "PROVINCIA": "SAN JOSÉ", "TIPO_INSTITUCION": "PÚBLICO"},
+        {"CODSABER": "100210-00", "CENTRO_EDUCATIVO": "CIENTÍFICO DE PÉREZ ZELEDÓN",
+         "POBLADO": "SINAI", "DIRECCION": "1 KM NORTE DE LA ESCUELA SINAI", "PROVINCIA": "SAN JOSÉ", "TIPO_INSTITUCION": "PÚBLICO"},
+        {"CODSABER": "300100-00", "CENTRO_EDUCATIVO": "ESCUELA SAN PEDRO",
+         "POBLADO": "SAN PEDRO", "DIRECCION": "FRENTE A LA IGLESIA", "PROVINCIA": "CARTAGO", "TIPO_INSTITUCION": "PRIVADO"},
+    ])
+
+
+class TestCentrosSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.df = make_df()
+        self.index = CentrosSearchIndex(self.df)
+
+    def test_fold_removes_accents_and_case(self):
+        self.assertEqual(fold("Pérez  ZELEDÓN-UNA"), "perez zeledon una")
+
+    def test_accent_insensitive_prefix_search(self):
+        self.assertEqual(self.index.search("zeled"), [1])
+        self.assertEqual(set(self.index.search("cientif")), {0, 1})
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.index.search("cientifico san pedro"), [0])
+
+    def test_name_match_ranks_above_address_match(self):
+        # "escuela" aparece en el nombre de la fila 2 y en la dirección de la fila 1
+        self.assertEqual(self.index.search("escuela"), [2, 1])
+
+    def test_search_by_codsaber(self):
+        self.assertEqual(self.index.search("100210-00"), [1])
+
+    def test_query_cache_is_bounded_by_positions(self):
+        index = CentrosSearchIndex(self.df, query_cache_positions=2, prefix_cache_positions=2)
+        self.assertEqual(index.search("escuela"), [2, 1])
+        self.assertEqual(index._query_cache.get(("escuela",)).tolist(), [2, 1])
+        # Otra consulta de una fila desplaza a la anterior: el total no pasa de 2 posiciones
+        self.assertEqual(index.search("zeled"), [1])
+        self.assertIsNone(index._query_cache.get(("escuela",)))
+        self.assertEqual(index.search("escuela"), [2, 1])
+        self.assertLessEqual(sum(len(m[0]) for m in index._prefix_cache._data.values()), 2)
+
+    def test_empty_query(self):
+        self.assertEqual(self.index.search("  "), [])
+
+class TestTrigramSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.df = make_df()
+        self.index = CentrosSearchIndex(self.df)
+
+    def test_trigrams_are_padded_per_word(self):
+        self.assertEqual(trigrams("Sé"), {"  s", " se", "se "})
+
+    def test_typo_tolerant_match(self):
+        results = self.index.search_fuzzy("cientifco perez seledon", limit=3)
+        self.assertEqual(results[0][0], 1)
+        self.assertGreater(results[0][1], results[-1][1])
+
+    def test_exact_name_scores_one(self):
+        index = TrigramIndex(["LICEO DE SANTIAGO", "LICEO RURAL SANTIAGO"])
+        self.assertEqual(index.search("liceo de santiago")[0], (0, 1.0))
+
+    def test_unrelated_query_returns_nothing(self):
+        self.assertEqual(self.index.search_fuzzy("xyzw"), [])
+
+if __name__ == '__main__':
+    unittest.main()
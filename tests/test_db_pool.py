@@ -0,0 +1,140 @@
+import sys
+import os
+import threading
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import psycopg2
+from psycopg2 import extensions
+from db_pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+    def fetchone(self):
+        return (1,)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.rollbacks = 0
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def make_pool(self, **kwargs):
+        self.created = []
+
+        def connect(dsn):
+            conn = FakeConnection()
+            self.created.append(conn)
+            return conn
+
+        kwargs.setdefault("minconn", 1)
+        kwargs.setdefault("maxconn", 2)
+        kwargs.setdefault("timeout", 0.2)
+        return ConnectionPool("postgresql://test", connect=connect, **kwargs)
+
+    def test_reuses_idle_connection(self):
+        pool = self.make_pool()
+        with pool.connection() as c1:
+            pass
+        with pool.connection() as c2:
+            pass
+        self.assertIs(c1, c2)
+        self.assertEqual(len(self.created), 1)
+
+    def test_open_transaction_is_rolled_back_on_checkin(self):
+        pool = self.make_pool()
+        with pool.connection() as conn:
+            conn.status = extensions.TRANSACTION_STATUS_INTRANS
+        self.assertEqual(conn.rollbacks, 1)
+        self.assertEqual(pool.stats()["idle"], 1)
+
+    def test_operational_error_discards_connection(self):
+        pool = self.make_pool()
+        with self.assertRaises(psycopg2.OperationalError):
+            with pool.connection() as conn:
+                raise psycopg2.OperationalError("boom")
+        self.assertTrue(conn.closed)
+        with pool.connection() as fresh:
+            self.assertIsNot(fresh, conn)
+
+    def test_healthcheck_reconnects_dead_connection(self):
+        pool = self.make_pool(healthcheck_interval=0)
+        with pool.connection() as conn:
+            pass
+        conn.broken = True
+        with pool.connection() as fresh:
+            self.assertIsNot(fresh, conn)
+        self.assertEqual(pool.stats()["reconnects"], 1)
+
+    def test_timeout_when_exhausted(self):
+        pool = self.make_pool(maxconn=1)
+        conn = pool.getconn()
+        with self.assertRaises(PoolTimeoutError):
+            pool.getconn()
+        pool.putconn(conn)
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_waiter_gets_released_connection(self):
+        pool = self.make_pool(maxconn=1, timeout=2)
+        conn = pool.getconn()
+        got = []
+
+        def worker():
+            with pool.connection() as c:
+                got.append(c)
+
+        t = threading.Thread(target=worker)
+        t.start()
+        pool.putconn(conn)
+        t.join(2)
+        self.assertEqual(got, [conn])
+
+    def test_stats(self):
+        pool = self.make_pool(maxconn=3)
+        a = pool.getconn()
+        b = pool.getconn()
+        stats = pool.stats()
+        self.assertEqual(stats["in_use"], 2)
+        self.assertEqual(stats["total"], 2)
+        self.assertEqual(stats["idle"], 0)
+        pool.putconn(a)
+        pool.putconn(b)
+        stats = pool.stats()
+        self.assertEqual(stats["in_use"], 0)
+        self.assertEqual(stats["idle"], 2)
+        self.assertEqual(stats["checkouts"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
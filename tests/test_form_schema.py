@@ -0,0 +1,90 @@
+import sys
+import os
+import datetime
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from form_schema import FormValidationError, compile_schema
+
+STRUCTURE = [
+    {"Etiqueta del Campo": "Nombre del Centro", "Tipo de Campo": "Texto", "Requerido": True},
+    {"Etiqueta del Campo": "Código Saber", "Tipo de Campo": "Texto", "Requerido": False},
+    {"Etiqueta del Campo": "Fecha de Visita", "Tipo de Campo": "Fecha", "Requerido": True},
+    {"Etiqueta del Campo": "Asistentes", "Tipo de Campo": "Tabla Dinámica", "Requerido": True},
+    {"Etiqueta del Campo": "Ubicación", "Tipo de Campo": "Geolocalización", "Requerido": False},
+    {"Etiqueta del Campo": "Firma", "Tipo de Campo": "Firma", "Requerido": True},
+]
+
+
+def valid_data():
+    return {
+        "Nombre del Centro": "Escuela San Pedro",
+        "Código Saber": "",
+        "Fecha de Visita": datetime.date(2026, 3, 1),
+        "Asistentes": [{"Columna 1": "Ana", "Columna 2": "Docente"}],
+        "Ubicación": None,
+        "Firma": b"\x89PNG...",
+    }
+
+
+class TestFormSchema(unittest.TestCase):
+
+    def setUp(self):
+        self.schema = compile_schema(STRUCTURE)
+
+    def test_fields_are_precompiled(self):
+        field = self.schema.fields[0]
+        self.assertEqual(field.key, "form_field_Nombre_del_Centro")
+        self.assertEqual(field.display_label, "Nombre del Centro*")
+        self.assertEqual(field.prefill_column, "CENTRO_EDUCATIVO")
+        self.assertEqual(self.schema.fields[2].display_label, "Fecha de Visita*")
+        self.assertIsNone(self.schema.fields[2].prefill_column)
+
+    def test_schema_is_immutable(self):
+        with self.assertRaises(AttributeError):
+            self.schema.fields[0].label = "Otro"
+        with self.assertRaises(AttributeError):
+            self.schema.fields = ()
+
+    def test_prefill_from_centro(self):
+        centro = {"CENTRO_EDUCATIVO": "ESCUELA SAN PEDRO", "CODSABER": "300100-00", "PROVINCIA": "CARTAGO"}
+        self.assertEqual(self.schema.prefill(centro),
+                         {"Nombre del Centro": "ESCUELA SAN PEDRO", "Código Saber": "300100-00"})
+        self.assertEqual(self.schema.prefill(None), {})
+
+    def test_valid_data(self):
+        self.assertEqual(self.schema.validate(valid_data()), (True, ""))
+
+    def test_required_fields(self):
+        data = valid_data()
+        data["Nombre del Centro"] = "   "
+        self.assertEqual(self.schema.validate(data), (False, "El campo 'Nombre del Centro' es requerido."))
+        data = valid_data()
+        data["Asistentes"] = []
+        self.assertFalse(self.schema.validate(data)[0])
+        data = valid_data()
+        del data["Firma"]
+        self.assertFalse(self.schema.validate(data)[0])
+
+    def test_type_mismatch_is_rejected(self):
+        data = valid_data()
+        data["Ubicación"] = "9.9, -84.0"
+        ok, msg = self.schema.validate(data)
+        self.assertFalse(ok)
+        self.assertIn("Ubicación", msg)
+        with self.assertRaises(FormValidationError):
+            self.schema.check(data)
+
+    def test_date_strings_must_be_real_iso_dates(self):
+        data = valid_data()
+        data["Fecha de Visita"] = "2026-03-01"
+        self.assertEqual(self.schema.validate(data), (True, ""))
+        for value in ["2026-02-30", "01/03/2026", "20260301", "mañana"]:
+            data["Fecha de Visita"] = value
+            with self.assertRaises(FormValidationError):
+                self.schema.check(data)
+
+
+if __name__ == '__main__':
+    unittest.main()
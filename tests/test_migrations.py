@@ -0,0 +1,45 @@
+import sys
+import os
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from migrations import MIGRATIONS, QUERY_PLAN_CHECKS, pending_migrations, _plan_index_names
+
+
+class TestMigrations(unittest.TestCase):
+
+    def test_versions_are_unique_and_ordered(self):
+        versions = [m["version"] for m in MIGRATIONS]
+        self.assertEqual(versions, sorted(set(versions)))
+
+    def test_pending_skips_applied_and_disabled_optional(self):
+        pending = pending_migrations([], enabled_optional=())
+        self.assertTrue(all(not m.get("optional") for m in pending))
+        self.assertEqual(pending_migrations([m["version"] for m in MIGRATIONS]), [])
+
+    def test_optional_migration_applies_once_enabled(self):
+        optional = [m for m in MIGRATIONS if m.get("optional")]
+        applied = [m["version"] for m in MIGRATIONS if not m.get("optional")]
+        pending = pending_migrations(applied, enabled_optional=[m["optional"] for m in optional])
+        self.assertEqual(pending, optional)
+
+    def test_unordered_migrations_are_rejected(self):
+        bad = [{"version": 2, "description": "b", "sql": ""}, {"version": 1, "description": "a", "sql": ""}]
+        with self.assertRaises(ValueError):
+            pending_migrations([], migrations=bad)
+
+    def test_every_checked_index_is_created_by_a_migration(self):
+        all_sql = " ".join(m["sql"] for m in MIGRATIONS)
+        for check in QUERY_PLAN_CHECKS:
+            self.assertIn(check["index"], all_sql)
+
+    def test_plan_index_names(self):
+        plan = [{"Plan": {
+            "Node Type": "Limit",
+            "Plans": [{"Node Type": "Index Scan", "Index Name": "idx_submissions_created_id"}],
+        }}]
+        self.assertEqual(_plan_index_names(plan), {"idx_submissions_created_id"})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import sys
+import os
+import contextlib
+import json
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import query_stats
+from query_stats import Histogram, QueryStats, params_shape
+
+
+def _open_block():
+    # Como database.get_db_connection: el nombre es el de quien abre el bloque
+    return query_stats.measure(query_stats.caller_name(), contextlib.nullcontext("conn"))
+
+
+class TestQueryStats(unittest.TestCase):
+
+    def setUp(self):
+        query_stats.get_stats().reset()
+
+    def test_histogram_percentiles(self):
+        h = Histogram()
+        for ms in [0.5] * 90 + [40] * 9 + [15000]:
+            h.add(ms)
+        d = h.to_dict()
+        self.assertEqual(d["count"], 100)
+        self.assertEqual(d["p50_ms"], 1.0)
+        self.assertEqual(d["p95_ms"], 50.0)
+        self.assertEqual(d["max_ms"], 15000)
+        self.assertEqual(h.percentile(100), 15000)
+        self.assertEqual(d["buckets"], {"<=1": 90, "<=50": 9, ">10000": 1})
+
+    def test_params_shape_hides_values(self):
+        self.assertEqual(params_shape((3, "secreto", [1, 2])), ["int", "str", ["int", "int"]])
+        self.assertEqual(params_shape({"user": "ana"}), {"user": "str"})
+        self.assertEqual(params_shape(list(range(50))), "list[50]")
+        self.assertIsNone(params_shape(None))
+
+    def test_measure_records_caller_and_scope(self):
+        with _open_block() as conn:
+            self.assertEqual(conn, "conn")
+            scope = query_stats._current_scope.get()
+            scope.db_s += 0.001
+            scope.rows += 3
+            scope.queries += 1
+        self.assertIsNone(query_stats._current_scope.get())
+
+        functions = query_stats.get_stats().snapshot()["functions"]
+        name = f"{__name__}.test_measure_records_caller_and_scope"
+        self.assertIn(name, functions)
+        self.assertEqual(functions[name]["calls"], 1)
+        self.assertEqual(functions[name]["rows_total"], 3)
+        self.assertEqual(functions[name]["queries_total"], 1)
+
+    def test_measure_counts_errors(self):
+        with self.assertRaises(ValueError):
+            with _open_block():
+                raise ValueError("fallo")
+        stats = list(query_stats.get_stats().snapshot()["functions"].values())[0]
+        self.assertEqual(stats["errors"], 1)
+
+    def test_slow_log_is_bounded_and_serializable(self):
+        stats = QueryStats(slow_query_ms=10, slow_log_size=2)
+        for i in range(3):
+            stats.record_slow("db_helpers.get_submissions_page", f"SELECT  {i}\n FROM x", (1, "a"), 20 + i)
+        snapshot = json.loads(stats.to_json())
+        self.assertEqual([e["sql"] for e in snapshot["slow_queries"]], ["SELECT 1 FROM x", "SELECT 2 FROM x"])
+        self.assertEqual(snapshot["slow_queries"][0]["params"], ["int", "str"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import sys
+import os
+import contextlib
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import config
+import query_stats
+import rerun_profiler
+from rerun_profiler import RerunProfile
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRerunProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self._enabled = config.RERUN_PROFILER_ENABLED
+        config.RERUN_PROFILER_ENABLED = True
+
+    def tearDown(self):
+        config.RERUN_PROFILER_ENABLED = self._enabled
+
+    def test_breakdown_with_nested_sections(self):
+        clock = FakeClock()
+        profile = RerunProfile("admin", clock=clock)
+        tab, started = profile.open("Dashboard", "sección")
+        clock.now += 0.010
+        profile.add("get_dashboard_counts", "db", 30.0)
+        df, df_started = profile.open("ordenar", "df")
+        clock.now += 0.020
+        profile.close(df, df_started)
+        clock.now += 0.030
+        profile.close(tab, started)
+        clock.now += 0.040
+        profile.finish()
+
+        self.assertAlmostEqual(profile.total_ms, 100.0)
+        rows = profile.breakdown()
+        self.assertEqual([r["ruta"] for r in rows],
+                         ["Dashboard", "Dashboard/get_dashboard_counts", "Dashboard/ordenar", ""])
+        self.assertAlmostEqual(rows[0]["ms"], 60.0)
+        self.assertAlmostEqual(rows[0]["% del rerun"], 60.0)
+        self.assertAlmostEqual(rows[-1]["ms"], 40.0)  # sin medir
+        totals = profile.totals_by_kind()
+        self.assertAlmostEqual(totals["sección"], 60.0)
+        self.assertAlmostEqual(totals["db"], 30.0)
+        self.assertAlmostEqual(totals["df"], 20.0)
+
+    def test_rerun_collects_sections_and_db_blocks(self):
+        finished = []
+        with rerun_profiler.rerun("operador", on_finish=finished.append):
+            with rerun_profiler.section("Mis Envíos"):
+                with query_stats.measure("database.get_submissions_by_user", contextlib.nullcontext()):
+                    pass
+        profile = finished[0]
+        self.assertEqual([e[1] for e in profile.entries], ["Mis Envíos", "Mis Envíos/get_submissions_by_user"])
+        self.assertEqual(profile.entries[1][2], "db")
+
+    def test_on_finish_runs_when_script_stops(self):
+        finished = []
+        with self.assertRaises(RuntimeError):
+            with rerun_profiler.rerun("admin", on_finish=finished.append):
+                with rerun_profiler.section("Dashboard"):
+                    raise RuntimeError("st.stop()")
+        self.assertEqual(len(finished), 1)
+        self.assertIsNotNone(finished[0].entries[0][3])
+
+    def test_fragment_is_section_in_full_rerun_and_own_rerun_alone(self):
+        finished = []
+        with rerun_profiler.rerun("operador", on_finish=finished.append):
+            with rerun_profiler.fragment("Formulario", on_finish=finished.append):
+                pass
+        self.assertEqual(len(finished), 1)
+        self.assertEqual(finished[0].entries[0][1:3], ["Formulario", "fragmento"])
+
+        # Rerun solo del fragmento: app.py no corre, el fragmento abre su propio perfil
+        with rerun_profiler.fragment("Formulario", on_finish=finished.append):
+            with rerun_profiler.section("validar", kind="df"):
+                pass
+        self.assertEqual(finished[1].name, "fragmento: Formulario")
+        self.assertEqual(finished[1].entries[0][1], "validar")
+
+    def test_remember_keeps_last_summaries(self):
+        history = []
+        for i in range(config.RERUN_PROFILER_HISTORY + 3):
+            profile = RerunProfile(f"r{i}", clock=FakeClock())
+            profile.add("get_all_areas", "db", 2.0)
+            profile.finish()
+            rerun_profiler.remember(history, profile)
+        self.assertEqual(len(history), config.RERUN_PROFILER_HISTORY)
+        self.assertEqual(history[-1], {"rerun": f"r{config.RERUN_PROFILER_HISTORY + 2}",
+                                       "total ms": 0.0, "db ms": 2.0})
+
+    def test_compare_medians_by_rerun_name(self):
+        history = [{"rerun": "operador", "total ms": 300.0, "db ms": 120.0},
+                   {"rerun": "fragmento: Formulario", "total ms": 40.0},
+                   {"rerun": "operador", "total ms": 500.0, "db ms": 200.0},
+                   {"rerun": "fragmento: Formulario", "total ms": 60.0}]
+        self.assertEqual(rerun_profiler.compare(history), [
+            {"rerun": "operador", "reruns": 2, "mediana total ms": 400.0, "mediana db ms": 160.0},
+            {"rerun": "fragmento: Formulario", "reruns": 2, "mediana total ms": 50.0, "mediana db ms": 0.0},
+        ])
+
+    def test_disabled_is_noop(self):
+        config.RERUN_PROFILER_ENABLED = False
+        self.assertIs(rerun_profiler.rerun("admin"), rerun_profiler.section("x"))
+        self.assertIs(rerun_profiler.fragment("x"), rerun_profiler._NULL)
+        # Sin rerun activo, section tampoco mide
+        config.RERUN_PROFILER_ENABLED = True
+        self.assertIs(rerun_profiler.section("x"), rerun_profiler._NULL)
+
+
+if __name__ == '__main__':
+    unittest.main()
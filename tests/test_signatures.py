@@ -0,0 +1,62 @@
+import sys
+import os
+import json
+import unittest
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from signatures import (decode_signature, encode_signature, is_legacy_pixel_list,
+                        is_reference, split_signatures)
+
+
+def make_canvas(strokes=True):
+    """Lienzo RGBA como el de st_canvas: fondo transparente y trazos negros opacos."""
+    canvas = np.zeros((200, 700, 4), dtype=np.uint8)
+    if strokes:
+        canvas[90:110, 100:600] = (0, 0, 0, 255)
+        canvas[50:150, 340:346] = (0, 0, 0, 255)
+    return canvas
+
+
+class TestSignatures(unittest.TestCase):
+
+    def test_round_trip_keeps_strokes(self):
+        png = encode_signature(make_canvas())
+        self.assertTrue(png.startswith(b"\x89PNG"))
+        decoded = decode_signature(png)
+        self.assertEqual(decoded.shape, (200, 700))
+        self.assertEqual(decoded[100, 300], 0)
+        self.assertEqual(decoded[10, 10], 255)
+
+    def test_png_is_orders_of_magnitude_smaller_than_pixel_list(self):
+        canvas = make_canvas()
+        legacy_size = len(json.dumps(canvas.tolist()))
+        self.assertLess(len(encode_signature(canvas)) * 100, legacy_size)
+
+    def test_blank_canvas_is_none(self):
+        self.assertIsNone(encode_signature(make_canvas(strokes=False)))
+        self.assertIsNone(encode_signature(np.full((200, 700, 4), 255, dtype=np.uint8)))
+        self.assertIsNone(encode_signature(None))
+
+    def test_legacy_pixel_list_is_accepted(self):
+        legacy = make_canvas()[80:120, 90:130].tolist()
+        self.assertTrue(is_legacy_pixel_list(legacy))
+        self.assertFalse(is_legacy_pixel_list([{"Columna 1": "a"}]))
+        self.assertFalse(is_legacy_pixel_list([]))
+        self.assertIsNotNone(encode_signature(legacy))
+
+    def test_split_signatures_replaces_bytes_with_reference(self):
+        png = encode_signature(make_canvas())
+        payload, images = split_signatures({"Nombre": "Ana", "Firma": png, "Otra": None})
+        self.assertEqual(images, {"Firma": png})
+        self.assertTrue(is_reference(payload["Firma"]))
+        self.assertEqual(payload["Firma"]["bytes"], len(png))
+        self.assertEqual(payload["Nombre"], "Ana")
+        self.assertIsNone(payload["Otra"])
+        json.dumps(payload)
+
+
+if __name__ == '__main__':
+    unittest.main()
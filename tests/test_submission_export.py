@@ -0,0 +1,106 @@
+import sys
+import os
+import csv
+import datetime
+import tempfile
+import unittest
+import zipfile
+from xml.etree import ElementTree
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import submission_export
+from submission_export import BASE_COLUMNS, EXTRA_COLUMN, field_columns, flatten_row, flatten_value
+
+STRUCTURES = [
+    [{"Etiqueta del Campo": "Nombre del Centro"}, {"Etiqueta del Campo": "Asistentes"}],
+    [{"Etiqueta del Campo": "Nombre del Centro"}, {"Etiqueta del Campo": "Firma"}],
+]
+BASE = (12, "Ana", "Visita", "Supervisión", datetime.datetime(2026, 3, 1, 10, 15), True, None, None)
+
+
+class TestSubmissionExport(unittest.TestCase):
+
+    def test_field_columns_union_in_order(self):
+        self.assertEqual(field_columns(STRUCTURES), ["Nombre del Centro", "Asistentes", "Firma"])
+
+    def test_flatten_value(self):
+        self.assertIsNone(flatten_value(None))
+        self.assertEqual(flatten_value({"firma_png": True, "bytes": 10}), "[firma]")
+        self.assertEqual(flatten_value({"adjunto_sha256": "a" * 64, "nombre": "foto.jpg"}), "foto.jpg")
+        self.assertEqual(flatten_value([{"Columna 1": "Ñandú"}]), '[{"Columna 1": "Ñandú"}]')
+        self.assertEqual(flatten_value(3.5), "3.5")
+
+    def test_flatten_row_puts_unknown_keys_in_extra_column(self):
+        fields = field_columns(STRUCTURES)
+        row = flatten_row(BASE, {"Nombre del Centro": "ESCUELA", "Campo viejo": "x"}, fields, set(fields))
+        self.assertEqual(row[:len(BASE)], list(BASE))
+        self.assertEqual(row[len(BASE):], ["ESCUELA", None, None, '{"Campo viejo": "x"}'])
+
+    def _write(self, fmt, rows):
+        fields = field_columns(STRUCTURES)
+        columns = BASE_COLUMNS + fields + [EXTRA_COLUMN]
+        fd, path = tempfile.mkstemp(suffix=submission_export.FORMATS[fmt]["suffix"])
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        writer = submission_export._WRITERS[fmt](path, columns)
+        # Dos bloques, como llegarían del cursor de servidor
+        writer.write([flatten_row(BASE, data, fields, set(fields)) for data in rows[:1]])
+        writer.write([flatten_row(BASE, data, fields, set(fields)) for data in rows[1:]])
+        writer.close()
+        return path, columns
+
+    def test_csv_writer(self):
+        path, columns = self._write("csv", [{"Nombre del Centro": "A"}, {"Nombre del Centro": "B"}])
+        with open(path, encoding="utf-8", newline="") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], columns)
+        self.assertEqual([r[columns.index("Nombre del Centro")] for r in rows[1:]], ["A", "B"])
+
+    @unittest.skipIf(submission_export.pq is None, "pyarrow no instalado")
+    def test_parquet_writer(self):
+        path, columns = self._write("parquet", [{"Nombre del Centro": "A"}, {"Nombre del Centro": "B"}])
+        table = submission_export.pq.read_table(path)
+        self.assertEqual(table.column_names, columns)
+        self.assertEqual(table.column("Nombre del Centro").to_pylist(), ["A", "B"])
+        self.assertEqual(table.column("id").to_pylist(), [12, 12])
+
+    @unittest.skipIf(submission_export.xlsxwriter is None, "xlsxwriter no instalado")
+    def test_xlsx_writer(self):
+        path, columns = self._write("xlsx", [{"Nombre del Centro": "A"}, {"Nombre del Centro": "Ñ"}])
+        rows = read_xlsx(path)
+        self.assertEqual(rows[0], columns)
+        self.assertEqual([r[columns.index("Nombre del Centro")] for r in rows[1:]], ["A", "Ñ"])
+        self.assertEqual([r[columns.index("id")] for r in rows[1:]], ["12", "12"])
+
+
+def read_xlsx(path):
+    """Celdas de la primera hoja como texto (sin openpyxl): filas de listas, '' en las vacías."""
+    ns = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+    with zipfile.ZipFile(path) as book:
+        shared = []
+        if "xl/sharedStrings.xml" in book.namelist():
+            root = ElementTree.fromstring(book.read("xl/sharedStrings.xml"))
+            shared = ["".join(t.text or "" for t in si.iter(f"{{{ns['m']}}}t")) for si in root.findall("m:si", ns)]
+        sheet = ElementTree.fromstring(book.read("xl/worksheets/sheet1.xml"))
+    rows = []
+    for row in sheet.iter(f"{{{ns['m']}}}row"):
+        values = {}
+        for cell in row.findall("m:c", ns):
+            ref = "".join(ch for ch in cell.get("r") if ch.isalpha())
+            col = 0
+            for ch in ref:
+                col = col * 26 + ord(ch) - ord("A") + 1
+            kind = cell.get("t")
+            if kind == "inlineStr":
+                value = "".join(t.text or "" for t in cell.iter(f"{{{ns['m']}}}t"))
+            else:
+                raw = cell.findtext("m:v", default="", namespaces=ns)
+                value = shared[int(raw)] if kind == "s" else raw
+            values[col - 1] = value
+        rows.append([values.get(i, "") for i in range(max(values) + 1)] if values else [])
+    return rows
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import sys
+import os
+import datetime
+import json
+import shutil
+import tempfile
+import time
+import unittest
+
+import psycopg2
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from form_schema import compile_schema
+from submission_queue import SubmissionQueue, SubmissionSpool, dumps_data, loads_data, retry_delay
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+SCHEMAS = {
+    3: compile_schema([
+        {"Etiqueta del Campo": "Nombre", "Tipo de Campo": "Texto", "Requerido": False},
+        {"Etiqueta del Campo": "n", "Tipo de Campo": "Texto", "Requerido": False},
+        {"Etiqueta del Campo": "Firma", "Tipo de Campo": "Firma", "Requerido": False},
+    ]),
+    4: compile_schema([{"Etiqueta del Campo": "X", "Tipo de Campo": "Texto", "Requerido": True}]),
+}
+
+
+class FakeSaveBatch:
+    """bulk_ingest.save_prepared en memoria: idempotente por llave, con errores programables."""
+
+    def __init__(self):
+        self.rows = {}
+        self.signatures = {}
+        self.errors = []
+        self.batches = []
+        self.poison_user = None
+
+    def __call__(self, prepared):
+        if self.errors:
+            raise self.errors.pop(0)
+        if any(row[1] == self.poison_user for row, _, _ in prepared):
+            raise psycopg2.IntegrityError("violates foreign key constraint")
+        self.batches.append(len(prepared))
+        inserted = {}
+        for row, images, _ in prepared:
+            template_id, user_id, created_at, data_json, key = row
+            if key in self.rows:
+                continue
+            self.rows[key] = (template_id, user_id, json.loads(data_json), created_at)
+            self.signatures[key] = images
+            inserted[key] = len(self.rows)
+        return inserted
+
+
+class TestSubmissionQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.clock = FakeClock()
+        self.spool = SubmissionSpool(os.path.join(self.tmp, "spool", "q.sqlite3"), clock=self.clock)
+        self.save = FakeSaveBatch()
+        self.queue = SubmissionQueue(self.spool, save_batch=self.save, schema_for=SCHEMAS.get,
+                                     batch_size=10, clock=self.clock)
+
+    def tearDown(self):
+        self.spool.close()
+        shutil.rmtree(self.tmp)
+
+    def test_data_roundtrip_keeps_bytes(self):
+        data = {"Firma": b"\x89PNG", "Fecha": datetime.date(2026, 3, 1), "Tabla": [{"a": "Ñ"}]}
+        self.assertEqual(loads_data(dumps_data(data)),
+                         {"Firma": b"\x89PNG", "Fecha": "2026-03-01", "Tabla": [{"a": "Ñ"}]})
+
+    def test_enqueue_and_drain(self):
+        key = self.queue.enqueue(3, 7, {"Nombre": "ESCUELA"})
+        self.assertEqual(self.queue.stats()["pending"], 1)
+        self.clock.now += 30
+        self.assertEqual(self.queue.stats()["lag_seconds"], 30)
+
+        self.assertEqual(self.queue.drain_once(), 1)
+        template_id, user_id, data, created_at = self.save.rows[key]
+        self.assertEqual((template_id, user_id, data), (3, 7, {"Nombre": "ESCUELA"}))
+        self.assertEqual(created_at, datetime.datetime(1970, 1, 12, 13, 46, 40, tzinfo=datetime.timezone.utc))
+        self.assertEqual(self.queue.stats()["pending"], 0)
+
+    def test_same_key_enqueued_once(self):
+        self.queue.enqueue(3, 7, {}, submission_key="k1")
+        self.queue.enqueue(3, 7, {}, submission_key="k1")
+        self.assertEqual(self.queue.stats()["pending"], 1)
+
+    def test_batch_is_one_transaction(self):
+        for i in range(3):
+            self.queue.enqueue(3, 7, {"n": str(i)})
+        self.assertEqual(self.queue.drain_once(), 3)
+        self.assertEqual(self.save.batches, [3])
+
+    def test_transient_error_backs_off_whole_batch(self):
+        self.queue.enqueue(3, 7, {"n": "1"})
+        self.queue.enqueue(3, 7, {"n": "2"})
+        self.save.errors = [psycopg2.OperationalError("server closed the connection")]
+
+        self.assertEqual(self.queue.drain_once(), 0)
+        self.assertEqual(self.queue.stats()["pending"], 2)
+        # Ambos esperan su backoff
+        self.assertEqual(self.queue.drain_once(), 0)
+        self.clock.now += retry_delay(1)
+        self.assertEqual(self.queue.drain_once(), 2)
+        self.assertEqual(len(self.save.rows), 2)
+
+    def test_failing_batch_is_split_to_isolate_the_culprit(self):
+        good = self.queue.enqueue(3, 7, {"n": "1"})
+        self.queue.enqueue(3, 99, {"n": "2"})  # usuario borrado: viola la FK
+        self.save.poison_user = 99
+        self.assertEqual(self.queue.drain_once(), 1)
+        self.assertIn(good, self.save.rows)
+        self.assertEqual(self.queue.stats()["pending"], 1)
+
+    def test_validation_error_is_permanent(self):
+        self.queue.enqueue(4, 7, {})
+        self.assertEqual(self.queue.drain_once(), 0)
+        stats = self.queue.stats()
+        self.assertEqual((stats["pending"], stats["failed"]), (0, 1))
+        self.assertIn("requerido", self.spool.failed()[0]["last_error"])
+
+        self.assertEqual(self.queue.requeue_failed(), 1)
+        self.assertEqual(self.queue.stats()["pending"], 1)
+
+    def test_already_saved_key_is_removed(self):
+        key = self.queue.enqueue(3, 7, {})
+        self.save.rows[key] = "guardado antes de una caída"
+        self.assertEqual(self.queue.drain_once(), 1)
+        self.assertEqual(self.queue.stats()["pending"], 0)
+
+    def test_spool_survives_reopen(self):
+        self.queue.enqueue(3, 7, {"Firma": b"png"})
+        self.spool.close()
+        self.spool = SubmissionSpool(os.path.join(self.tmp, "spool", "q.sqlite3"), clock=self.clock)
+        queue = SubmissionQueue(self.spool, save_batch=self.save, schema_for=SCHEMAS.get, clock=self.clock)
+        self.assertEqual(queue.drain_once(), 1)
+        self.assertEqual(list(self.save.signatures.values())[0], {"Firma": b"png"})
+
+    def test_attachment_hashes_of_spooled_submissions(self):
+        ref = {"adjunto_sha256": "a" * 64, "nombre": "foto.jpg", "tipo": "image/jpeg", "bytes": 10}
+        self.queue.enqueue(3, 7, {"Foto": ref, "Nombre": "ESCUELA"})
+        self.queue.enqueue(3, 7, {"Nombre": "OTRA"})
+        self.assertEqual(self.spool.attachment_hashes(), {"a" * 64})
+
+    def test_retry_delay_caps(self):
+        self.assertEqual(retry_delay(1, base=1, maximum=300), 1)
+        self.assertEqual(retry_delay(4, base=1, maximum=300), 8)
+        self.assertEqual(retry_delay(30, base=1, maximum=300), 300)
+
+    def test_background_worker_drains(self):
+        self.queue.poll_interval = 0.05
+        self.queue.start()
+        try:
+            key = self.queue.enqueue(3, 7, {})
+            for _ in range(100):
+                if key in self.save.rows:
+                    break
+                time.sleep(0.02)
+        finally:
+            self.queue.stop()
+        self.assertIn(key, self.save.rows)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import sys
+import os
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from template_cache import VersionedCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestVersionedCache(unittest.TestCase):
+
+    def setUp(self):
+        self.version = 1
+        self.version_reads = 0
+        self.loads = 0
+        self.clock = FakeClock()
+        self.cache = VersionedCache(self._read_version, check_interval=5, clock=self.clock)
+
+    def _read_version(self):
+        self.version_reads += 1
+        return self.version
+
+    def _load(self):
+        self.loads += 1
+        return [{"id": 1, "name": "Área"}]
+
+    def test_repeated_reads_hit_the_cache(self):
+        for _ in range(10):
+            self.cache.get(("areas",), self._load)
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(self.version_reads, 1)
+        self.assertEqual(self.cache.stats()["hits"], 9)
+
+    def test_remote_version_change_clears_after_interval(self):
+        self.cache.get(("areas",), self._load)
+        self.version = 2
+        self.clock.now = 1
+        self.cache.get(("areas",), self._load)
+        self.assertEqual(self.loads, 1)  # dentro del intervalo no se consulta la versión
+        self.clock.now = 6
+        self.cache.get(("areas",), self._load)
+        self.assertEqual(self.loads, 2)
+
+    def test_invalidate_is_immediate(self):
+        self.cache.get(("areas",), self._load)
+        self.cache.invalidate()
+        self.cache.get(("areas",), self._load)
+        self.assertEqual(self.loads, 2)
+
+    def test_none_is_not_cached(self):
+        self.assertIsNone(self.cache.get(("structure", 99), lambda: None))
+        self.assertEqual(self.cache.get(("structure", 99), lambda: [1]), [1])
+
+    def test_load_started_before_invalidation_is_discarded(self):
+        def racing_load():
+            self.cache.invalidate()
+            return "viejo"
+        self.assertEqual(self.cache.get(("areas",), racing_load), "viejo")
+        self.assertEqual(self.cache.get(("areas",), lambda: "nuevo"), "nuevo")
+
+
+if __name__ == '__main__':
+    unittest.main()
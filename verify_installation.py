@@ -74,13 +74,12 @@ def check_database_connection():
     
     try:
         import database
-        conn = database.get_db_connection()
-        
-        with conn.cursor() as cur:
-            cur.execute("SELECT version();")
-            version = cur.fetchone()
-            print(f"   ✅ Conectado a PostgreSQL")
-            print(f"      {version[0][:50]}...")
+        with database.get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT version();")
+                version = cur.fetchone()
+                print(f"   ✅ Conectado a PostgreSQL")
+                print(f"      {version[0][:50]}...")
         
         return True
     except Exception as e:
@@ -105,18 +104,18 @@ def check_tables():
             'form_submissions'
         ]
         
-        conn = database.get_db_connection()
-        with conn.cursor() as cur:
-            for table in tables:
-                cur.execute(f"""
-                    SELECT EXISTS(
-                        SELECT FROM information_schema.tables 
-                        WHERE table_name = '{table}'
-                    );
-                """)
-                exists = cur.fetchone()[0]
-                status = "✅" if exists else "❌"
-                print(f"   {status} {table}")
+        with database.get_db_connection() as conn:
+            with conn.cursor() as cur:
+                for table in tables:
+                    cur.execute(f"""
+                        SELECT EXISTS(
+                            SELECT FROM information_schema.tables 
+                            WHERE table_name = '{table}'
+                        );
+                    """)
+                    exists = cur.fetchone()[0]
+                    status = "✅" if exists else "❌"
+                    print(f"   {status} {table}")
         
         return True
     except Exception as e: